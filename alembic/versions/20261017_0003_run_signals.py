@@ -0,0 +1,42 @@
+"""run signal notification table
+
+Revision ID: 20261017_0003
+Revises: 20260209_0002
+Create Date: 2026-10-17 09:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0003"
+down_revision = "20260209_0002"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if _has_table(bind, "run_signals"):
+        return
+    op.create_table(
+        "run_signals",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("run_id", sa.String(length=36), nullable=False),
+        sa.Column("signal", sa.String(length=16), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["run_id"], ["runs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_run_signals_run_id", "run_signals", ["run_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_run_signals_run_id", table_name="run_signals")
+    op.drop_table("run_signals")
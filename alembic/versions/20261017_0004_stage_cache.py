@@ -0,0 +1,71 @@
+"""stage output cache index and document content hash
+
+Revision ID: 20261017_0004
+Revises: 20261017_0003
+Create Date: 2026-10-17 10:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0004"
+down_revision = "20261017_0003"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(bind, table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    cols = inspector.get_columns(table_name)
+    return any(col["name"] == column_name for col in cols)
+
+
+def _has_table(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if not _has_column(bind, "documents", "content_hash"):
+        with op.batch_alter_table("documents") as batch:
+            batch.add_column(sa.Column("content_hash", sa.String(length=64), nullable=True))
+    if not _has_index(bind, "documents", "ix_documents_content_hash"):
+        op.create_index("ix_documents_content_hash", "documents", ["content_hash"])
+
+    if not _has_table(bind, "stage_cache_entries"):
+        op.create_table(
+            "stage_cache_entries",
+            sa.Column("cache_key", sa.String(length=64), nullable=False),
+            sa.Column("stage_name", sa.String(length=32), nullable=False),
+            sa.Column("content_hash", sa.String(length=64), nullable=False),
+            sa.Column("versions_hash", sa.String(length=64), nullable=False),
+            sa.Column("storage_path", sa.String(length=500), nullable=False),
+            sa.Column("size_bytes", sa.Integer(), nullable=False),
+            sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("last_accessed_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("cache_key"),
+        )
+    if not _has_index(bind, "stage_cache_entries", "ix_stage_cache_entries_content_hash"):
+        op.create_index("ix_stage_cache_entries_content_hash", "stage_cache_entries", ["content_hash"])
+    if not _has_index(bind, "stage_cache_entries", "ix_stage_cache_entries_last_accessed_at"):
+        op.create_index("ix_stage_cache_entries_last_accessed_at", "stage_cache_entries", ["last_accessed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stage_cache_entries_last_accessed_at", table_name="stage_cache_entries")
+    op.drop_index("ix_stage_cache_entries_content_hash", table_name="stage_cache_entries")
+    op.drop_table("stage_cache_entries")
+    op.drop_index("ix_documents_content_hash", table_name="documents")
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("content_hash")
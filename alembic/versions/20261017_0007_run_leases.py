@@ -0,0 +1,46 @@
+"""lease owner and expiry on runs
+
+Revision ID: 20261017_0007
+Revises: 20261017_0006
+Create Date: 2026-10-17 13:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0007"
+down_revision = "20261017_0006"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(bind, table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    cols = inspector.get_columns(table_name)
+    return any(col["name"] == column_name for col in cols)
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    with op.batch_alter_table("runs") as batch:
+        if not _has_column(bind, "runs", "lease_owner"):
+            batch.add_column(sa.Column("lease_owner", sa.String(length=128), nullable=True))
+        if not _has_column(bind, "runs", "lease_expires_at"):
+            batch.add_column(sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+    if not _has_index(bind, "runs", "ix_runs_lease_expires_at"):
+        op.create_index("ix_runs_lease_expires_at", "runs", ["lease_expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_lease_expires_at", table_name="runs")
+    with op.batch_alter_table("runs") as batch:
+        batch.drop_column("lease_expires_at")
+        batch.drop_column("lease_owner")
@@ -0,0 +1,43 @@
+"""next stage of runs handed off between stage workers
+
+Revision ID: 20261017_0009
+Revises: 20261017_0008
+Create Date: 2026-10-17 15:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0009"
+down_revision = "20261017_0008"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(bind, table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    cols = inspector.get_columns(table_name)
+    return any(col["name"] == column_name for col in cols)
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _has_column(bind, "runs", "next_stage"):
+        with op.batch_alter_table("runs") as batch:
+            batch.add_column(sa.Column("next_stage", sa.String(length=16), nullable=True))
+    if not _has_index(bind, "runs", "ix_runs_next_stage"):
+        op.create_index("ix_runs_next_stage", "runs", ["next_stage"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_next_stage", table_name="runs")
+    with op.batch_alter_table("runs") as batch:
+        batch.drop_column("next_stage")
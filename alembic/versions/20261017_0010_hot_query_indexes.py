@@ -0,0 +1,41 @@
+"""composite indexes for the runs, run_stages and quarantine hot queries
+
+Revision ID: 20261017_0010
+Revises: 20261017_0009
+Create Date: 2026-10-17 16:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0010"
+down_revision = "20261017_0009"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("runs", "ix_runs_status_created_at", ["status", "created_at"]),
+    ("runs", "ix_runs_status_tenant_priority", ["status", "tenant_id", "priority"]),
+    ("run_stages", "ix_run_stages_run_stage_attempt", ["run_id", "stage_name", "attempt"]),
+    ("quarantine_items", "ix_quarantine_items_tenant_status_created_at", ["tenant_id", "status", "created_at"]),
+)
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table_name, index_name, columns in INDEXES:
+        if not _has_index(bind, table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for table_name, index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
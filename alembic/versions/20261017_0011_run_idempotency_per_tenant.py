@@ -0,0 +1,52 @@
+"""idempotency keys unique per tenant instead of globally
+
+Revision ID: 20261017_0011
+Revises: 20261017_0010
+Create Date: 2026-10-17 17:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0011"
+down_revision = "20261017_0010"
+branch_labels = None
+depends_on = None
+
+# SQLite reflects the inline UNIQUE of 0001 without a name; batch mode names it by this convention.
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+INDEX_NAME = "uq_runs_tenant_idempotency_key"
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def _global_key_constraints(bind) -> list[str]:
+    inspector = sa.inspect(bind)
+    return [
+        uc["name"] or "uq_runs_idempotency_key"
+        for uc in inspector.get_unique_constraints("runs")
+        if uc["column_names"] == ["idempotency_key"]
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    names = _global_key_constraints(bind)
+    if names:
+        with op.batch_alter_table("runs", naming_convention=NAMING_CONVENTION) as batch:
+            for name in names:
+                batch.drop_constraint(name, type_="unique")
+    if not _has_index(bind, "runs", INDEX_NAME):
+        op.create_index(INDEX_NAME, "runs", ["tenant_id", "idempotency_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="runs")
+    with op.batch_alter_table("runs", naming_convention=NAMING_CONVENTION) as batch:
+        batch.create_unique_constraint("uq_runs_idempotency_key", ["idempotency_key"])
@@ -0,0 +1,48 @@
+"""run payload columns as native JSON (JSONB on Postgres)
+
+Revision ID: 20261017_0012
+Revises: 20261017_0011
+Create Date: 2026-10-17 18:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0012"
+down_revision = "20261017_0011"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("review_reason_codes_json", "decision_log_json", "result_json", "validation_issues_json")
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON as TEXT, so the existing json.dumps values already read back as JSON.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "runs",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.Text(),
+            existing_nullable=True,
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "runs",
+            column,
+            type_=sa.Text(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f"{column}::text",
+        )
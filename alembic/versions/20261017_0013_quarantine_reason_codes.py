@@ -0,0 +1,70 @@
+"""quarantine reason codes as an indexed child table
+
+Revision ID: 20261017_0013
+Revises: 20261017_0012
+Create Date: 2026-10-17 19:00:00
+"""
+from __future__ import annotations
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0013"
+down_revision = "20261017_0012"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_quarantine_reason_codes_tenant_code_status_created_at"
+
+
+def _has_table(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if _has_table(bind, "quarantine_reason_codes"):
+        return
+    reason_codes = op.create_table(
+        "quarantine_reason_codes",
+        sa.Column("quarantine_item_id", sa.String(length=36), nullable=False),
+        sa.Column("reason_code", sa.String(length=64), nullable=False),
+        sa.Column("tenant_id", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["quarantine_item_id"], ["quarantine_items.id"]),
+        sa.PrimaryKeyConstraint("quarantine_item_id", "reason_code"),
+    )
+    op.create_index(INDEX_NAME, "quarantine_reason_codes", ["tenant_id", "reason_code", "status", "created_at"])
+
+    items = sa.table(
+        "quarantine_items",
+        sa.column("id", sa.String),
+        sa.column("tenant_id", sa.String),
+        sa.column("status", sa.String),
+        sa.column("reason_codes_json", sa.Text),
+        sa.column("created_at", sa.DateTime(timezone=True)),
+    )
+    rows = []
+    for item in bind.execute(sa.select(items)).mappings():
+        for code in dict.fromkeys(json.loads(item["reason_codes_json"] or "[]")):
+            rows.append(
+                {
+                    "quarantine_item_id": item["id"],
+                    "reason_code": code,
+                    "tenant_id": item["tenant_id"],
+                    "status": item["status"],
+                    "created_at": item["created_at"],
+                }
+            )
+    if rows:
+        op.bulk_insert(reason_codes, rows)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="quarantine_reason_codes")
+    op.drop_table("quarantine_reason_codes")
@@ -0,0 +1,34 @@
+"""first start time on runs, so the run timeout spans every pickup
+
+Revision ID: 20261017_0014
+Revises: 20261017_0013
+Create Date: 2026-10-17 20:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0014"
+down_revision = "20261017_0013"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(bind, table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    cols = inspector.get_columns(table_name)
+    return any(col["name"] == column_name for col in cols)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _has_column(bind, "runs", "started_at"):
+        with op.batch_alter_table("runs") as batch:
+            batch.add_column(sa.Column("started_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("runs") as batch:
+        batch.drop_column("started_at")
@@ -0,0 +1,48 @@
+"""claim indexes on runs for the lane-ordered dequeue, with and without a tenant
+
+Revision ID: 20261017_0015
+Revises: 20261017_0014
+Create Date: 2026-10-17 21:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0015"
+down_revision = "20261017_0014"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("runs", "ix_runs_claim", ["status", "priority", "created_at", "retry_at", "lease_expires_at"]),
+    ("runs", "ix_runs_claim_tenant", ["status", "tenant_id", "priority", "created_at", "retry_at", "lease_expires_at"]),
+)
+# ix_runs_claim_tenant starts with the same columns, so it takes over the status counts
+SUPERSEDED = ("runs", "ix_runs_status_tenant_priority", ["status", "tenant_id", "priority"])
+
+
+def _has_index(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table_name)
+    return any(idx["name"] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table_name, index_name, columns in INDEXES:
+        if not _has_index(bind, table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+    table_name, index_name, _ = SUPERSEDED
+    if _has_index(bind, table_name, index_name):
+        op.drop_index(index_name, table_name=table_name)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    table_name, index_name, columns = SUPERSEDED
+    if not _has_index(bind, table_name, index_name):
+        op.create_index(index_name, table_name, columns)
+    for table_name, index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
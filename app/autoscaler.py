@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.audit import append_audit_event
+from app.config import settings
+from app.metrics import metrics
+from app.repositories import now_utc, recent_stage_durations_ms, summarize_claimable_runs
+
+
+@dataclass(frozen=True)
+class ScalingSignals:
+    queued: int
+    oldest_queued_seconds: float
+    # Mean time a run spends in the (served) stages, from recent run_stages rows.
+    run_service_ms: float
+
+
+@dataclass(frozen=True)
+class ScalingDecision:
+    current: int
+    target: int
+    reason: str
+
+
+class Autoscaler:
+    """Decides how many worker processes one node should run.
+
+    A worker is added when the backlog exceeds ``queue_per_worker`` per worker,
+    the oldest queued run is older than ``max_queue_age_seconds``, or draining
+    the backlog at the recent per-run service time would take longer than
+    ``target_drain_seconds``; a spike jumps straight to the count the backlog
+    calls for. A worker is retired only when, with one worker fewer, every
+    signal would still sit below ``scale_down_ratio`` of its threshold, so the
+    fleet does not flap around a threshold. No change is made within
+    ``cooldown_seconds`` of the previous one, except to restore the bounds.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_workers: int | None = None,
+        max_workers: int | None = None,
+        queue_per_worker: int | None = None,
+        max_queue_age_seconds: float | None = None,
+        target_drain_seconds: float | None = None,
+        cooldown_seconds: float | None = None,
+        scale_down_ratio: float = 0.5,
+        stages: tuple[str, ...] | None = None,
+    ) -> None:
+        self.min_workers = settings.autoscale_min_workers if min_workers is None else min_workers
+        self.max_workers = max(self.min_workers, settings.autoscale_max_workers if max_workers is None else max_workers)
+        self.queue_per_worker = settings.autoscale_queue_per_worker if queue_per_worker is None else queue_per_worker
+        self.max_queue_age_seconds = (
+            settings.autoscale_max_queue_age_seconds if max_queue_age_seconds is None else max_queue_age_seconds
+        )
+        self.target_drain_seconds = (
+            settings.autoscale_target_drain_seconds if target_drain_seconds is None else target_drain_seconds
+        )
+        self.cooldown_seconds = settings.autoscale_cooldown_seconds if cooldown_seconds is None else cooldown_seconds
+        self.scale_down_ratio = scale_down_ratio
+        self.stages = stages
+        self._last_change: float | None = None
+
+    def collect(self, db: Session) -> ScalingSignals:
+        now = now_utc()
+        summary = summarize_claimable_runs(db, now=now, stages=self.stages)
+        queued = sum(count for count, _ in summary.values())
+        oldest_age = 0.0
+        for _, oldest in summary.values():
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            oldest_age = max(oldest_age, (now - oldest).total_seconds())
+        since = now - timedelta(seconds=settings.autoscale_latency_window_seconds)
+        durations = recent_stage_durations_ms(db, since=since, stages=self.stages)
+        service_ms = sum((sum(samples) / len(samples) for samples in durations.values() if samples), 0.0)
+        return ScalingSignals(queued=queued, oldest_queued_seconds=round(oldest_age, 3), run_service_ms=round(service_ms, 3))
+
+    def decide(self, signals: ScalingSignals, current: int, *, now: float | None = None) -> ScalingDecision | None:
+        """The worker count to move to, or None to stay at ``current``."""
+        now = time.monotonic() if now is None else now
+        # Restoring the bounds (e.g. at startup) neither waits for nor starts a cooldown.
+        if current < self.min_workers:
+            return ScalingDecision(current, self.min_workers, "min_workers")
+        if current > self.max_workers:
+            return ScalingDecision(current, self.max_workers, "max_workers")
+        if self._last_change is not None and now - self._last_change < self.cooldown_seconds:
+            return None
+
+        wanted = max(
+            math.ceil(signals.queued / max(1, self.queue_per_worker)),
+            math.ceil(self._drain_seconds(signals, 1) / self.target_drain_seconds),
+        )
+        if current < self.max_workers:
+            if signals.queued > current * self.queue_per_worker:
+                reason = "queue_depth"
+            elif signals.oldest_queued_seconds > self.max_queue_age_seconds:
+                reason = "queue_age"
+            elif self._drain_seconds(signals, current) > self.target_drain_seconds:
+                reason = "drain_time"
+            else:
+                reason = None
+            if reason is not None:
+                target = min(self.max_workers, max(current + 1, wanted))
+                return self._changed(ScalingDecision(current, target, reason), now)
+
+        fewer = current - 1
+        if fewer >= self.min_workers and all(
+            (
+                signals.queued <= fewer * self.queue_per_worker * self.scale_down_ratio,
+                signals.oldest_queued_seconds <= self.max_queue_age_seconds * self.scale_down_ratio,
+                self._drain_seconds(signals, fewer) <= self.target_drain_seconds * self.scale_down_ratio,
+            )
+        ):
+            return self._changed(ScalingDecision(current, fewer, "idle"), now)
+        return None
+
+    def record(self, decision: ScalingDecision, signals: ScalingSignals) -> None:
+        metrics.inc("autoscaler_scaled_up" if decision.target > decision.current else "autoscaler_scaled_down")
+        append_audit_event(
+            "workers_scaled",
+            payload={
+                "from": decision.current,
+                "to": decision.target,
+                "reason": decision.reason,
+                "stages": list(self.stages) if self.stages is not None else None,
+                "signals": asdict(signals),
+            },
+        )
+
+    def _changed(self, decision: ScalingDecision, now: float) -> ScalingDecision:
+        self._last_change = now
+        return decision
+
+    @staticmethod
+    def _drain_seconds(signals: ScalingSignals, workers: int) -> float:
+        if workers <= 0:
+            return math.inf if signals.queued else 0.0
+        return signals.queued * signals.run_service_ms / 1000 / workers
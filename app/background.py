@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import metrics
+from app.orchestrator import process_run
+from app.repositories import claim_queued_runs
+from app.shutdown import shutdown
+
+
+class BackgroundRunExecutor:
+    """Executes the runs the API starts itself (``background``/``hybrid`` mode) on threads of its own.
+
+    Starlette runs ``BackgroundTasks`` on the threadpool that also serves the
+    sync endpoints, so multi-second pipelines there starve request handling.
+    Here at most ``max_runs`` runs execute at once. A run submitted while every
+    slot is busy is not queued in memory: it stays QUEUED in the ``runs``
+    table, where the workers pick it up in ``hybrid`` mode and, in
+    ``background`` mode, the executor claims it itself once a slot frees.
+    """
+
+    def __init__(self, *, max_runs: int | None = None, worker_id: str | None = None) -> None:
+        self.max_runs = max(1, settings.background_max_runs if max_runs is None else max_runs)
+        # Per process, like worker ids, so two API processes never share a lease.
+        self.worker_id = worker_id or f"api-background:{socket.gethostname()}:{os.getpid()}"
+        self._executor: ThreadPoolExecutor | None = None
+        self._active = 0
+        # Set when a run overflowed to the table; cleared once a claim comes back short.
+        self._backlog = False
+        self._lock = Lock()
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    def submit(self, run_id: str) -> bool:
+        """Start ``run_id`` if a slot is free; False leaves it QUEUED for later."""
+        with self._lock:
+            started = self._active < self.max_runs and not shutdown.requested
+            if started:
+                self._active += 1
+            else:
+                self._backlog = True
+        if not started:
+            metrics.inc("background_runs_overflowed")
+        else:
+            self._pool().submit(self._execute, run_id, None)
+        self._publish()
+        return started
+
+    def _execute(self, run_id: str, lease_owner: str | None) -> None:
+        try:
+            process_run(run_id, self.worker_id, lease_owner=lease_owner)
+        except Exception:  # noqa: BLE001
+            # process_run records its own failures; the reaper handles the rest.
+            pass
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._publish()
+            self._refill()
+
+    def _refill(self) -> None:
+        if settings.execution_mode != "background" or shutdown.requested:
+            return
+        with self._lock:
+            free = self.max_runs - self._active
+            if not self._backlog or free <= 0:
+                return
+            # Hold the slots while claiming so a concurrent submit can't take them twice.
+            self._active += free
+            self._backlog = False
+        run_ids: list[str] = []
+        failed = False
+        db = SessionLocal()
+        try:
+            run_ids = claim_queued_runs(
+                db,
+                owner=self.worker_id,
+                lease_seconds=settings.run_orphan_after_seconds,
+                limit=free,
+            )
+        except Exception:  # noqa: BLE001
+            failed = True
+        finally:
+            db.close()
+        with self._lock:
+            self._active -= free - len(run_ids)
+            if failed or len(run_ids) == free:
+                # Try again when the next run finishes; a full batch means more may be waiting.
+                self._backlog = True
+        for run_id in run_ids:
+            self._pool().submit(self._execute, run_id, self.worker_id)
+        self._publish()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_runs, thread_name_prefix="im-bg-run")
+            return self._executor
+
+    def _publish(self) -> None:
+        active = self.active
+        metrics.set_gauge("background_runs_active", active)
+        metrics.set_gauge("background_runs_capacity", self.max_runs)
+        metrics.set_gauge("background_saturation", round(active / self.max_runs, 3))
+
+
+background_runs = BackgroundRunExecutor()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from threading import Event, Lock
+
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories import delete_run_signals, latest_run_signal_id, list_run_signals_after, now_utc
+
+CANCEL_SIGNAL = "CANCEL"
+
+
+class RunCancelled(RuntimeError):
+    def __init__(self, run_id: str):
+        super().__init__(f"run {run_id} cancelled")
+        self.run_id = run_id
+
+
+class CancelToken:
+    """Cheap in-memory flag that long-running stage code can poll."""
+
+    def __init__(self, run_id: str, registry: "CancellationRegistry | None" = None) -> None:
+        self.run_id = run_id
+        self._event = Event()
+        self._registry = registry
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        if not self._event.is_set() and self._registry is not None:
+            self._registry.poll_shared()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled():
+            raise RunCancelled(self.run_id)
+
+
+class CancellationRegistry:
+    """Routes cancel requests to the tokens of in-flight runs.
+
+    In ``background`` mode the cancel endpoint and the run share a process, so
+    ``request`` flips the token directly. In ``worker``/``hybrid`` mode the
+    endpoint also appends a row to ``run_signals``; executing processes read the
+    rows newer than the last one they have seen, at most once per
+    ``cancel_poll_seconds`` and only while they have runs in flight. A run's
+    rows are deleted when it finishes; ``maybe_prune`` drops the rest once
+    they are older than ``run_signal_retention_seconds``.
+    """
+
+    def __init__(self, *, shared: bool | None = None, poll_seconds: float | None = None) -> None:
+        self.shared = settings.execution_mode in {"worker", "hybrid"} if shared is None else shared
+        self.poll_seconds = settings.cancel_poll_seconds if poll_seconds is None else poll_seconds
+        self._tokens: dict[str, CancelToken] = {}
+        self._lock = Lock()
+        self._poll_lock = Lock()
+        self._last_poll = 0.0
+        self._last_prune = 0.0
+        self._last_signal_id: int | None = None
+
+    def register(self, run_id: str) -> CancelToken:
+        if self.shared and self._last_signal_id is None:
+            self._init_baseline()
+        with self._lock:
+            token = self._tokens.get(run_id)
+            if token is None:
+                token = CancelToken(run_id, self if self.shared else None)
+                self._tokens[run_id] = token
+            return token
+
+    def unregister(self, run_id: str) -> None:
+        with self._lock:
+            self._tokens.pop(run_id, None)
+
+    def request(self, run_id: str) -> bool:
+        with self._lock:
+            token = self._tokens.get(run_id)
+        if token is None:
+            return False
+        token.cancel()
+        return True
+
+    def inflight(self) -> list[str]:
+        with self._lock:
+            return list(self._tokens)
+
+    def poll_shared(self, *, force: bool = False) -> None:
+        if not self.shared:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.poll_seconds:
+            return
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_poll = now
+            with self._lock:
+                if not self._tokens or self._last_signal_id is None:
+                    return
+            db = SessionLocal()
+            try:
+                signals = list_run_signals_after(db, self._last_signal_id, signal=CANCEL_SIGNAL)
+            finally:
+                db.close()
+            for item in signals:
+                self._last_signal_id = max(self._last_signal_id, item.id)
+                self.request(item.run_id)
+        finally:
+            self._poll_lock.release()
+
+    def maybe_prune(self) -> int:
+        if not self.shared:
+            return 0
+        now = time.monotonic()
+        retention = settings.run_signal_retention_seconds
+        if now - self._last_prune < retention / 4:
+            return 0
+        self._last_prune = now
+        db = SessionLocal()
+        try:
+            return delete_run_signals(db, created_before=now_utc() - timedelta(seconds=retention))
+        except Exception:  # noqa: BLE001
+            # Pruning is housekeeping; the next interval retries it.
+            return 0
+        finally:
+            db.close()
+
+    def _init_baseline(self) -> None:
+        # Runs registered after this point read cancel_requested from their row,
+        # so only signals newer than the current head can still concern them.
+        with self._poll_lock:
+            if self._last_signal_id is not None:
+                return
+            db = SessionLocal()
+            try:
+                self._last_signal_id = latest_run_signal_id(db)
+            finally:
+                db.close()
+
+
+cancellations = CancellationRegistry()
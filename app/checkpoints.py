@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, is_dataclass
+from typing import Any
+
+from app.config import PIPELINE_STAGES
+from app.services.extraction import OCRResult, StructuredExtractionResult
+from app.services.storage import load_run_checkpoint, save_run_checkpoint
+
+CHECKPOINT_FORMAT = 1
+
+# The context keys each stage produces; restoring them is enough for every later
+# stage (and complete_run) to proceed as if the stage had just run.
+STAGE_OUTPUTS: dict[str, tuple[str, ...]] = {
+    "PREPROCESS": (),
+    "OCR": ("ocr", "content_hash"),
+    "EXTRACT": ("extraction",),
+    "VALIDATE": ("issues", "quality_status", "quality_reasons", "review_decision", "decision_log"),
+    "PERSIST": ("persisted_payload",),
+    "EXPORT": (),
+}
+_DATACLASS_OUTPUTS = {"ocr": OCRResult, "extraction": StructuredExtractionResult}
+
+
+def _checkpoint_name(stage: str) -> str:
+    return f"{PIPELINE_STAGES.index(stage):02d}_{stage.lower()}.json"
+
+
+def save_checkpoint(run_id: str, stage: str, context: dict[str, Any]) -> str:
+    outputs = {}
+    for key in STAGE_OUTPUTS.get(stage, ()):
+        value = context.get(key)
+        outputs[key] = asdict(value) if is_dataclass(value) else value
+    body = {"format": CHECKPOINT_FORMAT, "run_id": run_id, "stage": stage, "outputs": outputs}
+    return save_run_checkpoint(run_id, _checkpoint_name(stage), json.dumps(body, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def restore_checkpoints(run_id: str, context: dict[str, Any]) -> list[str]:
+    """Load checkpoints in stage order into ``context``; return the restored stages.
+
+    Restoration stops at the first stage without a readable checkpoint, so the
+    result is always a prefix of ``PIPELINE_STAGES`` and execution resumes at
+    the first incomplete stage.
+    """
+    restored: list[str] = []
+    for stage in PIPELINE_STAGES:
+        raw = load_run_checkpoint(run_id, _checkpoint_name(stage))
+        if raw is None:
+            break
+        try:
+            body = json.loads(raw)
+            if body.get("format") != CHECKPOINT_FORMAT or body.get("stage") != stage:
+                break
+            outputs = {}
+            for key, value in (body.get("outputs") or {}).items():
+                cls = _DATACLASS_OUTPUTS.get(key)
+                outputs[key] = cls(**value) if cls is not None and value is not None else value
+        except (ValueError, TypeError):
+            break
+        context.update(outputs)
+        restored.append(stage)
+    return restored
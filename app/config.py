@@ -4,6 +4,56 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
+PIPELINE_STAGES = ("PREPROCESS", "OCR", "EXTRACT", "VALIDATE", "PERSIST", "EXPORT")
+# Dequeue order: workers serve interactive runs first and bulk runs last.
+PRIORITY_CLASSES = ("interactive", "standard", "bulk")
+DEFAULT_PRIORITY = "standard"
+
+
+def _parse_stage_counts(raw: str) -> tuple[tuple[str, int], ...]:
+    pairs = []
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        stage, _, count = part.partition("=")
+        pairs.append((stage.strip().upper(), int(count.strip())))
+    return tuple(pairs)
+
+
+def _parse_tenant_values(raw: str) -> tuple[tuple[str, float], ...]:
+    # tenant=value; tenant ids are case-sensitive, unlike stage names
+    pairs = []
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        tenant, _, value = part.partition("=")
+        pairs.append((tenant.strip(), float(value.strip())))
+    return tuple(pairs)
+
+
+def _parse_lane_depths(raw: str) -> tuple[tuple[str, int, int], ...]:
+    # lane=warn_depth:reject_depth
+    lanes = []
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        lane, _, spec = part.partition("=")
+        warn, reject = (item.strip() for item in spec.split(":"))
+        lanes.append((lane.strip().lower(), int(warn), int(reject)))
+    return tuple(lanes)
+
+
+def _parse_retry_policies(raw: str) -> tuple[tuple[str, float, float, float, int], ...]:
+    # CODE=base_seconds:cap_seconds:jitter:max_attempts
+    policies = []
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        code, _, spec = part.partition("=")
+        base, cap, jitter, attempts = (item.strip() for item in spec.split(":"))
+        policies.append((code.strip().upper(), float(base), float(cap), float(jitter), int(attempts)))
+    return tuple(policies)
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -18,13 +68,76 @@ class Settings:
     rate_limit_per_minute: int = int(os.getenv("INVOICEMIND_RATE_LIMIT_PER_MINUTE", "60"))
     default_tenant_id: str = os.getenv("INVOICEMIND_DEFAULT_TENANT_ID", "default")
     execution_mode: str = os.getenv("INVOICEMIND_EXECUTION_MODE", "background")
+    # Runs the API executes at once in background/hybrid mode; the rest wait QUEUED.
+    background_max_runs: int = int(os.getenv("INVOICEMIND_BACKGROUND_MAX_RUNS", "4"))
     queue_warn_depth: int = int(os.getenv("INVOICEMIND_QUEUE_WARN_DEPTH", "10"))
     queue_reject_depth: int = int(os.getenv("INVOICEMIND_QUEUE_REJECT_DEPTH", "25"))
+    # Per-lane warn/reject depths; lanes not listed use the two values above.
+    lane_queue_depths: tuple[tuple[str, int, int], ...] = _parse_lane_depths(
+        os.getenv("INVOICEMIND_LANE_QUEUE_DEPTHS", "interactive=5:10,bulk=200:500")
+    )
+    # Worker slots that only interactive runs may take.
+    interactive_reserved_slots: int = int(os.getenv("INVOICEMIND_INTERACTIVE_RESERVED_SLOTS", "1"))
+    queue_gauge_reconcile_seconds: float = float(os.getenv("INVOICEMIND_QUEUE_GAUGE_RECONCILE_SECONDS", "5"))
     max_stage_attempts: int = int(os.getenv("INVOICEMIND_MAX_STAGE_ATTEMPTS", "2"))
+    retry_base_seconds: float = float(os.getenv("INVOICEMIND_RETRY_BASE_SECONDS", "0.2"))
+    retry_cap_seconds: float = float(os.getenv("INVOICEMIND_RETRY_CAP_SECONDS", "5"))
+    retry_jitter: float = float(os.getenv("INVOICEMIND_RETRY_JITTER", "0.5"))
+    retry_policies: tuple[tuple[str, float, float, float, int], ...] = _parse_retry_policies(
+        os.getenv("INVOICEMIND_RETRY_POLICIES", "STORAGE_UNAVAILABLE=0.05:1:0.5:4,MODEL_OOM=2:30:0.2:2")
+    )
     stage_timeout_seconds: int = int(os.getenv("INVOICEMIND_STAGE_TIMEOUT_SECONDS", "20"))
     run_timeout_seconds: int = int(os.getenv("INVOICEMIND_RUN_TIMEOUT_SECONDS", "120"))
+    ocr_min_budget_seconds: float = float(os.getenv("INVOICEMIND_OCR_MIN_BUDGET_SECONDS", "2"))
+    extract_min_budget_seconds: float = float(os.getenv("INVOICEMIND_EXTRACT_MIN_BUDGET_SECONDS", "1"))
+    run_heartbeat_seconds: float = float(os.getenv("INVOICEMIND_RUN_HEARTBEAT_SECONDS", "5"))
+    run_orphan_after_seconds: float = float(os.getenv("INVOICEMIND_RUN_ORPHAN_AFTER_SECONDS", "60"))
+    stage_pool_size: int = int(os.getenv("INVOICEMIND_STAGE_POOL_SIZE", "4"))
+    stage_concurrency: tuple[tuple[str, int], ...] = _parse_stage_counts(
+        os.getenv("INVOICEMIND_STAGE_CONCURRENCY", "OCR=2,EXTRACT=2")
+    )
+    pipeline_queue_size: int = int(os.getenv("INVOICEMIND_PIPELINE_QUEUE_SIZE", "8"))
+    async_max_inflight: int = int(os.getenv("INVOICEMIND_ASYNC_MAX_INFLIGHT", "1000"))
+    stage_journal_checkpoints: tuple[str, ...] = tuple(
+        part.strip().upper() for part in os.getenv("INVOICEMIND_STAGE_JOURNAL_CHECKPOINTS", "OCR,VALIDATE").split(",") if part.strip()
+    )
+    cancel_poll_seconds: float = float(os.getenv("INVOICEMIND_CANCEL_POLL_SECONDS", "0.5"))
+    # run_signals rows older than this are pruned; a finished run's rows go at once.
+    run_signal_retention_seconds: float = float(os.getenv("INVOICEMIND_RUN_SIGNAL_RETENTION_SECONDS", "3600"))
+    stage_cache_enabled: bool = os.getenv("INVOICEMIND_STAGE_CACHE_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+    stage_cache_stages: tuple[str, ...] = tuple(
+        part.strip().upper() for part in os.getenv("INVOICEMIND_STAGE_CACHE_STAGES", "OCR,EXTRACT").split(",") if part.strip()
+    )
+    stage_cache_max_bytes: int = int(os.getenv("INVOICEMIND_STAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
     worker_poll_seconds: float = float(os.getenv("INVOICEMIND_WORKER_POLL_SECONDS", "0.75"))
     worker_batch_size: int = int(os.getenv("INVOICEMIND_WORKER_BATCH_SIZE", "4"))
+    worker_concurrency: int = int(os.getenv("INVOICEMIND_WORKER_CONCURRENCY", "1"))
+    # After SIGTERM, how long in-flight runs may keep going before they are requeued.
+    shutdown_grace_seconds: float = float(os.getenv("INVOICEMIND_SHUTDOWN_GRACE_SECONDS", "30"))
+    # Recycle a worker process past either limit; 0 disables it.
+    worker_max_runs: int = int(os.getenv("INVOICEMIND_WORKER_MAX_RUNS", "500"))
+    worker_max_rss_mb: int = int(os.getenv("INVOICEMIND_WORKER_MAX_RSS_MB", "2048"))
+    # Stages this worker executes; empty means all of them.
+    worker_stages: tuple[str, ...] = tuple(
+        part.strip().upper() for part in os.getenv("INVOICEMIND_WORKER_STAGES", "").split(",") if part.strip()
+    )
+    autoscale_min_workers: int = int(os.getenv("INVOICEMIND_AUTOSCALE_MIN_WORKERS", "1"))
+    autoscale_max_workers: int = int(os.getenv("INVOICEMIND_AUTOSCALE_MAX_WORKERS", "4"))
+    autoscale_interval_seconds: float = float(os.getenv("INVOICEMIND_AUTOSCALE_INTERVAL_SECONDS", "10"))
+    autoscale_cooldown_seconds: float = float(os.getenv("INVOICEMIND_AUTOSCALE_COOLDOWN_SECONDS", "60"))
+    autoscale_queue_per_worker: int = int(os.getenv("INVOICEMIND_AUTOSCALE_QUEUE_PER_WORKER", "8"))
+    autoscale_max_queue_age_seconds: float = float(os.getenv("INVOICEMIND_AUTOSCALE_MAX_QUEUE_AGE_SECONDS", "60"))
+    autoscale_target_drain_seconds: float = float(os.getenv("INVOICEMIND_AUTOSCALE_TARGET_DRAIN_SECONDS", "120"))
+    autoscale_latency_window_seconds: float = float(os.getenv("INVOICEMIND_AUTOSCALE_LATENCY_WINDOW_SECONDS", "300"))
+    worker_wakeup_enabled: bool = os.getenv("INVOICEMIND_WORKER_WAKEUP_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+    # Poll interval while a wakeup listener is active; polling is only the fallback then.
+    worker_wakeup_fallback_seconds: float = float(os.getenv("INVOICEMIND_WORKER_WAKEUP_FALLBACK_SECONDS", "5"))
+    fair_share_enabled: bool = os.getenv("INVOICEMIND_FAIR_SHARE_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+    tenant_weights: tuple[tuple[str, float], ...] = _parse_tenant_values(os.getenv("INVOICEMIND_TENANT_WEIGHTS", ""))
+    tenant_default_weight: float = float(os.getenv("INVOICEMIND_TENANT_DEFAULT_WEIGHT", "1"))
+    # 0 means no per-tenant cap on runs in flight
+    tenant_max_inflight: tuple[tuple[str, float], ...] = _parse_tenant_values(os.getenv("INVOICEMIND_TENANT_MAX_INFLIGHT", ""))
+    tenant_default_max_inflight: int = int(os.getenv("INVOICEMIND_TENANT_DEFAULT_MAX_INFLIGHT", "0"))
     low_confidence_threshold: float = float(os.getenv("INVOICEMIND_LOW_CONFIDENCE_THRESHOLD", "0.60"))
     low_ocr_confidence_threshold: float = float(os.getenv("INVOICEMIND_LOW_OCR_CONFIDENCE_THRESHOLD", "0.55"))
     required_field_coverage_threshold: float = float(os.getenv("INVOICEMIND_REQUIRED_FIELD_COVERAGE_THRESHOLD", "0.80"))
@@ -66,12 +179,22 @@ class Settings:
 settings = Settings()
 
 
+def queue_depth_limits(priority: str) -> tuple[int, int]:
+    """(warn, reject) queue depths for one priority lane."""
+    for lane, warn, reject in settings.lane_queue_depths:
+        if lane == priority:
+            return warn, reject
+    return settings.queue_warn_depth, settings.queue_reject_depth
+
+
 def ensure_storage_dirs() -> None:
     root = Path(settings.storage_root)
     (root / "raw").mkdir(parents=True, exist_ok=True)
     (root / "runs").mkdir(parents=True, exist_ok=True)
     (root / "audit").mkdir(parents=True, exist_ok=True)
     (root / "quarantine").mkdir(parents=True, exist_ok=True)
+    (root / "cache").mkdir(parents=True, exist_ok=True)
+    (root / "wakeup").mkdir(parents=True, exist_ok=True)
 
 
 def validate_settings(cfg: Settings) -> None:
@@ -81,23 +204,102 @@ def validate_settings(cfg: Settings) -> None:
 
     if cfg.execution_mode not in {"background", "worker", "hybrid"}:
         raise ValueError(f"Invalid INVOICEMIND_EXECUTION_MODE: {cfg.execution_mode}")
+    if cfg.background_max_runs < 1:
+        raise ValueError("INVOICEMIND_BACKGROUND_MAX_RUNS must be >= 1")
 
     if cfg.queue_warn_depth < 0:
         raise ValueError("INVOICEMIND_QUEUE_WARN_DEPTH must be >= 0")
     if cfg.queue_reject_depth <= cfg.queue_warn_depth:
         raise ValueError("INVOICEMIND_QUEUE_REJECT_DEPTH must be > INVOICEMIND_QUEUE_WARN_DEPTH")
+    for lane, warn, reject in cfg.lane_queue_depths:
+        if lane not in PRIORITY_CLASSES:
+            raise ValueError(f"Invalid INVOICEMIND_LANE_QUEUE_DEPTHS lane: {lane}")
+        if warn < 0 or reject <= warn:
+            raise ValueError(f"INVOICEMIND_LANE_QUEUE_DEPTHS for {lane} must satisfy 0 <= warn < reject")
+    if cfg.interactive_reserved_slots < 0:
+        raise ValueError("INVOICEMIND_INTERACTIVE_RESERVED_SLOTS must be >= 0")
+    if cfg.queue_gauge_reconcile_seconds <= 0:
+        raise ValueError("INVOICEMIND_QUEUE_GAUGE_RECONCILE_SECONDS must be > 0")
 
     if cfg.max_stage_attempts < 1:
         raise ValueError("INVOICEMIND_MAX_STAGE_ATTEMPTS must be >= 1")
+    for code, base, cap, jitter, attempts in ((None, cfg.retry_base_seconds, cfg.retry_cap_seconds, cfg.retry_jitter, 1), *cfg.retry_policies):
+        name = f"INVOICEMIND_RETRY_POLICIES[{code}]" if code else "INVOICEMIND_RETRY_*"
+        if base <= 0 or cap < base:
+            raise ValueError(f"{name}: base must be > 0 and cap >= base")
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError(f"{name}: jitter must be between 0 and 1")
+        if attempts < 1:
+            raise ValueError(f"{name}: max attempts must be >= 1")
     if cfg.stage_timeout_seconds < 1:
         raise ValueError("INVOICEMIND_STAGE_TIMEOUT_SECONDS must be >= 1")
     if cfg.run_timeout_seconds < cfg.stage_timeout_seconds:
         raise ValueError("INVOICEMIND_RUN_TIMEOUT_SECONDS must be >= INVOICEMIND_STAGE_TIMEOUT_SECONDS")
+    if cfg.ocr_min_budget_seconds < 0 or cfg.extract_min_budget_seconds < 0:
+        raise ValueError("INVOICEMIND_OCR_MIN_BUDGET_SECONDS and INVOICEMIND_EXTRACT_MIN_BUDGET_SECONDS must be >= 0")
+    if cfg.run_heartbeat_seconds <= 0:
+        raise ValueError("INVOICEMIND_RUN_HEARTBEAT_SECONDS must be > 0")
+    if cfg.run_orphan_after_seconds < cfg.run_heartbeat_seconds * 3:
+        raise ValueError("INVOICEMIND_RUN_ORPHAN_AFTER_SECONDS must be >= 3x INVOICEMIND_RUN_HEARTBEAT_SECONDS")
+    if cfg.stage_pool_size < 1:
+        raise ValueError("INVOICEMIND_STAGE_POOL_SIZE must be >= 1")
+    for stage, count in cfg.stage_concurrency:
+        if stage not in PIPELINE_STAGES:
+            raise ValueError(f"Invalid INVOICEMIND_STAGE_CONCURRENCY stage: {stage}")
+        if count < 1:
+            raise ValueError("INVOICEMIND_STAGE_CONCURRENCY values must be >= 1")
+    if cfg.pipeline_queue_size < 1:
+        raise ValueError("INVOICEMIND_PIPELINE_QUEUE_SIZE must be >= 1")
+    if cfg.async_max_inflight < 1:
+        raise ValueError("INVOICEMIND_ASYNC_MAX_INFLIGHT must be >= 1")
+    unknown_checkpoints = set(cfg.stage_journal_checkpoints) - set(PIPELINE_STAGES)
+    if unknown_checkpoints:
+        raise ValueError(f"Invalid INVOICEMIND_STAGE_JOURNAL_CHECKPOINTS: {', '.join(sorted(unknown_checkpoints))}")
 
+    if cfg.cancel_poll_seconds <= 0:
+        raise ValueError("INVOICEMIND_CANCEL_POLL_SECONDS must be > 0")
+    if cfg.run_signal_retention_seconds <= cfg.cancel_poll_seconds:
+        raise ValueError("INVOICEMIND_RUN_SIGNAL_RETENTION_SECONDS must be > INVOICEMIND_CANCEL_POLL_SECONDS")
+    unknown_cache_stages = set(cfg.stage_cache_stages) - {"OCR", "EXTRACT"}
+    if unknown_cache_stages:
+        raise ValueError(f"Invalid INVOICEMIND_STAGE_CACHE_STAGES: {', '.join(sorted(unknown_cache_stages))}")
+    if cfg.stage_cache_max_bytes < 1:
+        raise ValueError("INVOICEMIND_STAGE_CACHE_MAX_BYTES must be >= 1")
     if cfg.worker_poll_seconds <= 0:
         raise ValueError("INVOICEMIND_WORKER_POLL_SECONDS must be > 0")
     if cfg.worker_batch_size < 1:
         raise ValueError("INVOICEMIND_WORKER_BATCH_SIZE must be >= 1")
+    if cfg.worker_concurrency < 1:
+        raise ValueError("INVOICEMIND_WORKER_CONCURRENCY must be >= 1")
+    if cfg.shutdown_grace_seconds < 0:
+        raise ValueError("INVOICEMIND_SHUTDOWN_GRACE_SECONDS must be >= 0")
+    if cfg.worker_max_runs < 0:
+        raise ValueError("INVOICEMIND_WORKER_MAX_RUNS must be >= 0")
+    if cfg.worker_max_rss_mb < 0:
+        raise ValueError("INVOICEMIND_WORKER_MAX_RSS_MB must be >= 0")
+    unknown_worker_stages = set(cfg.worker_stages) - set(PIPELINE_STAGES)
+    if unknown_worker_stages:
+        raise ValueError(f"Invalid INVOICEMIND_WORKER_STAGES: {', '.join(sorted(unknown_worker_stages))}")
+    if cfg.autoscale_min_workers < 0 or cfg.autoscale_max_workers < max(1, cfg.autoscale_min_workers):
+        raise ValueError("INVOICEMIND_AUTOSCALE_MAX_WORKERS must be >= INVOICEMIND_AUTOSCALE_MIN_WORKERS and >= 1")
+    if cfg.autoscale_queue_per_worker < 1:
+        raise ValueError("INVOICEMIND_AUTOSCALE_QUEUE_PER_WORKER must be >= 1")
+    for name, value in (
+        ("INVOICEMIND_AUTOSCALE_INTERVAL_SECONDS", cfg.autoscale_interval_seconds),
+        ("INVOICEMIND_AUTOSCALE_MAX_QUEUE_AGE_SECONDS", cfg.autoscale_max_queue_age_seconds),
+        ("INVOICEMIND_AUTOSCALE_TARGET_DRAIN_SECONDS", cfg.autoscale_target_drain_seconds),
+        ("INVOICEMIND_AUTOSCALE_LATENCY_WINDOW_SECONDS", cfg.autoscale_latency_window_seconds),
+    ):
+        if value <= 0:
+            raise ValueError(f"{name} must be > 0")
+    if cfg.autoscale_cooldown_seconds < 0:
+        raise ValueError("INVOICEMIND_AUTOSCALE_COOLDOWN_SECONDS must be >= 0")
+    if cfg.worker_wakeup_fallback_seconds <= 0:
+        raise ValueError("INVOICEMIND_WORKER_WAKEUP_FALLBACK_SECONDS must be > 0")
+    if cfg.tenant_default_weight <= 0 or any(weight <= 0 for _, weight in cfg.tenant_weights):
+        raise ValueError("INVOICEMIND_TENANT_WEIGHTS values must be > 0")
+    if cfg.tenant_default_max_inflight < 0 or any(cap < 0 for _, cap in cfg.tenant_max_inflight):
+        raise ValueError("INVOICEMIND_TENANT_MAX_INFLIGHT values must be >= 0")
 
     thresholds = [
         ("INVOICEMIND_LOW_CONFIDENCE_THRESHOLD", cfg.low_confidence_threshold),
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.config import settings
 
@@ -19,3 +22,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """Commit once for a whole request or stage.
+
+    Repository writes inside the block pass ``commit=False``: they only stage
+    their changes, and the block commits them together in one transaction
+    (rolling back if it raises). Ids and timestamps are assigned client-side,
+    so objects are not expired by the commit and reading them afterwards
+    costs no reload round trip.
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.expire_on_commit = expire_on_commit
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(RuntimeError):
+    def __init__(self, what: str):
+        super().__init__(f"deadline exceeded before {what}")
+        self.what = what
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """An absolute point on the monotonic clock that work must finish by.
+
+    The orchestrator derives one per stage from the run timeout and the stage
+    timeout, whichever ends first, and passes it down so engine calls can size
+    their own timeouts from ``remaining()`` instead of starting work the run can
+    no longer afford.
+    """
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + max(0.0, seconds))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def earliest(self, other: "Deadline | None") -> "Deadline":
+        if other is None or self.expires_at <= other.expires_at:
+            return self
+        return other
+
+    def raise_if_expired(self, what: str) -> None:
+        if self.expired():
+            raise DeadlineExceeded(what)
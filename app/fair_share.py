@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from threading import Lock
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import metrics
+from app.repositories import claim_queued_runs, count_inflight_runs_by_tenant, now_utc, summarize_claimable_runs
+
+
+class FairShareScheduler:
+    """Deficit round robin across tenants, in front of ``claim_queued_runs``.
+
+    Each claim cycle visits the tenants with claimable runs in rotating order,
+    crediting each ``weight`` runs of deficit per round and letting it claim as
+    many whole runs as its deficit covers, up to its in-flight cap. A tenant
+    with a 50k backlog therefore takes its weighted share of each batch rather
+    than the whole batch, and a tenant whose queue empties forfeits its
+    deficit. The state is per worker process; the ``runs`` table stays the
+    only queue.
+    """
+
+    def __init__(
+        self,
+        *,
+        weights: dict[str, float] | None = None,
+        default_weight: float | None = None,
+        max_inflight: dict[str, int] | None = None,
+        default_max_inflight: int | None = None,
+    ) -> None:
+        self.weights = dict(settings.tenant_weights) if weights is None else dict(weights)
+        self.default_weight = settings.tenant_default_weight if default_weight is None else default_weight
+        caps = dict(settings.tenant_max_inflight) if max_inflight is None else dict(max_inflight)
+        self.max_inflight = {tenant: int(cap) for tenant, cap in caps.items()}
+        self.default_max_inflight = settings.tenant_default_max_inflight if default_max_inflight is None else default_max_inflight
+        self._order: list[str] = []
+        self._deficits: dict[str, float] = {}
+        self._ages: dict[str, dict[tuple[tuple[str, ...] | None, tuple[str, ...] | None], float]] = {}
+        self._lock = Lock()
+
+    def weight_for(self, tenant_id: str) -> float:
+        return self.weights.get(tenant_id, self.default_weight)
+
+    def room_for(self, tenant_id: str, inflight: int) -> int | None:
+        cap = self.max_inflight.get(tenant_id, self.default_max_inflight)
+        return None if cap <= 0 else max(0, cap - inflight)
+
+    def plan(self, backlog: dict[str, int], inflight: dict[str, int], limit: int) -> dict[str, int]:
+        """How many runs to claim per tenant this cycle, ``limit`` in total at most."""
+        with self._lock:
+            order = [tenant for tenant in self._order if backlog.get(tenant, 0) > 0]
+            order += sorted(tenant for tenant, count in backlog.items() if count > 0 and tenant not in order)
+            self._deficits = {tenant: self._deficits.get(tenant, 0.0) for tenant in order}
+            remaining = {tenant: backlog[tenant] for tenant in order}
+            room = {tenant: self.room_for(tenant, inflight.get(tenant, 0)) for tenant in order}
+            allocation: dict[str, int] = {}
+            granted = 0
+            last_visited: int | None = None
+            while granted < limit:
+                visited = False
+                for idx, tenant in enumerate(order):
+                    if granted >= limit:
+                        break
+                    if remaining[tenant] <= 0 or room[tenant] == 0:
+                        continue
+                    visited = True
+                    last_visited = idx
+                    self._deficits[tenant] += self.weight_for(tenant)
+                    take = min(int(self._deficits[tenant]), remaining[tenant], limit - granted)
+                    if room[tenant] is not None:
+                        take = min(take, room[tenant])
+                    if take <= 0:
+                        continue
+                    allocation[tenant] = allocation.get(tenant, 0) + take
+                    self._deficits[tenant] -= take
+                    remaining[tenant] -= take
+                    if room[tenant] is not None:
+                        room[tenant] -= take
+                    granted += take
+                if not visited:
+                    break
+            # The next cycle starts with the tenant after the last one served.
+            if last_visited is not None:
+                order = order[last_visited + 1 :] + order[: last_visited + 1]
+            self._order = order
+            return allocation
+
+    def claim(
+        self,
+        db: Session,
+        *,
+        owner: str,
+        lease_seconds: float,
+        limit: int,
+        priorities: tuple[str, ...] | None = None,
+        stages: tuple[str, ...] | None = None,
+    ) -> list[str]:
+        now = now_utc()
+        summary = summarize_claimable_runs(db, now=now, priorities=priorities, stages=stages)
+        self._publish_queue_age(summary, now, (priorities, stages))
+        backlog = {tenant: count for tenant, (count, _) in summary.items()}
+        if not backlog:
+            return []
+        inflight = count_inflight_runs_by_tenant(db, now=now)
+        claimed: list[str] = []
+        for tenant, count in self.plan(backlog, inflight, limit).items():
+            claimed += claim_queued_runs(
+                db,
+                owner=owner,
+                lease_seconds=lease_seconds,
+                limit=count,
+                tenant_id=tenant,
+                priorities=priorities,
+                stages=stages,
+            )
+        return claimed
+
+    def _publish_queue_age(
+        self,
+        summary: dict[str, tuple[int, datetime]],
+        now: datetime,
+        scope: tuple[tuple[str, ...] | None, tuple[str, ...] | None],
+    ) -> None:
+        # Claims may cover a subset of lanes (and stages); a tenant's age is its oldest run across all of them.
+        with self._lock:
+            for tenant in list(self._ages):
+                self._ages[tenant].pop(scope, None)
+            for tenant, (_, oldest) in summary.items():
+                if oldest.tzinfo is None:
+                    oldest = oldest.replace(tzinfo=timezone.utc)
+                self._ages.setdefault(tenant, {})[scope] = max(0.0, (now - oldest).total_seconds())
+            for tenant, ages in list(self._ages.items()):
+                metrics.set_gauge(f"queue_age_seconds:{tenant}", round(max(ages.values(), default=0.0), 3))
+                if not ages:
+                    del self._ages[tenant]
+
+
+fair_share = FairShareScheduler()
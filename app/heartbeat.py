@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.audit import append_audit_event
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import metrics
+from app.repositories import list_orphaned_runs, now_utc, requeue_orphaned_run, touch_run_heartbeats
+
+
+class RunHeartbeat:
+    """Keeps ``runs.heartbeat_at`` fresh for the runs this process is executing.
+
+    One daemon thread per process bumps every tracked run with a single UPDATE
+    each ``run_heartbeat_seconds``, however many runs are in flight. A run whose
+    heartbeat stops advancing belongs to a dead process.
+    """
+
+    def __init__(self, *, interval_seconds: float | None = None) -> None:
+        self.interval_seconds = settings.run_heartbeat_seconds if interval_seconds is None else interval_seconds
+        self._runs: set[str] = set()
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def track(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.add(run_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = Thread(target=self._loop, name="im-run-heartbeat", daemon=True)
+                self._thread.start()
+
+    def untrack(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.discard(run_id)
+
+    def tracked(self) -> list[str]:
+        with self._lock:
+            return sorted(self._runs)
+
+    def beat(self) -> int:
+        run_ids = self.tracked()
+        if not run_ids:
+            return 0
+        db = SessionLocal()
+        try:
+            return touch_run_heartbeats(db, run_ids, lease_seconds=settings.run_orphan_after_seconds)
+        finally:
+            db.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.beat()
+            except Exception:  # noqa: BLE001
+                # A missed beat is harmless unless it persists past the orphan threshold.
+                continue
+
+
+class OrphanReaper:
+    """Requeues RUNNING runs whose heartbeat is older than ``run_orphan_after_seconds``.
+
+    The requeued run keeps its stage checkpoints, so the worker that picks it up
+    resumes at the first incomplete stage instead of starting over. Worker
+    loops call ``maybe_reap``; a process without one (the API) uses ``start``.
+    """
+
+    def __init__(self, *, stale_after_seconds: float | None = None, interval_seconds: float | None = None) -> None:
+        self.stale_after_seconds = settings.run_orphan_after_seconds if stale_after_seconds is None else stale_after_seconds
+        self.interval_seconds = self.stale_after_seconds / 2 if interval_seconds is None else interval_seconds
+        self._last_reap = 0.0
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def start(self, on_requeued: Callable[[str], object] | None = None) -> None:
+        """Reap every ``interval_seconds`` on a daemon thread until ``stop``.
+
+        ``on_requeued`` is called with each run put back to QUEUED, so a process
+        that executes runs itself can start them again.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._loop, args=(on_requeued,), name="im-orphan-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, on_requeued: Callable[[str], object] | None) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.reap(on_requeued=on_requeued)
+            except Exception:  # noqa: BLE001
+                # The next interval retries; a run stays orphaned until then.
+                continue
+
+    def maybe_reap(self) -> list[str]:
+        now = time.monotonic()
+        if now - self._last_reap < self.interval_seconds:
+            return []
+        self._last_reap = now
+        try:
+            return self.reap()
+        except Exception:  # noqa: BLE001
+            return []
+
+    def reap(
+        self,
+        db: Session | None = None,
+        *,
+        limit: int = 50,
+        on_requeued: Callable[[str], object] | None = None,
+    ) -> list[str]:
+        own_session = db is None
+        session = SessionLocal() if own_session else db
+        stale_before = now_utc() - timedelta(seconds=self.stale_after_seconds)
+        reaped: list[str] = []
+        try:
+            for run in list_orphaned_runs(session, stale_before=stale_before, limit=limit):
+                status = requeue_orphaned_run(session, run, stale_before=stale_before)
+                if status is None:
+                    continue
+                reaped.append(run.id)
+                metrics.inc("run_orphans_requeued" if status == "QUEUED" else "run_cancelled")
+                append_audit_event("run_orphan_reaped", run_id=run.id, payload={"status": status})
+                if on_requeued is not None and status == "QUEUED":
+                    on_requeued(run.id)
+        finally:
+            if own_session:
+                session.close()
+        return reaped
+
+
+heartbeats = RunHeartbeat()
+orphan_reaper = OrphanReaper()
@@ -17,8 +17,11 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "doc_quarantined": "Document is quarantined and cannot be processed.",
         "quarantine_not_found": "Quarantine item not found.",
         "quarantine_reprocessed": "Quarantine item reprocessed.",
+        "invalid_cursor": "Invalid pagination cursor.",
         "queue_overloaded": "Queue is overloaded. Please retry later.",
         "queue_backpressure": "Run accepted under backpressure conditions.",
+        "invalid_priority": "Unknown priority class. Use interactive, standard or bulk.",
+        "invalid_run_fields": "Unknown run field. Use names from the run response, e.g. status,review_decision.",
         "unauthorized": "Unauthorized.",
         "forbidden": "Forbidden.",
         "token_issued": "Access token issued.",
@@ -36,8 +39,11 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "doc_quarantined": "سند در قرنطینه است و قابل پردازش نیست.",
         "quarantine_not_found": "آیتم قرنطینه پیدا نشد.",
         "quarantine_reprocessed": "آیتم قرنطینه دوباره پردازش شد.",
+        "invalid_cursor": "نشانگر صفحه‌بندی نامعتبر است.",
         "queue_overloaded": "صف پردازش بیش از حد شلوغ است. کمی بعد دوباره تلاش کنید.",
         "queue_backpressure": "اجرا در شرایط فشار صف پذیرفته شد.",
+        "invalid_priority": "کلاس اولویت نامعتبر است. از interactive، standard یا bulk استفاده کنید.",
+        "invalid_run_fields": "فیلد اجرا نامعتبر است. از نام‌های پاسخ اجرا استفاده کنید، مانند status,review_decision.",
         "unauthorized": "عدم احراز هویت.",
         "forbidden": "دسترسی مجاز نیست.",
         "token_issued": "توکن دسترسی صادر شد.",
@@ -1,16 +1,40 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 
+from app.background import background_runs
 from app.config import ensure_storage_dirs, settings, validate_settings
 from app.database import Base, engine
+from app.heartbeat import orphan_reaper
+from app.orchestrator import drain_inflight_runs, recover_queued_runs
 from app.routers import auth, documents, governance, health, quarantine, runs
+from app.shutdown import shutdown
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Chained so uvicorn still sees the signal and stops accepting requests;
+    # ours starts the grace period for the background runs at the same time.
+    shutdown.install_signal_handlers(chain=True)
+    if settings.execution_mode == "background":
+        await asyncio.to_thread(recover_queued_runs)
+    if settings.execution_mode in {"background", "hybrid"}:
+        # No worker loop reaps in this process: requeue the runs a crashed API
+        # process left RUNNING and resume them here from their checkpoints.
+        orphan_reaper.start(on_requeued=background_runs.submit)
+    yield
+    shutdown.request()
+    orphan_reaper.stop()
+    await asyncio.to_thread(drain_inflight_runs)
 
 
 def create_app() -> FastAPI:
     validate_settings(settings)
-    app = FastAPI(title=settings.app_name, version=settings.app_version)
+    app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
 
     ensure_storage_dirs()
     Base.metadata.create_all(bind=engine)
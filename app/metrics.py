@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import random
 from dataclasses import dataclass, field
 from threading import Lock
 
+# Samples kept per observed key for percentiles (uniform reservoir, Algorithm R).
+RESERVOIR_SIZE = 512
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
 
 @dataclass
 class AppMetrics:
@@ -13,10 +22,32 @@ class AppMetrics:
     run_failed: int = 0
     run_timed_out: int = 0
     run_cancelled: int = 0
+    run_resumed: int = 0
+    run_handed_off: int = 0
+    run_interrupted: int = 0
+    background_runs_overflowed: int = 0
+    run_orphans_requeued: int = 0
+    worker_children_lost: int = 0
+    worker_wakeups: int = 0
+    worker_recycled_rss: int = 0
+    worker_recycled_run_count: int = 0
+    autoscaler_scaled_up: int = 0
+    autoscaler_scaled_down: int = 0
     stage_retried: int = 0
+    stage_degraded: int = 0
+    stage_pool_poisoned: int = 0
+    stage_pool_reaped: int = 0
+    stage_pool_recycled: int = 0
+    stage_cache_hit: int = 0
+    stage_cache_miss: int = 0
+    stage_cache_evicted: int = 0
+    stage_cache_error: int = 0
     quarantine_created: int = 0
     quarantine_reprocessed: int = 0
     queue_depth: int = 0
+    _gauges: dict[str, float] = field(default_factory=dict)
+    _observations: dict[str, dict[str, float]] = field(default_factory=dict)
+    _reservoirs: dict[str, list[float]] = field(default_factory=dict)
     _lock: Lock = field(default_factory=Lock)
 
     def inc(self, key: str, amount: int = 1) -> None:
@@ -27,9 +58,27 @@ class AppMetrics:
         with self._lock:
             self.queue_depth = depth
 
+    def set_gauge(self, key: str, value: float) -> None:
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, key: str, value: float) -> None:
+        with self._lock:
+            stats = self._observations.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+            reservoir = self._reservoirs.setdefault(key, [])
+            if len(reservoir) < RESERVOIR_SIZE:
+                reservoir.append(value)
+            else:
+                slot = random.randrange(int(stats["count"]))
+                if slot < RESERVOIR_SIZE:
+                    reservoir[slot] = value
+
     def snapshot(self) -> dict:
         with self._lock:
-            return {
+            out = {
                 "run_created": self.run_created,
                 "run_succeeded": self.run_succeeded,
                 "run_warn": self.run_warn,
@@ -37,11 +86,41 @@ class AppMetrics:
                 "run_failed": self.run_failed,
                 "run_timed_out": self.run_timed_out,
                 "run_cancelled": self.run_cancelled,
+                "run_resumed": self.run_resumed,
+                "run_handed_off": self.run_handed_off,
+                "run_interrupted": self.run_interrupted,
+                "background_runs_overflowed": self.background_runs_overflowed,
+                "run_orphans_requeued": self.run_orphans_requeued,
+                "worker_children_lost": self.worker_children_lost,
+                "worker_wakeups": self.worker_wakeups,
+                "worker_recycled_rss": self.worker_recycled_rss,
+                "worker_recycled_run_count": self.worker_recycled_run_count,
+                "autoscaler_scaled_up": self.autoscaler_scaled_up,
+                "autoscaler_scaled_down": self.autoscaler_scaled_down,
                 "stage_retried": self.stage_retried,
+                "stage_degraded": self.stage_degraded,
+                "stage_pool_poisoned": self.stage_pool_poisoned,
+                "stage_pool_reaped": self.stage_pool_reaped,
+                "stage_pool_recycled": self.stage_pool_recycled,
+                "stage_cache_hit": self.stage_cache_hit,
+                "stage_cache_miss": self.stage_cache_miss,
+                "stage_cache_evicted": self.stage_cache_evicted,
+                "stage_cache_error": self.stage_cache_error,
                 "quarantine_created": self.quarantine_created,
                 "quarantine_reprocessed": self.quarantine_reprocessed,
                 "queue_depth": self.queue_depth,
             }
+            out.update(self._gauges)
+            for key, stats in self._observations.items():
+                count = int(stats["count"])
+                out[f"{key}_count"] = count
+                out[f"{key}_avg"] = round(stats["sum"] / count, 3) if count else 0.0
+                out[f"{key}_max"] = round(stats["max"], 3)
+                reservoir = self._reservoirs.get(key)
+                if reservoir:
+                    out[f"{key}_p50"] = round(_percentile(reservoir, 0.50), 3)
+                    out[f"{key}_p95"] = round(_percentile(reservoir, 0.95), 3)
+            return out
 
 
 metrics = AppMetrics()
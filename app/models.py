@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -13,6 +15,14 @@ def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Native JSON (JSONB on Postgres); a Python None is stored as SQL NULL, not as JSON 'null'.
+JSONPayload = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+
+def _payload_column() -> Any:
+    return mapped_column(JSONPayload, nullable=True, deferred=True, deferred_group="payload")
+
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -26,6 +36,7 @@ class Document(Base):
     ingestion_status: Mapped[str] = mapped_column(String(32), default="ACCEPTED")
     quality_tier: Mapped[str | None] = mapped_column(String(16), nullable=True)
     quality_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
 
     runs: Mapped[list["Run"]] = relationship("Run", back_populates="document")
@@ -34,25 +45,46 @@ class Document(Base):
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        # queue scans: status = 'QUEUED' ordered by age
+        Index("ix_runs_status_created_at", "status", "created_at"),
+        # claim_queued_runs: one lane in age order, lease/retry checked from the index
+        Index("ix_runs_claim", "status", "priority", "created_at", "retry_at", "lease_expires_at"),
+        # the same per tenant (fair share); its prefix also answers the per-tenant status counts
+        Index("ix_runs_claim_tenant", "status", "tenant_id", "priority", "created_at", "retry_at", "lease_expires_at"),
+        Index("uq_runs_tenant_idempotency_key", "tenant_id", "idempotency_key", unique=True),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     document_id: Mapped[str] = mapped_column(String(36), ForeignKey("documents.id"), nullable=False)
     tenant_id: Mapped[str] = mapped_column(String(64), default="default", nullable=False, index=True)
     replay_of_run_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
-    idempotency_key: Mapped[str | None] = mapped_column(String(128), unique=True, nullable=True)
+    # Unique per tenant (uq_runs_tenant_idempotency_key); enqueue_run inserts against it.
+    idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
     status: Mapped[str] = mapped_column(String(32), default="QUEUED")
+    priority: Mapped[str] = mapped_column(String(16), default="standard", nullable=False, index=True)
     requested_by: Mapped[str] = mapped_column(String(64), default="system")
     model_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
     route_name: Mapped[str | None] = mapped_column(String(64), nullable=True)
     error_code: Mapped[str | None] = mapped_column(String(64), nullable=True)
     review_decision: Mapped[str | None] = mapped_column(String(32), nullable=True)
-    review_reason_codes_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    decision_log_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    validation_issues_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Pipeline output, decoded by the column type. Deferred: a run row loads without
+    # them unless the caller asks (get_run(payload=...)), so status reads stay small.
+    review_reason_codes_json: Mapped[list[str] | None] = _payload_column()
+    decision_log_json: Mapped[dict[str, Any] | None] = _payload_column()
+    result_json: Mapped[dict[str, Any] | None] = _payload_column()
+    validation_issues_json: Mapped[list[dict[str, Any]] | None] = _payload_column()
     cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    # First time the run went RUNNING; INVOICEMIND_RUN_TIMEOUT_SECONDS counts from here across pickups.
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    retry_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set while QUEUED between stage workers; NULL means start from the first stage.
+    next_stage: Mapped[str | None] = mapped_column(String(16), nullable=True, index=True)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     document: Mapped[Document] = relationship("Document", back_populates="runs")
@@ -61,6 +93,7 @@ class Run(Base):
 
 class RunStage(Base):
     __tablename__ = "run_stages"
+    __table_args__ = (Index("ix_run_stages_run_stage_attempt", "run_id", "stage_name", "attempt"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     run_id: Mapped[str] = mapped_column(String(36), ForeignKey("runs.id"), nullable=False)
@@ -75,8 +108,32 @@ class RunStage(Base):
     run: Mapped[Run] = relationship("Run", back_populates="stages")
 
 
+class RunSignal(Base):
+    __tablename__ = "run_signals"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    run_id: Mapped[str] = mapped_column(String(36), ForeignKey("runs.id"), nullable=False, index=True)
+    signal: Mapped[str] = mapped_column(String(16), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+
+
+class StageCacheEntry(Base):
+    __tablename__ = "stage_cache_entries"
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    stage_name: Mapped[str] = mapped_column(String(32), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    versions_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    last_accessed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, index=True)
+
+
 class QuarantineItem(Base):
     __tablename__ = "quarantine_items"
+    __table_args__ = (Index("ix_quarantine_items_tenant_status_created_at", "tenant_id", "status", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     document_id: Mapped[str] = mapped_column(String(36), ForeignKey("documents.id"), nullable=False, index=True)
@@ -93,3 +150,24 @@ class QuarantineItem(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
 
     document: Mapped[Document] = relationship("Document", back_populates="quarantine_items")
+    reasons: Mapped[list["QuarantineReasonCode"]] = relationship(
+        "QuarantineReasonCode", back_populates="item", cascade="all, delete-orphan"
+    )
+
+
+# One row per reason code of a quarantine item, so filtering and counting by code happen in SQL.
+# reason_codes_json stays the ordered list the API returns; tenant_id, status and created_at
+# are copies of the item's (kept in step by the repository) so the index alone answers them.
+class QuarantineReasonCode(Base):
+    __tablename__ = "quarantine_reason_codes"
+    __table_args__ = (
+        Index("ix_quarantine_reason_codes_tenant_code_status_created_at", "tenant_id", "reason_code", "status", "created_at"),
+    )
+
+    quarantine_item_id: Mapped[str] = mapped_column(String(36), ForeignKey("quarantine_items.id"), primary_key=True)
+    reason_code: Mapped[str] = mapped_column(String(64), primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    item: Mapped[QuarantineItem] = relationship("QuarantineItem", back_populates="reasons")
@@ -1,19 +1,37 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import socket
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
-from dataclasses import asdict
+from concurrent.futures import wait as wait_futures
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Collection
 
 from sqlalchemy.orm import Session
 
 from app.audit import append_audit_event
-from app.config import settings
+from app.checkpoints import restore_checkpoints, save_checkpoint
+from app.cancellation import CancelToken, RunCancelled, cancellations
+from app.config import PIPELINE_STAGES, settings
+from app.deadlines import Deadline, DeadlineExceeded
 from app.database import SessionLocal
 from app.metrics import metrics
-from app.repositories import count_runs_by_status, get_document, get_run, update_run_status, upsert_stage
+from app.queue_gauge import queue_gauge
+from app.heartbeat import heartbeats
+from app.repositories import (
+    get_document,
+    get_run,
+    list_restartable_runs,
+    list_run_stages,
+    now_utc,
+    release_run_lease,
+    start_run,
+    update_run_status,
+)
+from app.retry import policy_for, retry_scheduler
 from app.services.extraction import (
     OCRResult,
     StructuredExtractionResult,
@@ -24,8 +42,13 @@ from app.services.extraction import (
 )
 from app.services.review_policy import evaluate_review_decision, status_from_decision
 from app.services.storage import save_run_artifact, save_run_output
+from app.stage_cache import file_content_hash, stage_cache
+from app.stage_journal import StageJournal
+from app.shutdown import shutdown
+from app.stage_pools import get_stage_pool
+from app.wakeup import notify_workers
 
-STAGES = ["PREPROCESS", "OCR", "EXTRACT", "VALIDATE", "PERSIST", "EXPORT"]
+STAGES = list(PIPELINE_STAGES)
 TERMINAL_STATUSES = {"SUCCESS", "WARN", "NEEDS_REVIEW", "FAILED", "CANCELLED"}
 TRANSIENT_ERROR_CODES = {
     "OCR_TIMEOUT",
@@ -36,6 +59,9 @@ TRANSIENT_ERROR_CODES = {
     "STORAGE_UNAVAILABLE",
     "MODEL_OOM",
 }
+SINGLE_ATTEMPT_STAGES = {"PREPROCESS", "VALIDATE", "EXPORT"}
+TIMEOUT_RETRYABLE_STAGES = {"OCR", "EXTRACT", "PERSIST", "EXPORT"}
+CANCEL_CHECK_SECONDS = 0.2
 STAGE_TIMEOUT_ERROR_CODE = {
     "PREPROCESS": "PREPROCESS_TIMEOUT",
     "OCR": "OCR_TIMEOUT",
@@ -54,229 +80,755 @@ class StageExecutionError(RuntimeError):
         self.detail = detail
 
 
-def process_run(run_id: str, worker_id: str = "api-background") -> None:
-    db: Session = SessionLocal()
+class RunInterrupted(StageExecutionError):
+    """The process is shutting down and the grace period is over; requeue the run at ``stage``."""
+
+    def __init__(self, stage: str, *, during: bool = False):
+        where = "during" if during else "before"
+        super().__init__("WORKER_SHUTDOWN", retryable=True, detail=f"shutdown {where} {stage}")
+        self.stage = stage
+
+
+class RetryDeferred(Exception):
+    """A stage failed transiently; the run should come back to it after ``delay_seconds``."""
+
+    def __init__(self, *, stage: str, attempt: int, delay_seconds: float, error_code: str):
+        super().__init__(f"{stage} attempt {attempt} failed with {error_code}; retry in {delay_seconds:.2f}s")
+        self.stage = stage
+        self.attempt = attempt
+        self.delay_seconds = delay_seconds
+        self.error_code = error_code
+
+
+@dataclass
+class RunToken:
+    """A run moving through the stages, carrying its session, journal and context."""
+
+    run_id: str
+    worker_id: str
+    db: Session
+    journal: StageJournal
+    run: Any = None
+    doc: Any = None
+    context: dict[str, Any] = field(default_factory=dict)
+    # Monotonic time of the run's first start, rebased from runs.started_at on every pickup.
+    run_started: float = 0.0
+    cancel: CancelToken | None = None
+    restored: set[str] = field(default_factory=set)
+    attempts: dict[str, int] = field(default_factory=dict)
+    deadline: Deadline | None = None
+    lease_owner: str | None = None
+
+
+def process_run(
+    run_id: str,
+    worker_id: str = "api-background",
+    *,
+    lease_owner: str | None = None,
+    stages: Collection[str] | None = None,
+) -> None:
+    """Execute a run; with ``stages``, only those and hand the run off at the first other one."""
+    token = open_run(run_id, worker_id, lease_owner=lease_owner)
     try:
-        run = get_run(db, run_id)
-        if not run or run.status in TERMINAL_STATUSES:
-            _sync_queue_depth(db)
-            return
-        if run.status == "RUNNING":
-            _sync_queue_depth(db)
+        if not begin_run(token):
             return
+        for stage in STAGES:
+            if stages is not None and stage not in stages and stage not in token.restored:
+                hand_off_run(token, stage)
+                return
+            advance_run(token, stage)
+        complete_run(token)
+    except RetryDeferred as retry:
+        defer_run(token, retry)
+    except RunInterrupted as exc:
+        interrupt_run(token, exc.stage)
+    except StageExecutionError as exc:
+        fail_run(token, exc)
+    except Exception:  # noqa: BLE001
+        fail_run(token, None)
+    finally:
+        close_run(token)
 
-        update_run_status(db, run, status="RUNNING", route_name="ocr_llm_pipeline")
-        _sync_queue_depth(db)
 
-        doc = get_document(db, run.document_id)
-        if not doc:
-            update_run_status(db, run, status="FAILED", error_code="DOCUMENT_NOT_FOUND", finished=True)
-            metrics.inc("run_failed")
-            _sync_queue_depth(db)
-            return
-        if doc.ingestion_status != "ACCEPTED":
-            update_run_status(db, run, status="FAILED", error_code="DOCUMENT_QUARANTINED", finished=True)
-            metrics.inc("run_failed")
-            _sync_queue_depth(db)
-            return
+def open_run(run_id: str, worker_id: str, *, lease_owner: str | None = None) -> RunToken:
+    """Open a run for execution; ``lease_owner`` is who claimed it, when that is not ``worker_id``."""
+    db: Session = SessionLocal()
+    return RunToken(
+        run_id=run_id,
+        worker_id=worker_id,
+        db=db,
+        journal=StageJournal(db, run_id),
+        lease_owner=lease_owner or worker_id,
+    )
 
-        context: dict[str, Any] = {
-            "ocr": None,
-            "extraction": None,
-            "issues": [],
-            "quality_status": "SUCCESS",
-            "quality_reasons": [],
-            "review_decision": "AUTO_APPROVED",
-            "decision_log": None,
-            "quality_tier": doc.quality_tier,
-            "quality_score": doc.quality_score,
-            "worker_id": worker_id,
-        }
-        run_started = time.monotonic()
 
-        for stage in STAGES:
-            _ensure_not_cancelled(db, run, stage)
-            _ensure_run_not_timed_out(run_started)
-            _execute_stage_with_retry(
-                db=db,
-                run=run,
-                doc=doc,
-                stage=stage,
-                context=context,
-                worker_id=worker_id,
-                run_started=run_started,
-            )
+def begin_run(token: RunToken) -> bool:
+    db = token.db
+    if shutdown.requested:
+        # Claimed but not started: hand the lease back to the workers staying up.
+        release_run_lease(db, token.run_id, owner=token.lease_owner or token.worker_id)
+        return False
+    token.cancel = cancellations.register(token.run_id)
+    run = get_run(db, token.run_id)
+    if not run or run.status in TERMINAL_STATUSES:
+        return False
+    if run.status == "RUNNING":
+        return False
+    deferred_at = run.updated_at if run.retry_at is not None else None
+    handed_off_at = run.updated_at if run.next_stage is not None and deferred_at is None else None
+    if not start_run(
+        db,
+        run,
+        owner=token.lease_owner or token.worker_id,
+        lease_seconds=settings.run_orphan_after_seconds,
+        route_name="ocr_llm_pipeline",
+    ):
+        # Another worker (or the API background task) owns this run.
+        return False
+    if run.cancel_requested:
+        token.cancel.cancel()
+    heartbeats.track(run.id)
+    _sync_queue_depth()
+    token.run = run
+    # The run timeout counts from the first start (runs.started_at), not from
+    # this pickup: retries, hand-offs and requeues don't buy a fresh budget.
+    token.run_started = time.monotonic() - _elapsed_seconds(run.started_at or now_utc())
+    token.deadline = Deadline(token.run_started + max(1, settings.run_timeout_seconds))
+    if token.deadline.expired():
+        fail_run(token, StageExecutionError("RUN_TIMEOUT", retryable=False, detail="run budget exhausted before pickup"))
+        return False
 
-        extraction: StructuredExtractionResult = context["extraction"]
-        issues: list[dict[str, Any]] = context["issues"]
-        reason_codes: list[str] = context.get("quality_reasons") or []
-        review_decision: str = context.get("review_decision") or "AUTO_APPROVED"
-        decision_log: dict[str, Any] | None = context.get("decision_log")
-        final_status = status_from_decision(decision=review_decision, issues=issues)
-
-        update_run_status(
-            db,
-            run,
-            status=final_status,
-            model_name=extraction.model_name,
-            route_name=extraction.route_name,
-            review_decision=review_decision,
-            review_reason_codes=reason_codes,
-            decision_log=decision_log,
-            result=extraction.result,
-            validation_issues=issues,
+    doc = get_document(db, run.document_id)
+    if not doc:
+        update_run_status(db, run, status="FAILED", error_code="DOCUMENT_NOT_FOUND", finished=True)
+        metrics.inc("run_failed")
+        return False
+    if doc.ingestion_status != "ACCEPTED":
+        update_run_status(db, run, status="FAILED", error_code="DOCUMENT_QUARANTINED", finished=True)
+        metrics.inc("run_failed")
+        return False
+
+    token.doc = doc
+    token.context = {
+        "ocr": None,
+        "extraction": None,
+        "issues": [],
+        "quality_status": "SUCCESS",
+        "quality_reasons": [],
+        "review_decision": "AUTO_APPROVED",
+        "decision_log": None,
+        "quality_tier": doc.quality_tier,
+        "quality_score": doc.quality_score,
+        "worker_id": token.worker_id,
+        "cancel_token": token.cancel,
+    }
+    restored = restore_checkpoints(run.id, token.context)
+    if restored or deferred_at is not None:
+        _resume_from_history(token, restored, retrying=deferred_at is not None, handed_off=handed_off_at is not None)
+    if deferred_at is not None:
+        metrics.observe("stage_retry_wait_ms", _elapsed_seconds(deferred_at) * 1000)
+    elif handed_off_at is not None:
+        metrics.observe("stage_handoff_wait_ms", _elapsed_seconds(handed_off_at) * 1000)
+    elif not restored:
+        # First pickup only: enqueue-to-RUNNING wait, per priority lane.
+        metrics.observe(f"lane_{run.priority}_queue_wait_ms", _elapsed_seconds(run.created_at) * 1000)
+    return True
+
+
+def _resume_from_history(token: RunToken, restored: list[str], *, retrying: bool, handed_off: bool = False) -> None:
+    token.restored = set(restored)
+    rows = list_run_stages(token.db, token.run_id)
+    for row in rows:
+        token.attempts[row.stage_name] = max(token.attempts.get(row.stage_name, 0), int(row.attempt))
+    if retrying and not restored:
+        return
+    # The journal may not have flushed SUCCESS for every checkpointed stage
+    # before the previous worker died; fill in the rows it lost.
+    durable = {row.stage_name for row in rows if row.status == "SUCCESS"}
+    for stage in restored:
+        if stage in durable:
+            continue
+        token.journal.record(
+            stage_name=stage,
+            status="SUCCESS",
+            started=True,
             finished=True,
+            details={"worker_id": token.worker_id, "restored_from_checkpoint": True},
         )
+    if retrying or handed_off:
+        return
+    metrics.inc("run_resumed")
+    append_audit_event(
+        "run_resumed",
+        run_id=token.run_id,
+        payload={"restored_stages": restored, "worker_id": token.worker_id},
+    )
 
-        if final_status == "SUCCESS":
-            metrics.inc("run_succeeded")
-        elif final_status == "WARN":
-            metrics.inc("run_warn")
-        elif final_status == "NEEDS_REVIEW":
-            metrics.inc("run_needs_review")
 
-        append_audit_event(
-            "run_completed",
-            run_id=run.id,
-            payload={
-                "status": final_status,
-                "model_name": extraction.model_name,
-                "route_name": extraction.route_name,
-                "issue_count": len(issues),
-                "decision": review_decision,
-                "reason_codes": reason_codes,
-                "decision_log_hash": (decision_log or {}).get("inputs_snapshot", {}).get("hash_sha256"),
-            },
+def advance_run(token: RunToken, stage: str) -> None:
+    if stage in token.restored:
+        return
+    _ensure_not_interrupted(stage)
+    _ensure_not_cancelled(token.run, stage, token.journal, token.cancel)
+    _ensure_run_not_timed_out(token.run_started)
+    attempt = token.attempts.get(stage, 0) + 1
+    token.attempts[stage] = attempt
+    try:
+        _execute_stage_attempt(
+            journal=token.journal,
+            run=token.run,
+            doc=token.doc,
+            stage=stage,
+            context=token.context,
+            worker_id=token.worker_id,
+            attempt=attempt,
+            cancel=token.cancel,
+            deadline=token.deadline,
         )
-
-        if decision_log:
-            try:
-                save_run_artifact(run.id, "quality_decision_log.json", to_json_bytes(decision_log))
-            except OSError:
-                pass
-        if reason_codes:
-            try:
-                save_run_artifact(run.id, "quality_reason_codes.json", to_json_bytes({"reason_codes": reason_codes}))
-            except OSError:
-                pass
+    except RunInterrupted:
+        raise
     except StageExecutionError as exc:
-        run = get_run(db, run_id)
-        if run:
-            if exc.error_code == "RUN_CANCELLED":
-                update_run_status(db, run, status="CANCELLED", error_code=None, finished=True)
-                metrics.inc("run_cancelled")
-                append_audit_event("run_cancelled", run_id=run.id, payload={"error_code": exc.error_code})
-            else:
-                update_run_status(db, run, status="FAILED", error_code=exc.error_code, finished=True)
-                metrics.inc("run_failed")
-                if exc.error_code == "RUN_TIMEOUT":
-                    metrics.inc("run_timed_out")
-                append_audit_event("run_failed", run_id=run.id, payload={"error_code": exc.error_code})
-    except Exception:  # noqa: BLE001
-        run = get_run(db, run_id)
+        delay = _retry_delay(stage, exc, attempt, token.run_started)
+        if delay is None:
+            raise
+        metrics.inc("stage_retried")
+        raise RetryDeferred(stage=stage, attempt=attempt, delay_seconds=delay, error_code=exc.error_code) from exc
+
+
+def defer_run(token: RunToken, retry: RetryDeferred) -> None:
+    """Park a run whose stage is waiting for its retry backoff, freeing this worker.
+
+    The run goes back to QUEUED with ``retry_at`` set; queue pollers skip it
+    until then, and checkpoints let the next pickup continue at the failed
+    stage. With no poller (``background`` mode) a timer restarts it instead;
+    otherwise a timer wakes the idle workers when the retry falls due.
+    """
+    db = token.db
+    _flush_journal_quietly(token.journal, commit=False)
+    retry_at = now_utc() + timedelta(seconds=retry.delay_seconds)
+    update_run_status(db, token.run, status="QUEUED", retry_at=retry_at, next_stage=retry.stage)
+    if settings.execution_mode == "background":
+        retry_scheduler.schedule(retry.delay_seconds, _restart_deferred_run, token.run_id)
+    else:
+        # Idle workers block on the wakeup channel; nudge them when the retry is due.
+        retry_scheduler.schedule(retry.delay_seconds, notify_workers)
+
+
+def hand_off_run(token: RunToken, stage: str) -> None:
+    """Requeue a run for the workers that execute ``stage``.
+
+    The context travels in the stage checkpoints already written to the run's
+    artifacts, so the next worker restores it and starts at ``stage``.
+    """
+    _flush_journal_quietly(token.journal, commit=False)
+    update_run_status(token.db, token.run, status="QUEUED", next_stage=stage)
+    metrics.inc("run_handed_off")
+    notify_workers()
+
+
+def interrupt_run(token: RunToken, stage: str) -> None:
+    """Requeue a run stopped by a shutdown; the next worker resumes it at ``stage``."""
+    _flush_journal_quietly(token.journal, commit=False)
+    update_run_status(token.db, token.run, status="QUEUED", next_stage=stage)
+    metrics.inc("run_interrupted")
+    append_audit_event("run_interrupted", run_id=token.run_id, payload={"stage": stage, "worker_id": token.worker_id})
+    notify_workers()
+
+
+def drain_inflight_runs(timeout: float | None = None) -> bool:
+    """After a shutdown request, wait until this process has no run left in flight.
+
+    Runs finish within the grace period or requeue themselves right after it;
+    False if some were still executing when ``timeout`` ran out.
+    """
+    deadline = time.monotonic() + (shutdown.drain_timeout() if timeout is None else timeout)
+    while heartbeats.tracked():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(CANCEL_CHECK_SECONDS)
+    return True
+
+
+def recover_queued_runs() -> int:
+    """Restart the QUEUED runs left behind by a previous process; ``background`` mode only.
+
+    Without a queue poller nothing else would pick up runs requeued on
+    shutdown, or deferred runs whose restart timer died with the process.
+    """
+    db = SessionLocal()
+    try:
+        runs = [(run.id, run.retry_at) for run in list_restartable_runs(db)]
+    finally:
+        db.close()
+    for run_id, retry_at in runs:
+        delay = 0.0
+        if retry_at is not None:
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            delay = max(0.0, (retry_at - now_utc()).total_seconds())
+        retry_scheduler.schedule(delay, _restart_deferred_run, run_id)
+    return len(runs)
+
+
+def _restart_deferred_run(run_id: str) -> None:
+    from app.background import background_runs
+
+    # If the executor is full the run stays QUEUED and is claimed when a slot frees.
+    background_runs.submit(run_id)
+
+
+def _retry_delay(stage: str, exc: StageExecutionError, attempt: int, run_started: float) -> float | None:
+    if not exc.retryable or stage in SINGLE_ATTEMPT_STAGES:
+        return None
+    policy = policy_for(exc.error_code)
+    if attempt >= policy.max_attempts:
+        return None
+    delay = policy.delay_for(attempt)
+    remaining = max(1, settings.run_timeout_seconds) - (time.monotonic() - run_started)
+    if delay >= remaining:
+        # the run would time out while waiting; fail now instead
+        return None
+    return delay
+
+
+def _elapsed_seconds(since: datetime) -> float:
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return max(0.0, (now_utc() - since).total_seconds())
+
+
+def complete_run(token: RunToken) -> None:
+    db, run, context = token.db, token.run, token.context
+    extraction: StructuredExtractionResult = context["extraction"]
+    issues: list[dict[str, Any]] = context["issues"]
+    reason_codes: list[str] = context.get("quality_reasons") or []
+    review_decision: str = context.get("review_decision") or "AUTO_APPROVED"
+    decision_log: dict[str, Any] | None = context.get("decision_log")
+    final_status = status_from_decision(decision=review_decision, issues=issues)
+
+    token.journal.flush(commit=False)
+    update_run_status(
+        db,
+        run,
+        status=final_status,
+        model_name=extraction.model_name,
+        route_name=extraction.route_name,
+        review_decision=review_decision,
+        review_reason_codes=reason_codes,
+        decision_log=decision_log,
+        result=extraction.result,
+        validation_issues=issues,
+        finished=True,
+    )
+
+    metrics.observe(f"lane_{run.priority}_latency_ms", _elapsed_seconds(run.created_at) * 1000)
+    if final_status == "SUCCESS":
+        metrics.inc("run_succeeded")
+    elif final_status == "WARN":
+        metrics.inc("run_warn")
+    elif final_status == "NEEDS_REVIEW":
+        metrics.inc("run_needs_review")
+
+    append_audit_event(
+        "run_completed",
+        run_id=run.id,
+        payload={
+            "status": final_status,
+            "model_name": extraction.model_name,
+            "route_name": extraction.route_name,
+            "issue_count": len(issues),
+            "decision": review_decision,
+            "reason_codes": reason_codes,
+            "decision_log_hash": (decision_log or {}).get("inputs_snapshot", {}).get("hash_sha256"),
+        },
+    )
+
+    if decision_log:
+        try:
+            save_run_artifact(run.id, "quality_decision_log.json", to_json_bytes(decision_log))
+        except OSError:
+            pass
+    if reason_codes:
+        try:
+            save_run_artifact(run.id, "quality_reason_codes.json", to_json_bytes({"reason_codes": reason_codes}))
+        except OSError:
+            pass
+
+
+def fail_run(token: RunToken, exc: StageExecutionError | None) -> None:
+    db = token.db
+    _flush_journal_quietly(token.journal, commit=False)
+    run = get_run(db, token.run_id)
+    if exc is None:
         if run:
             update_run_status(db, run, status="FAILED", error_code="UNEXPECTED_RUNTIME_ERROR", finished=True)
             append_audit_event("run_failed", run_id=run.id, payload={"error_code": "UNEXPECTED_RUNTIME_ERROR"})
         metrics.inc("run_failed")
+        return
+    if not run:
+        return
+    if exc.error_code == "RUN_CANCELLED":
+        update_run_status(db, run, status="CANCELLED", error_code=None, finished=True)
+        metrics.inc("run_cancelled")
+        append_audit_event("run_cancelled", run_id=run.id, payload={"error_code": exc.error_code})
+    else:
+        update_run_status(db, run, status="FAILED", error_code=exc.error_code, finished=True)
+        metrics.inc("run_failed")
+        if exc.error_code == "RUN_TIMEOUT":
+            metrics.inc("run_timed_out")
+        append_audit_event("run_failed", run_id=run.id, payload={"error_code": exc.error_code})
+
+
+def close_run(token: RunToken) -> None:
+    heartbeats.untrack(token.run_id)
+    if token.cancel is not None:
+        cancellations.unregister(token.run_id)
+    _flush_journal_quietly(token.journal)
+    _sync_queue_depth()
+    token.db.close()
+
+
+async def process_run_async(run_id: str, worker_id: str = "async-worker") -> bool:
+    """Coroutine twin of ``process_run`` for event-loop workers.
+
+    Stage work still runs on the stage pools; the coroutine only waits, so one
+    process can hold thousands of runs that are queued for a pool slot, waiting
+    on a stage future or sleeping through a retry backoff. Session, journal,
+    checkpoint and audit I/O run on the default executor, and the session is
+    committed after every stage so a waiting run holds no DB connection.
+    Returns False if the run did not start (another worker holds it, or it
+    is no longer QUEUED).
+    """
+    token = await asyncio.to_thread(open_run, run_id, worker_id)
+    try:
+        if not await asyncio.to_thread(_begin_run_detached, token):
+            return False
+        for stage in STAGES:
+            await advance_run_async(token, stage)
+        await asyncio.to_thread(complete_run, token)
+    except RunInterrupted as exc:
+        await asyncio.to_thread(interrupt_run, token, exc.stage)
+    except StageExecutionError as exc:
+        await asyncio.to_thread(fail_run, token, exc)
+    except Exception:  # noqa: BLE001
+        await asyncio.to_thread(fail_run, token, None)
     finally:
-        _sync_queue_depth(db)
-        db.close()
+        # A cancelled task leaves the run RUNNING; once its heartbeat goes
+        # stale the orphan reaper requeues it from the last checkpoint.
+        await asyncio.to_thread(close_run, token)
+    return True
+
+
+async def advance_run_async(token: RunToken, stage: str) -> None:
+    """Run one stage to success, sleeping through retry backoffs on the event loop."""
+    if stage in token.restored:
+        return
+    while True:
+        _ensure_not_interrupted(stage)
+        # Cancel polls and journal writes may hit the DB: keep them off the event loop.
+        await asyncio.to_thread(_ensure_not_cancelled, token.run, stage, token.journal, token.cancel)
+        _ensure_run_not_timed_out(token.run_started)
+        attempt = token.attempts.get(stage, 0) + 1
+        token.attempts[stage] = attempt
+        start = await asyncio.to_thread(
+            _record_attempt_start, token.journal, stage=stage, attempt=attempt, worker_id=token.worker_id
+        )
+        try:
+            details = await _run_stage_async(
+                stage=stage,
+                run_id=token.run_id,
+                doc=token.doc,
+                context=token.context,
+                cancel=token.cancel,
+                deadline=token.deadline,
+            )
+        except Exception as exc:  # noqa: BLE001
+            error = await asyncio.to_thread(
+                _record_attempt_failure,
+                token.journal,
+                stage=stage,
+                attempt=attempt,
+                worker_id=token.worker_id,
+                start=start,
+                exc=exc,
+            )
+            delay = None if isinstance(error, RunInterrupted) else _retry_delay(stage, error, attempt, token.run_started)
+            if delay is None:
+                if error is exc:
+                    raise
+                raise error from exc
+            metrics.inc("stage_retried")
+            waited_from = time.monotonic()
+            await asyncio.sleep(delay)
+            metrics.observe("stage_retry_wait_ms", (time.monotonic() - waited_from) * 1000)
+            continue
+        await asyncio.to_thread(_settle_stage_attempt, token, stage, attempt, start, details)
+        return
+
 
+def _begin_run_detached(token: RunToken) -> bool:
+    if not begin_run(token):
+        return False
+    # Stage threads only read the document; detached, it survives the
+    # per-stage commits without lazily reloading (and pinning a connection).
+    token.db.expunge(token.doc)
+    token.db.commit()
+    return True
 
-def _execute_stage_with_retry(
+
+def _settle_stage_attempt(token: RunToken, stage: str, attempt: int, start: float, details: dict[str, Any]) -> None:
+    _record_attempt_success(
+        token.journal,
+        run_id=token.run_id,
+        stage=stage,
+        attempt=attempt,
+        worker_id=token.worker_id,
+        start=start,
+        context=token.context,
+        details=details,
+    )
+    token.db.commit()
+
+
+async def _run_stage_async(
     *,
-    db: Session,
+    stage: str,
+    run_id: str,
+    doc,
+    context: dict[str, Any],
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    submission = _submit_stage(stage=stage, run_id=run_id, doc=doc, context=context, deadline=deadline)
+    waiter = asyncio.wrap_future(submission.future)
+    # An abandoned attempt may still fail later; consume its outcome so the
+    # loop does not log "exception was never retrieved".
+    waiter.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+    while True:
+        remaining = submission.deadline.remaining()
+        done, _ = await asyncio.wait({waiter}, timeout=max(0.0, min(remaining, CANCEL_CHECK_SECONDS)))
+        if done:
+            return submission.collect(context)
+        # is_cancelled may poll the shared cancel channel, a DB query
+        if cancel is not None and await asyncio.to_thread(cancel.is_cancelled):
+            raise submission.cancelled_error()
+        if shutdown.grace_expired():
+            raise submission.interrupted_error()
+        if remaining <= CANCEL_CHECK_SECONDS:
+            raise submission.timeout_error()
+
+
+def _execute_stage_attempt(
+    *,
+    journal: StageJournal,
     run,
     doc,
     stage: str,
     context: dict[str, Any],
     worker_id: str,
-    run_started: float,
+    attempt: int,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
 ) -> None:
-    max_attempts = 1 if stage in {"PREPROCESS", "VALIDATE", "EXPORT"} else max(1, settings.max_stage_attempts)
-
-    for attempt in range(1, max_attempts + 1):
-        _ensure_not_cancelled(db, run, stage)
-        _ensure_run_not_timed_out(run_started)
-        start = time.perf_counter()
-        upsert_stage(
-            db,
+    start = _record_attempt_start(journal, stage=stage, attempt=attempt, worker_id=worker_id)
+    try:
+        details = _run_stage_with_timeout(
+            stage=stage,
             run_id=run.id,
-            stage_name=stage,
-            status="RUNNING",
-            attempt=attempt,
-            started=True,
-            details={"worker_id": worker_id},
+            doc=doc,
+            context=context,
+            cancel=cancel,
+            deadline=deadline,
         )
-
-        try:
-            details = _run_stage_with_timeout(
-                stage=stage,
-                run_id=run.id,
-                doc=doc,
-                context=context,
-            )
-            duration_ms = round((time.perf_counter() - start) * 1000, 2)
-            stage_details = {"worker_id": worker_id, "duration_ms": duration_ms}
-            if details:
-                stage_details.update(details)
-            upsert_stage(
-                db,
-                run_id=run.id,
-                stage_name=stage,
-                status="SUCCESS",
-                attempt=attempt,
-                finished=True,
-                details=stage_details,
-            )
-            return
-        except StageExecutionError as exc:
-            duration_ms = round((time.perf_counter() - start) * 1000, 2)
-            upsert_stage(
-                db,
-                run_id=run.id,
-                stage_name=stage,
-                status="FAILED",
-                attempt=attempt,
-                error_code=exc.error_code,
-                finished=True,
-                details={"worker_id": worker_id, "duration_ms": duration_ms, "detail": exc.detail},
-            )
-            if exc.retryable and attempt < max_attempts:
-                metrics.inc("stage_retried")
-                time.sleep(0.2 * attempt)
-                continue
+    except Exception as exc:  # noqa: BLE001
+        error = _record_attempt_failure(journal, stage=stage, attempt=attempt, worker_id=worker_id, start=start, exc=exc)
+        if error is exc:
             raise
-        except Exception as exc:  # noqa: BLE001
-            duration_ms = round((time.perf_counter() - start) * 1000, 2)
-            upsert_stage(
-                db,
-                run_id=run.id,
-                stage_name=stage,
-                status="FAILED",
-                attempt=attempt,
-                error_code="UNEXPECTED_RUNTIME_ERROR",
-                finished=True,
-                details={"worker_id": worker_id, "duration_ms": duration_ms, "detail": str(exc)},
-            )
-            raise StageExecutionError("UNEXPECTED_RUNTIME_ERROR", retryable=False, detail=str(exc)) from exc
+        raise error from exc
+    _record_attempt_success(
+        journal,
+        run_id=run.id,
+        stage=stage,
+        attempt=attempt,
+        worker_id=worker_id,
+        start=start,
+        context=context,
+        details=details,
+    )
+
+
+def _record_attempt_start(journal: StageJournal, *, stage: str, attempt: int, worker_id: str) -> float:
+    journal.record(
+        stage_name=stage,
+        status="RUNNING",
+        attempt=attempt,
+        started=True,
+        details={"worker_id": worker_id},
+    )
+    return time.perf_counter()
 
 
-def _run_stage_with_timeout(*, stage: str, run_id: str, doc, context: dict[str, Any]) -> dict[str, Any]:
+def _record_attempt_success(
+    journal: StageJournal,
+    *,
+    run_id: str,
+    stage: str,
+    attempt: int,
+    worker_id: str,
+    start: float,
+    context: dict[str, Any],
+    details: dict[str, Any] | None,
+) -> None:
+    duration_ms = round((time.perf_counter() - start) * 1000, 2)
+    stage_details = {"worker_id": worker_id, "duration_ms": duration_ms}
+    if details:
+        stage_details.update(details)
+    try:
+        save_checkpoint(run_id, stage, context)
+    except OSError:
+        # Without the checkpoint a resumed run simply repeats this stage.
+        stage_details["checkpoint"] = "failed"
+    journal.record(
+        stage_name=stage,
+        status="SUCCESS",
+        attempt=attempt,
+        finished=True,
+        details=stage_details,
+    )
+
+
+def _record_attempt_failure(
+    journal: StageJournal,
+    *,
+    stage: str,
+    attempt: int,
+    worker_id: str,
+    start: float,
+    exc: Exception,
+) -> StageExecutionError:
+    duration_ms = round((time.perf_counter() - start) * 1000, 2)
+    if isinstance(exc, StageExecutionError):
+        error, detail = exc, exc.detail
+    else:
+        error = StageExecutionError("UNEXPECTED_RUNTIME_ERROR", retryable=False, detail=str(exc))
+        detail = str(exc)
+    journal.record(
+        stage_name=stage,
+        status="CANCELLED" if error.error_code == "RUN_CANCELLED" else "FAILED",
+        attempt=attempt,
+        error_code=error.error_code,
+        finished=True,
+        details={"worker_id": worker_id, "duration_ms": duration_ms, "detail": detail},
+    )
+    return error
+
+
+@dataclass
+class _StageSubmission:
+    """A stage attempt handed to its pool, waited on by either orchestration path."""
+
+    stage: str
+    pool: Any
+    future: Any
+    scratch: dict[str, Any]
+    deadline: Deadline
+    run_bound: bool
+    timeout_seconds: int
+
+    def cancelled_error(self) -> StageExecutionError:
+        self.pool.abandon(self.future)
+        return StageExecutionError("RUN_CANCELLED", retryable=False, detail=f"cancelled during {self.stage}")
+
+    def interrupted_error(self) -> RunInterrupted:
+        self.pool.abandon(self.future)
+        return RunInterrupted(self.stage, during=True)
+
+    def timeout_error(self) -> StageExecutionError:
+        started = self.future.running()
+        self.pool.abandon(self.future)
+        if self.run_bound:
+            return StageExecutionError("RUN_TIMEOUT", retryable=False, detail=f"run budget exhausted during {self.stage}")
+        return StageExecutionError(
+            STAGE_TIMEOUT_ERROR_CODE.get(self.stage, "STAGE_TIMEOUT"),
+            retryable=self.stage in TIMEOUT_RETRYABLE_STAGES,
+            detail=(
+                f"stage timeout after {self.timeout_seconds}s"
+                if started
+                else f"no {self.stage} pool slot within {self.timeout_seconds}s"
+            ),
+        )
+
+    def collect(self, context: dict[str, Any]) -> dict[str, Any]:
+        details = self.future.result()
+        self.scratch.pop("deadline", None)
+        context.update(self.scratch)
+        return details
+
+
+def _submit_stage(
+    *,
+    stage: str,
+    run_id: str,
+    doc,
+    context: dict[str, Any],
+    deadline: Deadline | None,
+) -> _StageSubmission:
     timeout_seconds = max(1, settings.stage_timeout_seconds)
-    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"im-{stage.lower()}") as pool:
-        fut = pool.submit(_execute_stage, stage, run_id, doc, context)
-        try:
-            return fut.result(timeout=timeout_seconds)
-        except FutureTimeout as exc:
-            raise StageExecutionError(
-                STAGE_TIMEOUT_ERROR_CODE.get(stage, "STAGE_TIMEOUT"),
-                retryable=stage in {"OCR", "EXTRACT", "PERSIST", "EXPORT"},
-                detail=f"stage timeout after {timeout_seconds}s",
-            ) from exc
+    # The stage gets whatever ends first: its own timeout or the run's remaining budget.
+    stage_deadline = Deadline.after(timeout_seconds).earliest(deadline)
+    pool = get_stage_pool(stage)
+    # Each attempt works on its own copy so an abandoned (timed-out) thread cannot
+    # mutate the context seen by the retry or by later stages.
+    scratch = dict(context)
+    scratch["deadline"] = stage_deadline
+    return _StageSubmission(
+        stage=stage,
+        pool=pool,
+        future=pool.submit(_execute_stage, stage, run_id, doc, scratch),
+        scratch=scratch,
+        deadline=stage_deadline,
+        run_bound=stage_deadline is deadline,
+        timeout_seconds=timeout_seconds,
+    )
+
+
+def _run_stage_with_timeout(
+    *,
+    stage: str,
+    run_id: str,
+    doc,
+    context: dict[str, Any],
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    submission = _submit_stage(stage=stage, run_id=run_id, doc=doc, context=context, deadline=deadline)
+    while True:
+        remaining = submission.deadline.remaining()
+        done, _ = wait_futures([submission.future], timeout=max(0.0, min(remaining, CANCEL_CHECK_SECONDS)))
+        if done:
+            return submission.collect(context)
+        if cancel is not None and cancel.is_cancelled():
+            raise submission.cancelled_error()
+        if shutdown.grace_expired():
+            raise submission.interrupted_error()
+        if remaining <= CANCEL_CHECK_SECONDS:
+            raise submission.timeout_error()
 
 
 def _execute_stage(stage: str, run_id: str, doc, context: dict[str, Any]) -> dict[str, Any]:
+    try:
+        return _dispatch_stage(stage, run_id, doc, context)
+    except RunCancelled as exc:
+        raise StageExecutionError("RUN_CANCELLED", retryable=False, detail=f"cancelled during {stage}") from exc
+    except DeadlineExceeded as exc:
+        raise StageExecutionError(
+            STAGE_TIMEOUT_ERROR_CODE.get(stage, "STAGE_TIMEOUT"),
+            retryable=stage in TIMEOUT_RETRYABLE_STAGES,
+            detail=str(exc),
+        ) from exc
+
+
+def _dispatch_stage(stage: str, run_id: str, doc, context: dict[str, Any]) -> dict[str, Any]:
     if stage == "PREPROCESS":
         return _stage_preprocess(run_id, doc)
     if stage == "OCR":
@@ -306,14 +858,33 @@ def _stage_preprocess(run_id: str, doc) -> dict[str, Any]:
 
 
 def _stage_ocr(run_id: str, doc, context: dict[str, Any]) -> dict[str, Any]:
-    ocr = run_ocr(doc.storage_path, doc.filename)
+    payload, cache_status = _cached_stage_output(
+        "OCR",
+        doc,
+        context,
+        # the deterministic fallback provider embeds the file name in its text
+        inputs={"filename": doc.filename},
+        compute=lambda: asdict(
+            run_ocr(
+                doc.storage_path,
+                doc.filename,
+                cancel_token=context.get("cancel_token"),
+                deadline=context.get("deadline"),
+            )
+        ),
+    )
+    ocr = OCRResult(**payload)
     context["ocr"] = ocr
     try:
         save_run_artifact(run_id, "ocr_text.txt", ocr.text.encode("utf-8"))
         save_run_artifact(run_id, "ocr_meta.json", to_json_bytes(asdict(ocr)))
     except OSError as exc:
         raise StageExecutionError("STORAGE_UNAVAILABLE", retryable=True, detail=str(exc)) from exc
-    return {"provider": ocr.provider, "confidence": round(ocr.confidence, 4)}
+    details = {"provider": ocr.provider, "confidence": round(ocr.confidence, 4)}
+    if cache_status:
+        details["cache"] = cache_status
+    _note_degraded(details, ocr.details)
+    return details
 
 
 def _stage_extract(doc, context: dict[str, Any]) -> dict[str, Any]:
@@ -321,22 +892,75 @@ def _stage_extract(doc, context: dict[str, Any]) -> dict[str, Any]:
     if not ocr:
         raise StageExecutionError("OCR_EMPTY", retryable=False, detail="OCR stage did not produce text")
     try:
-        extracted = run_structured_extraction(
-            text=ocr.text,
-            filename=doc.filename,
-            language=doc.language,
-            file_path=doc.storage_path,
-            ocr_confidence=ocr.confidence,
+        payload, cache_status = _cached_stage_output(
+            "EXTRACT",
+            doc,
+            context,
+            inputs={
+                "filename": doc.filename,
+                "language": doc.language,
+                "ocr_text_sha256": hashlib.sha256(ocr.text.encode("utf-8")).hexdigest(),
+                "ocr_confidence": round(float(ocr.confidence), 6),
+            },
+            compute=lambda: asdict(
+                run_structured_extraction(
+                    text=ocr.text,
+                    filename=doc.filename,
+                    language=doc.language,
+                    file_path=doc.storage_path,
+                    ocr_confidence=ocr.confidence,
+                    cancel_token=context.get("cancel_token"),
+                    deadline=context.get("deadline"),
+                )
+            ),
         )
     except MemoryError as exc:
         raise StageExecutionError("MODEL_OOM", retryable=True, detail=str(exc)) from exc
+    extracted = StructuredExtractionResult(**payload)
     context["extraction"] = extracted
-    return {
+    details = {
         "provider": extracted.provider,
         "model_name": extracted.model_name,
         "route_name": extracted.route_name,
         "confidence": round(extracted.confidence, 4),
     }
+    if cache_status:
+        details["cache"] = cache_status
+    _note_degraded(details, extracted.details)
+    return details
+
+
+def _note_degraded(stage_details: dict[str, Any], result_details: dict[str, Any]) -> None:
+    reason = (result_details or {}).get("degraded")
+    if reason:
+        stage_details["degraded"] = reason
+        metrics.inc("stage_degraded")
+
+
+def _cached_stage_output(
+    stage: str,
+    doc,
+    context: dict[str, Any],
+    *,
+    inputs: dict[str, Any],
+    compute: Callable[[], dict[str, Any]],
+) -> tuple[dict[str, Any], str | None]:
+    if not stage_cache.enabled_for(stage):
+        return compute(), None
+    content_hash = context.get("content_hash") or doc.content_hash or file_content_hash(doc.storage_path)
+    if not content_hash:
+        return compute(), None
+    context["content_hash"] = content_hash
+    cache_key, versions_hash = stage_cache.key_for(stage, content_hash, inputs)
+    cached = stage_cache.get(stage, cache_key)
+    if cached is not None:
+        return cached, "hit"
+    payload = compute()
+    if (payload.get("details") or {}).get("degraded"):
+        # a deadline-degraded result must not stand in for a full one later
+        return payload, "bypass"
+    stage_cache.put(stage, cache_key, content_hash=content_hash, versions_hash=versions_hash, payload=payload)
+    return payload, "miss"
 
 
 def _stage_validate(context: dict[str, Any]) -> dict[str, Any]:
@@ -426,13 +1050,10 @@ def _stage_export(run_id: str, context: dict[str, Any]) -> dict[str, Any]:
     return {"export_artifact": "export_summary.json"}
 
 
-def _ensure_not_cancelled(db: Session, run, stage: str) -> None:
-    db.refresh(run)
-    if not run.cancel_requested:
+def _ensure_not_cancelled(run, stage: str, journal: StageJournal, cancel: CancelToken | None) -> None:
+    if cancel is None or not cancel.is_cancelled():
         return
-    upsert_stage(
-        db,
-        run_id=run.id,
+    journal.record(
         stage_name=stage,
         status="CANCELLED",
         finished=True,
@@ -441,12 +1062,24 @@ def _ensure_not_cancelled(db: Session, run, stage: str) -> None:
     raise StageExecutionError("RUN_CANCELLED", retryable=False, detail=f"cancelled before {stage}")
 
 
+def _ensure_not_interrupted(stage: str) -> None:
+    if shutdown.grace_expired():
+        raise RunInterrupted(stage)
+
+
 def _ensure_run_not_timed_out(run_started: float) -> None:
     elapsed = time.monotonic() - run_started
     if elapsed > max(1, settings.run_timeout_seconds):
         raise StageExecutionError("RUN_TIMEOUT", retryable=False, detail=f"elapsed={elapsed:.2f}s")
 
 
-def _sync_queue_depth(db: Session) -> None:
-    queued = count_runs_by_status(db, "QUEUED")
-    metrics.set_queue_depth(queued)
+def _flush_journal_quietly(journal: StageJournal, *, commit: bool = True) -> None:
+    try:
+        journal.flush(commit=commit)
+    except Exception:  # noqa: BLE001
+        journal.db.rollback()
+
+
+def _sync_queue_depth() -> None:
+    # Reads the maintained gauge; it reconciles against the DB only when stale.
+    metrics.set_queue_depth(queue_gauge.depth())
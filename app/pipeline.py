@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import queue
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Any, Callable
+
+from app.config import settings
+from app.metrics import metrics
+from app.orchestrator import (
+    STAGES,
+    RetryDeferred,
+    RunInterrupted,
+    RunToken,
+    StageExecutionError,
+    advance_run,
+    begin_run,
+    close_run,
+    complete_run,
+    fail_run,
+    interrupt_run,
+    open_run,
+)
+from app.retry import retry_scheduler
+from app.services.capacity import estimate_capacity
+
+_STOP = object()
+_SERVICE_WINDOW = 200
+
+
+class StagePipeline:
+    """Runs many runs concurrently by giving every stage its own queue and workers.
+
+    Each run enters as a RunToken (session, journal and ``context`` dict) and is
+    handed from one stage queue to the next, so OCR of one document overlaps the
+    extraction of another. Queues are bounded: a full downstream queue blocks the
+    upstream stage. ``submit`` never blocks: it reserves a place in the first
+    queue before ``begin_run`` and returns False when there is none, so a run is
+    only set RUNNING (and its run timeout only starts) once it can enter the
+    pipeline; ``free_slots`` tells the claim loop how many to claim. Throughput tends
+    towards the capacity of the slowest stage as modelled by ``estimate_capacity``.
+    A stage that fails transiently parks its token on the retry scheduler and the
+    token re-enters the same stage queue when its backoff expires.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: dict[str, int] | None = None,
+        queue_size: int | None = None,
+        worker_id: str = "pipeline",
+        on_finish: Callable[[], Any] | None = None,
+    ) -> None:
+        configured = dict(settings.stage_concurrency) if concurrency is None else concurrency
+        self.concurrency = {stage: max(1, int(configured.get(stage, 1))) for stage in STAGES}
+        self.worker_id = worker_id
+        # called once per run that started and left the pipeline (done, failed or interrupted)
+        self.on_finish = on_finish
+        size = queue_size if queue_size is not None else settings.pipeline_queue_size
+        self._queues: dict[str, queue.Queue] = {stage: queue.Queue(maxsize=max(1, size)) for stage in STAGES}
+        self._service_ms: dict[str, deque[float]] = {stage: deque(maxlen=_SERVICE_WINDOW) for stage in STAGES}
+        self._threads: list[Thread] = []
+        self._inflight = 0
+        # places in the first queue promised to submits that are still in begin_run
+        self._entering = 0
+        self._cond = Condition()
+        # every queue full and every stage worker busy: the most runs the pipeline holds
+        self.capacity = sum(self._queues[stage].maxsize + self.concurrency[stage] for stage in STAGES)
+
+    def start(self) -> "StagePipeline":
+        if self._threads:
+            return self
+        for stage in STAGES:
+            for idx in range(self.concurrency[stage]):
+                thread = Thread(
+                    target=self._stage_loop,
+                    args=(stage,),
+                    name=f"im-pipe-{stage.lower()}-{idx}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, run_id: str) -> bool:
+        """Start ``run_id`` and queue it for the first stage; False if it did not start.
+
+        Returns False without touching the run when the pipeline has no free
+        slot; the caller still holds its lease and should release it.
+        """
+        with self._cond:
+            if self._free_slots() <= 0:
+                return False
+            self._entering += 1
+        try:
+            token = open_run(run_id, self.worker_id)
+            try:
+                started = begin_run(token)
+            except Exception:  # noqa: BLE001
+                fail_run(token, None)
+                started = False
+            if not started:
+                close_run(token)
+                return False
+            self._release_connection(token)
+            with self._cond:
+                self._inflight += 1
+                # the place reserved above: this put cannot block
+                self._queues[STAGES[0]].put_nowait(token)
+            self._publish_depth(STAGES[0])
+            return True
+        finally:
+            with self._cond:
+                self._entering -= 1
+
+    @property
+    def free_slots(self) -> int:
+        """How many more runs ``submit`` would take right now."""
+        with self._cond:
+            return self._free_slots()
+
+    def wait_for_slot(self, timeout: float) -> bool:
+        """Block until ``free_slots`` is positive or ``timeout`` passes."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._free_slots() > 0, timeout)
+
+    def drain(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.drain(timeout)
+        for stage in STAGES:
+            for _ in range(self.concurrency[stage]):
+                self._queues[stage].put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    @property
+    def inflight(self) -> int:
+        with self._cond:
+            return self._inflight
+
+    def capacity_model(self) -> list[dict[str, Any]]:
+        model = []
+        for stage in STAGES:
+            samples = list(self._service_ms[stage])
+            model.append(
+                {
+                    "stage": stage.lower(),
+                    "service_time_ms": (sum(samples) / len(samples)) if samples else 1.0,
+                    "concurrency": self.concurrency[stage],
+                }
+            )
+        return model
+
+    def estimate(self, *, safety_margin: float = 2.0) -> dict[str, Any]:
+        return estimate_capacity(self.capacity_model(), safety_margin=safety_margin)
+
+    def _stage_loop(self, stage: str) -> None:
+        idx = STAGES.index(stage)
+        inbox = self._queues[stage]
+        while True:
+            item = inbox.get()
+            if idx == 0:
+                with self._cond:
+                    # a place in the first queue opened up for submit
+                    self._cond.notify_all()
+            self._publish_depth(stage)
+            if item is _STOP:
+                return
+            token: RunToken = item
+            started = time.perf_counter()
+            try:
+                advance_run(token, stage)
+                self._service_ms[stage].append((time.perf_counter() - started) * 1000)
+                if idx + 1 < len(STAGES):
+                    self._release_connection(token)
+                    self._put(STAGES[idx + 1], token)
+                    continue
+                complete_run(token)
+            except RetryDeferred as retry:
+                self._release_connection(token)
+                retry_scheduler.schedule(retry.delay_seconds, self._requeue, stage, token, time.monotonic())
+                continue
+            except RunInterrupted as exc:
+                interrupt_run(token, exc.stage)
+            except StageExecutionError as exc:
+                fail_run(token, exc)
+            except Exception:  # noqa: BLE001
+                fail_run(token, None)
+            self._finish(token)
+
+    def _put(self, stage: str, token: RunToken) -> None:
+        self._queues[stage].put(token)
+        self._publish_depth(stage)
+
+    def _requeue(self, stage: str, token: RunToken, deferred_at: float) -> None:
+        # Runs on the scheduler thread, which must never block on a full queue.
+        # The lock keeps a retry from taking a first-queue place a submit reserved.
+        with self._cond:
+            try:
+                if stage == STAGES[0] and self._entry_room() <= 0:
+                    raise queue.Full
+                self._queues[stage].put_nowait(token)
+            except queue.Full:
+                retry_scheduler.schedule(0.05, self._requeue, stage, token, deferred_at)
+                return
+        metrics.observe("stage_retry_wait_ms", (time.monotonic() - deferred_at) * 1000)
+        self._publish_depth(stage)
+
+    def _finish(self, token: RunToken) -> None:
+        try:
+            close_run(token)
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+                # Under the lock: stage threads finish runs concurrently.
+                if self.on_finish is not None:
+                    self.on_finish()
+
+    def _entry_room(self) -> int:
+        # Caller holds self._cond.
+        inbox = self._queues[STAGES[0]]
+        return inbox.maxsize - inbox.qsize() - self._entering
+
+    def _free_slots(self) -> int:
+        # Caller holds self._cond.
+        return max(0, min(self.capacity - self._inflight - self._entering, self._entry_room()))
+
+    def _publish_depth(self, stage: str) -> None:
+        metrics.set_gauge(f"pipeline_{stage.lower()}_queued", self._queues[stage].qsize())
+
+    @staticmethod
+    def _release_connection(token: RunToken) -> None:
+        # Tokens can wait in a queue for a while; end the read transaction so a
+        # parked run does not pin a pooled connection.
+        token.db.commit()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+from threading import Lock, Thread
+
+from sqlalchemy.orm import Session
+
+from app.config import DEFAULT_PRIORITY, PRIORITY_CLASSES, settings
+from app.database import SessionLocal
+from app.metrics import metrics
+
+
+class QueueDepthGauge:
+    """Count of QUEUED runs per (tenant, priority lane), maintained from status transitions.
+
+    Repository functions adjust the gauge whenever a run enters or leaves QUEUED,
+    so admission control and /metrics read a dict instead of running COUNT(*)
+    over ``runs``. Transitions made by other processes (API vs. workers) are
+    picked up by a periodic reconcile, a single GROUP BY, at most every
+    ``queue_gauge_reconcile_seconds``. Only the first read waits for it; later
+    reconciles run on a background thread while reads serve the cached counts.
+    """
+
+    def __init__(self, *, reconcile_seconds: float | None = None) -> None:
+        self.reconcile_seconds = settings.queue_gauge_reconcile_seconds if reconcile_seconds is None else reconcile_seconds
+        self._depths: dict[tuple[str, str], int] = {}
+        self._lock = Lock()
+        self._reconciled_at: float | None = None
+        self._refreshing = False
+
+    def depth(self, tenant_id: str | None = None, *, priority: str | None = None) -> int:
+        self._maybe_reconcile()
+        with self._lock:
+            return sum(
+                count
+                for (tenant, lane), count in self._depths.items()
+                if (tenant_id is None or tenant == tenant_id) and (priority is None or lane == priority)
+            )
+
+    def adjust(self, tenant_id: str, delta: int, *, priority: str = DEFAULT_PRIORITY) -> None:
+        with self._lock:
+            key = (tenant_id, priority)
+            self._depths[key] = max(0, self._depths.get(key, 0) + delta)
+            self._publish_locked()
+
+    def reconcile(self, db: Session | None = None) -> dict[str, int]:
+        from app.repositories import count_queued_runs_by_lane
+
+        own_session = db is None
+        session = SessionLocal() if own_session else db
+        try:
+            counts = count_queued_runs_by_lane(session)
+        finally:
+            if own_session:
+                session.close()
+        with self._lock:
+            self._depths = dict(counts)
+            self._reconciled_at = time.monotonic()
+            self._publish_locked()
+            totals: dict[str, int] = {}
+            for (tenant, _), count in self._depths.items():
+                totals[tenant] = totals.get(tenant, 0) + count
+            return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self._depths = {}
+            self._reconciled_at = None
+
+    def _maybe_reconcile(self) -> None:
+        last = self._reconciled_at
+        if last is not None and time.monotonic() - last < self.reconcile_seconds:
+            return
+        if last is None:
+            # Nothing to serve yet.
+            self._reconcile_quietly()
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        Thread(target=self._reconcile_quietly, name="im-queue-gauge", daemon=True).start()
+
+    def _reconcile_quietly(self) -> None:
+        try:
+            self.reconcile()
+        except Exception:  # noqa: BLE001
+            # Keep serving the in-memory value; retry on the next read.
+            self._reconciled_at = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _publish_locked(self) -> None:
+        metrics.set_queue_depth(sum(self._depths.values()))
+        for lane in PRIORITY_CLASSES:
+            metrics.set_gauge(f"queue_depth:{lane}", sum(c for (_, p), c in self._depths.items() if p == lane))
+
+
+queue_gauge = QueueDepthGauge()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import sys
+
+from app.audit import append_audit_event
+from app.config import settings
+from app.metrics import metrics
+
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS, which is the safe side for a limit.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class WorkerRecycler:
+    """Decides when a long-lived worker should be replaced by a fresh process.
+
+    OCR on large scans leaves the heap fragmented and RSS creeps up run after
+    run. The worker calls ``note_run`` after each run; once RSS reaches
+    ``max_rss_bytes`` or ``max_runs`` runs are done, ``reason`` is set and the
+    worker stops claiming, finishes what it holds and starts over. Zero
+    disables a limit.
+    """
+
+    def __init__(self, *, max_runs: int | None = None, max_rss_bytes: int | None = None) -> None:
+        self.max_runs = settings.worker_max_runs if max_runs is None else max_runs
+        self.max_rss_bytes = settings.worker_max_rss_mb * 1024 * 1024 if max_rss_bytes is None else max_rss_bytes
+        self.runs = 0
+        self.peak_rss_bytes = 0
+        self.reason: str | None = None
+
+    @property
+    def due(self) -> bool:
+        return self.reason is not None
+
+    def note_run(self, count: int = 1, *, rss_bytes: int | None = None) -> str | None:
+        self.runs += count
+        return self.check(rss_bytes)
+
+    def check(self, rss_bytes: int | None = None) -> str | None:
+        rss = current_rss_bytes() if rss_bytes is None else rss_bytes
+        if rss is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            metrics.set_gauge("worker_rss_bytes", rss)
+            metrics.set_gauge("worker_peak_rss_bytes", self.peak_rss_bytes)
+        if self.reason is None:
+            if self.max_rss_bytes > 0 and rss is not None and rss >= self.max_rss_bytes:
+                self.reason = "rss"
+            elif self.max_runs > 0 and self.runs >= self.max_runs:
+                self.reason = "run_count"
+        return self.reason
+
+    def record(self, worker_id: str) -> None:
+        metrics.inc(f"worker_recycled_{self.reason}")
+        append_audit_event(
+            "worker_recycled",
+            payload={
+                "worker_id": worker_id,
+                "reason": self.reason,
+                "runs": self.runs,
+                "peak_rss_bytes": self.peak_rss_bytes,
+            },
+        )
+
+    def reset(self) -> None:
+        self.runs = 0
+        self.peak_rss_bytes = 0
+        self.reason = None
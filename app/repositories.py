@@ -1,17 +1,31 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, undefer
 
-from app.models import Document, QuarantineItem, Run, RunStage
+from app.config import DEFAULT_PRIORITY, PIPELINE_STAGES, PRIORITY_CLASSES
+from app.models import Document, QuarantineItem, QuarantineReasonCode, Run, RunSignal, RunStage, StageCacheEntry
+from app.queue_gauge import queue_gauge
 
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _save(db: Session, obj, *, commit: bool) -> None:
+    # commit=False: staged for the caller's unit of work; every value is already set client-side.
+    if commit:
+        db.commit()
+        db.refresh(obj)
+
+
 def create_document(
     db: Session,
     *,
@@ -24,8 +38,11 @@ def create_document(
     ingestion_status: str = "ACCEPTED",
     quality_tier: str | None = None,
     quality_score: float | None = None,
+    content_hash: str | None = None,
+    commit: bool = True,
 ) -> Document:
     doc = Document(
+        id=str(uuid.uuid4()),
         tenant_id=tenant_id,
         filename=filename,
         content_type=content_type,
@@ -35,10 +52,11 @@ def create_document(
         ingestion_status=ingestion_status,
         quality_tier=quality_tier,
         quality_score=quality_score,
+        content_hash=content_hash,
+        created_at=now_utc(),
     )
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    _save(db, doc, commit=commit)
     return doc
 
 
@@ -50,6 +68,8 @@ def update_document_ingestion(
     ingestion_status: str | None = None,
     quality_tier: str | None = None,
     quality_score: float | None = None,
+    content_hash: str | None = None,
+    commit: bool = True,
 ) -> Document:
     if storage_path is not None:
         document.storage_path = storage_path
@@ -59,8 +79,9 @@ def update_document_ingestion(
         document.quality_tier = quality_tier
     if quality_score is not None:
         document.quality_score = quality_score
-    db.commit()
-    db.refresh(document)
+    if content_hash is not None:
+        document.content_hash = content_hash
+    _save(db, document, commit=commit)
     return document
 
 
@@ -71,6 +92,23 @@ def get_document(db: Session, document_id: str, *, tenant_id: str | None = None)
     return q.first()
 
 
+def get_document_for_run(db: Session, document_id: str, *, tenant_id: str) -> tuple[Document | None, bool]:
+    """The document and whether it has an open quarantine item, in one query."""
+    open_quarantine = (
+        select(QuarantineItem.id)
+        .where(
+            QuarantineItem.document_id == Document.id,
+            QuarantineItem.tenant_id == tenant_id,
+            QuarantineItem.resolved_at.is_(None),
+        )
+        .exists()
+    )
+    row = db.query(Document, open_quarantine).filter(Document.id == document_id, Document.tenant_id == tenant_id).first()
+    if row is None:
+        return None, False
+    return row[0], bool(row[1])
+
+
 def get_run_by_idempotency(db: Session, key: str, *, tenant_id: str | None = None) -> Run | None:
     q = db.query(Run).filter(Run.idempotency_key == key)
     if tenant_id is not None:
@@ -86,24 +124,152 @@ def create_run(
     requested_by: str,
     idempotency_key: str | None = None,
     replay_of_run_id: str | None = None,
+    priority: str = DEFAULT_PRIORITY,
+    commit: bool = True,
 ) -> Run:
+    now = now_utc()
     run = Run(
+        id=str(uuid.uuid4()),
         document_id=document_id,
         tenant_id=tenant_id,
         requested_by=requested_by,
         idempotency_key=idempotency_key,
         replay_of_run_id=replay_of_run_id,
+        priority=priority,
         status="QUEUED",
-        updated_at=now_utc(),
+        cancel_requested=False,
+        created_at=now,
+        updated_at=now,
     )
     db.add(run)
-    db.commit()
-    db.refresh(run)
+    _save(db, run, commit=commit)
+    # Uncommitted in a unit of work; should it roll back, the gauge's reconcile corrects the count.
+    queue_gauge.adjust(tenant_id, 1, priority=priority)
     return run
 
 
-def get_run(db: Session, run_id: str, *, tenant_id: str | None = None) -> Run | None:
+@dataclass(frozen=True)
+class EnqueuedRun:
+    run_id: str
+    status: str
+    # False: the tenant had already used the idempotency key; this is that run.
+    created: bool
+
+
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def enqueue_run(
+    db: Session,
+    *,
+    document_id: str,
+    tenant_id: str,
+    requested_by: str,
+    idempotency_key: str | None = None,
+    priority: str = DEFAULT_PRIORITY,
+) -> EnqueuedRun | None:
+    """Create a QUEUED run in one round trip, or return the one the idempotency key already names.
+
+    ``INSERT ... SELECT FROM documents WHERE <accepted, no open quarantine>
+    ON CONFLICT (tenant_id, idempotency_key) DO NOTHING RETURNING id`` checks
+    the document, honours the key and inserts in a single statement. Only
+    when it inserts nothing is a second query needed: the existing run for
+    the key, or None if the document cannot take a run (the caller tells 404
+    from 409 with ``get_document_for_run``). Commits.
+    """
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        return _enqueue_run_read_then_write(
+            db,
+            document_id=document_id,
+            tenant_id=tenant_id,
+            requested_by=requested_by,
+            idempotency_key=idempotency_key,
+            priority=priority,
+        )
+    run_id = str(uuid.uuid4())
+    now = now_utc()
+    values = {
+        Run.id: run_id,
+        Run.tenant_id: tenant_id,
+        Run.idempotency_key: idempotency_key,
+        Run.status: "QUEUED",
+        Run.priority: priority,
+        Run.requested_by: requested_by,
+        Run.cancel_requested: False,
+        Run.created_at: now,
+        Run.updated_at: now,
+    }
+    open_quarantine = (
+        select(QuarantineItem.id)
+        .where(
+            QuarantineItem.document_id == Document.id,
+            QuarantineItem.tenant_id == tenant_id,
+            QuarantineItem.resolved_at.is_(None),
+        )
+        .exists()
+    )
+    source = select(Document.id, *(literal(value, column.type) for column, value in values.items())).where(
+        Document.id == document_id,
+        Document.tenant_id == tenant_id,
+        Document.ingestion_status == "ACCEPTED",
+        ~open_quarantine,
+    )
+    stmt = (
+        insert(Run)
+        .from_select([Run.document_id, *values], source)
+        .on_conflict_do_nothing(index_elements=[Run.tenant_id, Run.idempotency_key])
+        .returning(Run.id)
+    )
+    inserted = db.execute(stmt).scalar_one_or_none()
+    db.commit()
+    if inserted is not None:
+        queue_gauge.adjust(tenant_id, 1, priority=priority)
+        return EnqueuedRun(run_id=inserted, status="QUEUED", created=True)
+    if idempotency_key:
+        existing = get_run_by_idempotency(db, idempotency_key, tenant_id=tenant_id)
+        if existing is not None:
+            return EnqueuedRun(run_id=existing.id, status=existing.status, created=False)
+    return None
+
+
+def _enqueue_run_read_then_write(
+    db: Session,
+    *,
+    document_id: str,
+    tenant_id: str,
+    requested_by: str,
+    idempotency_key: str | None,
+    priority: str,
+) -> EnqueuedRun | None:
+    # Dialects without ON CONFLICT: the same contract, in several round trips.
+    if idempotency_key:
+        existing = get_run_by_idempotency(db, idempotency_key, tenant_id=tenant_id)
+        if existing is not None:
+            return EnqueuedRun(run_id=existing.id, status=existing.status, created=False)
+    document, quarantined = get_document_for_run(db, document_id, tenant_id=tenant_id)
+    if document is None or document.ingestion_status != "ACCEPTED" or quarantined:
+        return None
+    run = create_run(
+        db,
+        document_id=document_id,
+        tenant_id=tenant_id,
+        requested_by=requested_by,
+        idempotency_key=idempotency_key,
+        priority=priority,
+    )
+    return EnqueuedRun(run_id=run.id, status=run.status, created=True)
+
+
+def get_run(db: Session, run_id: str, *, tenant_id: str | None = None, payload: Iterable[str] = ()) -> Run | None:
+    """Load a run without its deferred JSON payload columns.
+
+    ``payload`` names the payload attributes (``result_json``, ...) to load with
+    the row; any other payload attribute is fetched on first access.
+    """
     q = db.query(Run).filter(Run.id == run_id)
+    for name in payload:
+        q = q.options(undefer(getattr(Run, name)))
     if tenant_id is not None:
         q = q.filter(Run.tenant_id == tenant_id)
     return q.first()
@@ -116,6 +282,21 @@ def count_runs_by_status(db: Session, status: str, *, tenant_id: str | None = No
     return q.count()
 
 
+def count_runs_by_tenant(db: Session, status: str) -> dict[str, int]:
+    rows = db.query(Run.tenant_id, func.count(Run.id)).filter(Run.status == status).group_by(Run.tenant_id).all()
+    return {tenant_id: int(count) for tenant_id, count in rows}
+
+
+def count_queued_runs_by_lane(db: Session) -> dict[tuple[str, str], int]:
+    rows = (
+        db.query(Run.tenant_id, Run.priority, func.count(Run.id))
+        .filter(Run.status == "QUEUED")
+        .group_by(Run.tenant_id, Run.priority)
+        .all()
+    )
+    return {(tenant_id, priority): int(count) for tenant_id, priority, count in rows}
+
+
 def count_runs_by_statuses(db: Session, statuses: list[str], *, tenant_id: str | None = None) -> int:
     if not statuses:
         return 0
@@ -128,13 +309,197 @@ def count_runs_by_statuses(db: Session, statuses: list[str], *, tenant_id: str |
 def list_queued_runs(db: Session, *, limit: int = 10) -> list[Run]:
     return (
         db.query(Run)
-        .filter(Run.status == "QUEUED")
+        .filter(Run.status == "QUEUED", or_(Run.retry_at.is_(None), Run.retry_at <= now_utc()))
         .order_by(Run.created_at.asc())
         .limit(limit)
         .all()
     )
 
 
+def list_restartable_runs(db: Session, *, limit: int = 500) -> list[Run]:
+    """QUEUED runs no live lease holds, including ones whose ``retry_at`` is still ahead."""
+    now = now_utc()
+    return (
+        db.query(Run)
+        .filter(Run.status == "QUEUED", or_(Run.lease_expires_at.is_(None), Run.lease_expires_at < now))
+        .order_by(Run.created_at.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _claimable_filter(now: datetime):
+    return and_(
+        Run.status == "QUEUED",
+        or_(Run.retry_at.is_(None), Run.retry_at <= now),
+        or_(Run.lease_expires_at.is_(None), Run.lease_expires_at < now),
+    )
+
+
+def _next_stage_filter(stages: tuple[str, ...]):
+    # Runs that have not started yet carry no next stage; they belong to whoever runs the first one.
+    if PIPELINE_STAGES[0] in stages:
+        return or_(Run.next_stage.is_(None), Run.next_stage.in_(stages))
+    return Run.next_stage.in_(stages)
+
+
+_LANE_RANK = case({lane: rank for rank, lane in enumerate(PRIORITY_CLASSES)}, value=Run.priority, else_=len(PRIORITY_CLASSES))
+
+
+def summarize_claimable_runs(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    priorities: tuple[str, ...] | None = None,
+    stages: tuple[str, ...] | None = None,
+) -> dict[str, tuple[int, datetime]]:
+    """Per tenant: how many runs could be claimed right now, and the oldest one's ``created_at``."""
+    q = db.query(Run.tenant_id, func.count(Run.id), func.min(Run.created_at)).filter(_claimable_filter(now or now_utc()))
+    if priorities is not None:
+        q = q.filter(Run.priority.in_(priorities))
+    if stages is not None:
+        q = q.filter(_next_stage_filter(stages))
+    rows = q.group_by(Run.tenant_id).all()
+    return {tenant_id: (int(count), oldest) for tenant_id, count, oldest in rows}
+
+
+def count_inflight_runs_by_tenant(db: Session, *, now: datetime | None = None) -> dict[str, int]:
+    """RUNNING runs plus QUEUED runs under a live lease (claimed but not started yet)."""
+    now = now or now_utc()
+    # One grouped count per status: each walks ix_runs_claim_tenant in tenant
+    # order, where a single OR across both statuses scans the whole table.
+    running = db.query(Run.tenant_id, func.count()).filter(Run.status == "RUNNING").group_by(Run.tenant_id)
+    leased = (
+        db.query(Run.tenant_id, func.count())
+        .filter(Run.status == "QUEUED", Run.lease_expires_at >= now)
+        .group_by(Run.tenant_id)
+    )
+    counts: dict[str, int] = {}
+    for tenant_id, count in [*running.all(), *leased.all()]:
+        counts[tenant_id] = counts.get(tenant_id, 0) + int(count)
+    return counts
+
+
+def claim_queued_runs(
+    db: Session,
+    *,
+    owner: str,
+    lease_seconds: float,
+    limit: int = 10,
+    tenant_id: str | None = None,
+    priorities: tuple[str, ...] | None = None,
+    stages: tuple[str, ...] | None = None,
+) -> list[str]:
+    """Lease up to ``limit`` due QUEUED runs to ``owner`` in one statement; return their ids.
+
+    ``UPDATE ... WHERE id IN (SELECT ...) RETURNING id`` is atomic on SQLite
+    (single writer) and, with ``FOR UPDATE SKIP LOCKED`` on the subquery, lets
+    concurrent claimers on Postgres take disjoint batches without blocking. A
+    leased run stays QUEUED until ``start_run`` moves it to RUNNING; if the
+    owner never gets there the lease expires and the run is claimable again.
+    ``stages`` restricts the claim to runs waiting for one of those stages.
+    """
+    now = now_utc()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    candidates = select(Run.id).where(_claimable_filter(now))
+    if tenant_id is not None:
+        candidates = candidates.where(Run.tenant_id == tenant_id)
+    if priorities is not None:
+        candidates = candidates.where(Run.priority.in_(priorities))
+    if stages is not None:
+        candidates = candidates.where(_next_stage_filter(stages))
+    if priorities is not None and len(priorities) == 1:
+        # one lane needs no rank, so the claim index returns the rows already in age order
+        candidates = candidates.order_by(Run.created_at.asc()).limit(limit)
+    else:
+        candidates = candidates.order_by(_LANE_RANK, Run.created_at.asc()).limit(limit)
+    if db.get_bind().dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    claim = (
+        update(Run)
+        .where(Run.id.in_(candidates), _claimable_filter(now))
+        .values(lease_owner=owner, lease_expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        run_ids = list(db.execute(claim.returning(Run.id)).scalars())
+    else:
+        db.execute(claim)
+        run_ids = list(
+            db.execute(select(Run.id).where(Run.lease_owner == owner, Run.lease_expires_at == expires_at)).scalars()
+        )
+    db.commit()
+    return run_ids
+
+
+def start_run(db: Session, run: Run, *, owner: str, lease_seconds: float, route_name: str | None = None) -> bool:
+    """Compare-and-set a QUEUED run to RUNNING for ``owner``.
+
+    Succeeds only if the run is still QUEUED and is unleased, leased to
+    ``owner``, or its lease has expired, so a run claimed by one worker can't
+    also be started by another worker or by an API background task.
+    """
+    now = now_utc()
+    values = {
+        Run.status: "RUNNING",
+        Run.error_code: None,
+        Run.updated_at: now,
+        Run.heartbeat_at: now,
+        Run.retry_at: None,
+        Run.next_stage: None,
+        Run.lease_owner: owner,
+        Run.lease_expires_at: now + timedelta(seconds=lease_seconds),
+        # set once: later pickups keep the first start, which bounds the run timeout
+        Run.started_at: func.coalesce(Run.started_at, now),
+    }
+    if route_name:
+        values[Run.route_name] = route_name
+    updated = (
+        db.query(Run)
+        .filter(
+            Run.id == run.id,
+            Run.status == "QUEUED",
+            or_(Run.lease_owner.is_(None), Run.lease_owner == owner, Run.lease_expires_at < now),
+        )
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    db.refresh(run)
+    if not updated:
+        return False
+    _track_queue_transition(run, "QUEUED", "RUNNING")
+    return True
+
+
+def release_run_lease(db: Session, run_id: str, *, owner: str) -> None:
+    db.query(Run).filter(Run.id == run_id, Run.status == "QUEUED", Run.lease_owner == owner).update(
+        {Run.lease_owner: None, Run.lease_expires_at: None}, synchronize_session=False
+    )
+    db.commit()
+
+
+def recent_stage_durations_ms(
+    db: Session,
+    *,
+    since: datetime,
+    stages: tuple[str, ...] | None = None,
+    limit: int = 500,
+) -> dict[str, list[float]]:
+    """Durations of the latest successful stage attempts finished after ``since``, per stage."""
+    q = db.query(RunStage.stage_name, RunStage.started_at, RunStage.finished_at).filter(
+        RunStage.status == "SUCCESS",
+        RunStage.started_at.is_not(None),
+        RunStage.finished_at >= since,
+    )
+    if stages is not None:
+        q = q.filter(RunStage.stage_name.in_(stages))
+    durations: dict[str, list[float]] = {}
+    for stage_name, started_at, finished_at in q.order_by(RunStage.id.desc()).limit(limit).all():
+        elapsed = (finished_at - started_at).total_seconds() * 1000
+        durations.setdefault(stage_name, []).append(max(0.0, elapsed))
+    return durations
+
+
 def list_run_stages(db: Session, run_id: str) -> list[RunStage]:
     return db.query(RunStage).filter(RunStage.run_id == run_id).order_by(RunStage.id.asc()).all()
 
@@ -171,6 +536,37 @@ def upsert_stage(
     return stage
 
 
+def apply_stage_transitions(
+    db: Session,
+    *,
+    run_id: str,
+    transitions: list[dict],
+    known_rows: dict[tuple[str, int], RunStage],
+    commit: bool = True,
+) -> None:
+    if not transitions:
+        return
+    if not known_rows:
+        for row in db.query(RunStage).filter(RunStage.run_id == run_id).all():
+            known_rows[(row.stage_name, row.attempt)] = row
+    for item in transitions:
+        key = (item["stage_name"], item["attempt"])
+        stage = known_rows.get(key)
+        if stage is None:
+            stage = RunStage(run_id=run_id, stage_name=item["stage_name"], attempt=item["attempt"])
+            db.add(stage)
+            known_rows[key] = stage
+        stage.status = item["status"]
+        stage.error_code = item.get("error_code")
+        stage.details_json = json.dumps(item.get("details") or {}, ensure_ascii=False)
+        if item.get("started") and not stage.started_at:
+            stage.started_at = item["at"]
+        if item.get("finished"):
+            stage.finished_at = item["at"]
+    if commit:
+        db.commit()
+
+
 def update_run_status(
     db: Session,
     run: Run,
@@ -184,8 +580,11 @@ def update_run_status(
     decision_log: dict | None = None,
     result: dict | None = None,
     validation_issues: list[dict] | None = None,
+    retry_at: datetime | None = None,
+    next_stage: str | None = None,
     finished: bool = False,
 ) -> Run:
+    previous_status = run.status
     run.status = status
     run.error_code = error_code
     if model_name:
@@ -195,21 +594,216 @@ def update_run_status(
     if review_decision is not None:
         run.review_decision = review_decision
     if review_reason_codes is not None:
-        run.review_reason_codes_json = json.dumps(review_reason_codes, ensure_ascii=False)
+        run.review_reason_codes_json = review_reason_codes
     if decision_log is not None:
-        run.decision_log_json = json.dumps(decision_log, ensure_ascii=False)
+        run.decision_log_json = decision_log
     if result is not None:
-        run.result_json = json.dumps(result, ensure_ascii=False)
+        run.result_json = result
     if validation_issues is not None:
-        run.validation_issues_json = json.dumps(validation_issues, ensure_ascii=False)
+        run.validation_issues_json = validation_issues
     run.updated_at = now_utc()
+    if status == "RUNNING":
+        run.heartbeat_at = run.updated_at
+        run.retry_at = None
+    elif retry_at is not None:
+        run.retry_at = retry_at
+    if next_stage is not None:
+        run.next_stage = next_stage
+    if finished or status == "QUEUED":
+        run.lease_owner = None
+        run.lease_expires_at = None
     if finished:
         run.finished_at = now_utc()
+        run.retry_at = None
+        delete_run_signals(db, run_id=run.id, commit=False)
     db.commit()
     db.refresh(run)
+    _track_queue_transition(run, previous_status, status)
     return run
 
 
+def touch_run_heartbeats(db: Session, run_ids: list[str], *, lease_seconds: float | None = None) -> int:
+    if not run_ids:
+        return 0
+    now = now_utc()
+    values = {Run.heartbeat_at: now}
+    if lease_seconds is not None:
+        values[Run.lease_expires_at] = now + timedelta(seconds=lease_seconds)
+    updated = (
+        db.query(Run)
+        .filter(Run.id.in_(run_ids), Run.status == "RUNNING")
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    return int(updated)
+
+
+def _orphaned_filter(stale_before: datetime):
+    # Leased runs expire on their lease; rows started before leases existed
+    # fall back to the heartbeat age.
+    return and_(
+        Run.status == "RUNNING",
+        or_(
+            Run.lease_expires_at < now_utc(),
+            and_(
+                Run.lease_expires_at.is_(None),
+                or_(Run.heartbeat_at < stale_before, and_(Run.heartbeat_at.is_(None), Run.updated_at < stale_before)),
+            ),
+        ),
+    )
+
+
+def list_orphaned_runs(db: Session, *, stale_before: datetime, limit: int = 50) -> list[Run]:
+    return db.query(Run).filter(_orphaned_filter(stale_before)).order_by(Run.updated_at.asc()).limit(limit).all()
+
+
+def requeue_orphaned_run(db: Session, run: Run, *, stale_before: datetime) -> str | None:
+    """Move an orphaned RUNNING run back to QUEUED (or CANCELLED if cancel was requested).
+
+    The guarded UPDATE only matches while the run is still stale, so when
+    several reapers race exactly one of them wins; the others get ``None``.
+    """
+    status = "CANCELLED" if run.cancel_requested else "QUEUED"
+    values = {
+        Run.status: status,
+        Run.updated_at: now_utc(),
+        Run.heartbeat_at: None,
+        Run.lease_owner: None,
+        Run.lease_expires_at: None,
+    }
+    if status == "CANCELLED":
+        values[Run.finished_at] = now_utc()
+    updated = (
+        db.query(Run)
+        .filter(Run.id == run.id, _orphaned_filter(stale_before))
+        .update(values, synchronize_session=False)
+    )
+    if updated and status == "CANCELLED":
+        delete_run_signals(db, run_id=run.id, commit=False)
+    db.commit()
+    if not updated:
+        return None
+    _track_queue_transition(run, "RUNNING", status)
+    return status
+
+
+def _track_queue_transition(run: Run, previous_status: str | None, status: str) -> None:
+    if previous_status == status:
+        return
+    priority = run.priority or DEFAULT_PRIORITY
+    if previous_status == "QUEUED":
+        queue_gauge.adjust(run.tenant_id, -1, priority=priority)
+    elif status == "QUEUED":
+        queue_gauge.adjust(run.tenant_id, 1, priority=priority)
+
+
+def create_run_signal(db: Session, *, run_id: str, signal: str, commit: bool = True) -> RunSignal:
+    item = RunSignal(run_id=run_id, signal=signal, created_at=now_utc())
+    db.add(item)
+    if commit:
+        db.commit()
+    return item
+
+
+def latest_run_signal_id(db: Session) -> int:
+    return int(db.query(func.max(RunSignal.id)).scalar() or 0)
+
+
+def list_run_signals_after(db: Session, last_id: int, *, signal: str | None = None) -> list[RunSignal]:
+    q = db.query(RunSignal).filter(RunSignal.id > last_id)
+    if signal is not None:
+        q = q.filter(RunSignal.signal == signal)
+    return q.order_by(RunSignal.id.asc()).all()
+
+
+def delete_run_signals(
+    db: Session,
+    *,
+    run_id: str | None = None,
+    created_before: datetime | None = None,
+    commit: bool = True,
+) -> int:
+    """Delete the signals of a finished run and/or those older than ``created_before``.
+
+    The newest row always stays: pollers remember the highest id they have
+    read, and SQLite may hand out a deleted head rowid again.
+    """
+    head = select(func.max(RunSignal.id)).scalar_subquery()
+    q = db.query(RunSignal).filter(RunSignal.id < head)
+    if run_id is not None:
+        q = q.filter(RunSignal.run_id == run_id)
+    if created_before is not None:
+        q = q.filter(RunSignal.created_at < created_before)
+    deleted = q.delete(synchronize_session=False)
+    if commit:
+        db.commit()
+    return int(deleted or 0)
+
+
+def get_stage_cache_entry(db: Session, cache_key: str) -> StageCacheEntry | None:
+    return db.query(StageCacheEntry).filter(StageCacheEntry.cache_key == cache_key).first()
+
+
+def upsert_stage_cache_entry(
+    db: Session,
+    *,
+    cache_key: str,
+    stage_name: str,
+    content_hash: str,
+    versions_hash: str,
+    storage_path: str,
+    size_bytes: int,
+) -> StageCacheEntry:
+    entry = get_stage_cache_entry(db, cache_key)
+    now = now_utc()
+    if not entry:
+        entry = StageCacheEntry(cache_key=cache_key, created_at=now, hit_count=0)
+        db.add(entry)
+    entry.stage_name = stage_name
+    entry.content_hash = content_hash
+    entry.versions_hash = versions_hash
+    entry.storage_path = storage_path
+    entry.size_bytes = size_bytes
+    entry.last_accessed_at = now
+    db.commit()
+    return entry
+
+
+def touch_stage_cache_entry(db: Session, entry: StageCacheEntry) -> None:
+    entry.hit_count = int(entry.hit_count or 0) + 1
+    entry.last_accessed_at = now_utc()
+    db.commit()
+
+
+def total_stage_cache_bytes(db: Session) -> int:
+    return int(db.query(func.coalesce(func.sum(StageCacheEntry.size_bytes), 0)).scalar() or 0)
+
+
+def list_stage_cache_lru(db: Session, *, limit: int = 100) -> list[StageCacheEntry]:
+    return db.query(StageCacheEntry).order_by(StageCacheEntry.last_accessed_at.asc()).limit(limit).all()
+
+
+def delete_stage_cache_entries(db: Session, entries: list[StageCacheEntry]) -> None:
+    for entry in entries:
+        db.delete(entry)
+    db.commit()
+
+
+def _set_reason_codes(item: QuarantineItem, reason_codes: list[str]) -> None:
+    # Call after item.status is final: the reason-code rows carry a copy of it.
+    item.reason_codes_json = json.dumps(reason_codes, ensure_ascii=False)
+    item.reasons = [
+        QuarantineReasonCode(
+            quarantine_item_id=item.id,
+            reason_code=code,
+            tenant_id=item.tenant_id,
+            status=item.status,
+            created_at=item.created_at,
+        )
+        for code in dict.fromkeys(reason_codes)
+    ]
+
+
 def create_quarantine_item(
     db: Session,
     *,
@@ -220,20 +814,24 @@ def create_quarantine_item(
     reason_codes: list[str],
     storage_path: str,
     details: dict | None = None,
+    commit: bool = True,
 ) -> QuarantineItem:
+    now = now_utc()
     item = QuarantineItem(
+        id=str(uuid.uuid4()),
         document_id=document_id,
         tenant_id=tenant_id,
         stage=stage,
         status=status,
-        reason_codes_json=json.dumps(reason_codes, ensure_ascii=False),
         details_json=json.dumps(details or {}, ensure_ascii=False),
         storage_path=storage_path,
-        updated_at=now_utc(),
+        reprocess_count=0,
+        created_at=now,
+        updated_at=now,
     )
+    _set_reason_codes(item, reason_codes)
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    _save(db, item, commit=commit)
     return item
 
 
@@ -251,19 +849,58 @@ def list_quarantine_items(
     status: str | None = None,
     reason_code: str | None = None,
     limit: int = 100,
+    before: tuple[datetime, str] | None = None,
 ) -> list[QuarantineItem]:
-    q = db.query(QuarantineItem).filter(QuarantineItem.tenant_id == tenant_id)
-    if status:
-        q = q.filter(QuarantineItem.status == status)
-    rows = q.order_by(QuarantineItem.created_at.desc()).limit(max(1, limit)).all()
-    if not reason_code:
-        return rows
-    out: list[QuarantineItem] = []
-    for row in rows:
-        reasons = json.loads(row.reason_codes_json or "[]")
-        if reason_code in reasons:
-            out.append(row)
-    return out
+    """Newest quarantine items first, filtered in SQL.
+
+    A ``reason_code`` filter walks the quarantine_reason_codes index, so the
+    page holds up to ``limit`` matches however many items lack the code.
+    ``before`` is the (created_at, id) of the last item of the previous page.
+    """
+    if reason_code:
+        code = QuarantineReasonCode
+        q = (
+            db.query(QuarantineItem)
+            .join(code, code.quarantine_item_id == QuarantineItem.id)
+            .filter(code.tenant_id == tenant_id, code.reason_code == reason_code)
+        )
+        if status:
+            q = q.filter(code.status == status)
+        created_at, item_id = code.created_at, code.quarantine_item_id
+    else:
+        q = db.query(QuarantineItem).filter(QuarantineItem.tenant_id == tenant_id)
+        if status:
+            q = q.filter(QuarantineItem.status == status)
+        created_at, item_id = QuarantineItem.created_at, QuarantineItem.id
+    if before is not None:
+        q = q.filter(or_(created_at < before[0], and_(created_at == before[0], item_id < before[1])))
+    return q.order_by(created_at.desc(), item_id.desc()).limit(max(1, limit)).all()
+
+
+def count_quarantine_items(db: Session, *, tenant_id: str, status: str | None = None, reason_code: str | None = None) -> int:
+    if reason_code:
+        q = db.query(func.count()).select_from(QuarantineReasonCode).filter(
+            QuarantineReasonCode.tenant_id == tenant_id, QuarantineReasonCode.reason_code == reason_code
+        )
+        if status:
+            q = q.filter(QuarantineReasonCode.status == status)
+    else:
+        q = db.query(func.count(QuarantineItem.id)).filter(QuarantineItem.tenant_id == tenant_id)
+        if status:
+            q = q.filter(QuarantineItem.status == status)
+    return int(q.scalar() or 0)
+
+
+def summarize_quarantine_reasons(db: Session, *, tenant_id: str) -> list[tuple[str, str, int]]:
+    code = QuarantineReasonCode
+    rows = (
+        db.query(code.reason_code, code.status, func.count())
+        .filter(code.tenant_id == tenant_id)
+        .group_by(code.reason_code, code.status)
+        .order_by(code.reason_code, code.status)
+        .all()
+    )
+    return [(reason_code, status, int(count)) for reason_code, status, count in rows]
 
 
 def get_latest_open_quarantine_for_document(db: Session, *, document_id: str, tenant_id: str) -> QuarantineItem | None:
@@ -287,16 +924,16 @@ def mark_quarantine_reprocessed(
     reason_codes: list[str],
     details: dict | None = None,
     resolved: bool = False,
+    commit: bool = True,
 ) -> QuarantineItem:
     item.status = status
-    item.reason_codes_json = json.dumps(reason_codes, ensure_ascii=False)
+    _set_reason_codes(item, reason_codes)
     item.details_json = json.dumps(details or {}, ensure_ascii=False)
     item.reprocess_count += 1
     item.last_reprocessed_at = now_utc()
     item.updated_at = now_utc()
     if resolved:
         item.resolved_at = now_utc()
-    db.commit()
-    db.refresh(item)
+    _save(db, item, commit=commit)
     return item
 
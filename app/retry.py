@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from threading import Condition, Thread
+from typing import Any, Callable
+
+from app.config import settings
+from app.metrics import metrics
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    base_seconds: float
+    cap_seconds: float
+    jitter: float
+    max_attempts: int
+
+    def delay_for(self, attempt: int, *, rng: random.Random | None = None) -> float:
+        """Backoff before the attempt after ``attempt``: capped exponential, minus up to ``jitter`` of it."""
+        delay = min(self.cap_seconds, self.base_seconds * (2 ** max(0, attempt - 1)))
+        return delay * (1.0 - self.jitter * (rng or random).random())
+
+
+def policy_for(error_code: str) -> RetryPolicy:
+    for code, base, cap, jitter, attempts in settings.retry_policies:
+        if code == error_code:
+            return RetryPolicy(base, cap, jitter, attempts)
+    return RetryPolicy(settings.retry_base_seconds, settings.retry_cap_seconds, settings.retry_jitter, settings.max_stage_attempts)
+
+
+class RetryScheduler:
+    """A delayed queue: callbacks become due at a monotonic time and run on one thread.
+
+    Callbacks must be quick hand-offs (re-enqueue a token, start a run on an
+    executor); the stage work itself never runs here, so a retry waiting for
+    its backoff holds no worker slot.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Callable[..., Any], tuple[Any, ...]]] = []
+        self._seq = itertools.count()
+        self._cond = Condition()
+        self._thread: Thread | None = None
+
+    def schedule(self, delay_seconds: float, fn: Callable[..., Any], *args: Any) -> None:
+        due = time.monotonic() + max(0.0, delay_seconds)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), fn, args))
+            metrics.set_gauge("retry_pending", len(self._heap))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._loop, name="im-retry-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = None if not self._heap else self._heap[0][0] - time.monotonic()
+                    self._cond.wait(timeout)
+                _, _, fn, args = heapq.heappop(self._heap)
+                metrics.set_gauge("retry_pending", len(self._heap))
+            try:
+                fn(*args)
+            except Exception:  # noqa: BLE001
+                continue
+
+
+retry_scheduler = RetryScheduler()
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Body, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.audit import append_audit_event
-from app.database import get_db
+from app.database import get_db, unit_of_work
 from app.i18n import pick_lang, t
 from app.metrics import metrics
 from app.rate_limit import rate_limit_dependency
@@ -41,64 +41,74 @@ def upload_document(
     tenant_id = user["tenant_id"]
     contract = evaluate_ingestion_contract(payload=payload, filename=filename, content_type=content_type)
 
-    doc = create_document(
-        db,
-        tenant_id=tenant_id,
-        filename=filename,
-        content_type=content_type,
-        size_bytes=len(payload),
-        storage_path="pending",
-        language=detect_language(filename),
-        ingestion_status="ACCEPTED" if contract.decision == "ACCEPT" else contract.decision,
-        quality_tier=contract.quality_tier,
-        quality_score=contract.quality_score,
-    )
-
-    quarantine_item_id: str | None = None
-    if contract.decision == "ACCEPT":
-        path = save_raw_document(doc.id, filename, payload)
-        update_document_ingestion(
-            db,
-            doc,
-            storage_path=path,
-            ingestion_status="ACCEPTED",
-            quality_tier=contract.quality_tier,
-            quality_score=contract.quality_score,
-        )
-        message = t("upload_ok", lang)
-    else:
-        quarantine_path = save_quarantine_document(tenant_id, doc.id, filename, payload)
-        save_quarantine_metadata(
-            quarantine_path,
-            payload=json.dumps(
-                {
-                    "stage": contract.stage,
-                    "reason_codes": contract.reason_codes,
-                    "details": contract.details,
-                },
-                ensure_ascii=False,
-            ).encode("utf-8"),
-        )
-        item = create_quarantine_item(
+    # One transaction and no reloads: the document row is written once, with its final storage path.
+    with unit_of_work(db):
+        doc = create_document(
             db,
-            document_id=doc.id,
             tenant_id=tenant_id,
-            stage=contract.stage,
-            status=contract.quarantine_status or "QUARANTINED_UNKNOWN",
-            reason_codes=contract.reason_codes or ["QUARANTINED_UNKNOWN"],
-            storage_path=quarantine_path,
-            details=contract.details,
-        )
-        quarantine_item_id = item.id
-        metrics.inc("quarantine_created")
-        update_document_ingestion(
-            db,
-            doc,
-            storage_path=quarantine_path,
-            ingestion_status="QUARANTINED" if contract.decision == "QUARANTINE" else "REJECTED",
+            filename=filename,
+            content_type=content_type,
+            size_bytes=len(payload),
+            storage_path="pending",
+            language=detect_language(filename),
+            ingestion_status="ACCEPTED" if contract.decision == "ACCEPT" else contract.decision,
             quality_tier=contract.quality_tier,
             quality_score=contract.quality_score,
+            content_hash=contract.details.get("content_hash"),
+            commit=False,
         )
+
+        quarantine_item_id: str | None = None
+        if contract.decision == "ACCEPT":
+            path = save_raw_document(doc.id, filename, payload)
+            update_document_ingestion(
+                db,
+                doc,
+                storage_path=path,
+                ingestion_status="ACCEPTED",
+                quality_tier=contract.quality_tier,
+                quality_score=contract.quality_score,
+                commit=False,
+            )
+            message = t("upload_ok", lang)
+        else:
+            quarantine_path = save_quarantine_document(tenant_id, doc.id, filename, payload)
+            save_quarantine_metadata(
+                quarantine_path,
+                payload=json.dumps(
+                    {
+                        "stage": contract.stage,
+                        "reason_codes": contract.reason_codes,
+                        "details": contract.details,
+                    },
+                    ensure_ascii=False,
+                ).encode("utf-8"),
+            )
+            item = create_quarantine_item(
+                db,
+                document_id=doc.id,
+                tenant_id=tenant_id,
+                stage=contract.stage,
+                status=contract.quarantine_status or "QUARANTINED_UNKNOWN",
+                reason_codes=contract.reason_codes or ["QUARANTINED_UNKNOWN"],
+                storage_path=quarantine_path,
+                details=contract.details,
+                commit=False,
+            )
+            quarantine_item_id = item.id
+            update_document_ingestion(
+                db,
+                doc,
+                storage_path=quarantine_path,
+                ingestion_status="QUARANTINED" if contract.decision == "QUARANTINE" else "REJECTED",
+                quality_tier=contract.quality_tier,
+                quality_score=contract.quality_score,
+                commit=False,
+            )
+            message = t("upload_quarantined", lang) if contract.decision == "QUARANTINE" else t("upload_rejected", lang)
+
+    if quarantine_item_id is not None:
+        metrics.inc("quarantine_created")
         append_audit_event(
             "document_quarantined",
             payload={
@@ -108,9 +118,7 @@ def upload_document(
                 "status": item.status,
             },
         )
-        message = t("upload_quarantined", lang) if contract.decision == "QUARANTINE" else t("upload_rejected", lang)
 
-    db.refresh(doc)
     return DocumentOut(
         id=doc.id,
         tenant_id=doc.tenant_id,
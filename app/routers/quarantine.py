@@ -1,23 +1,34 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import json
+from datetime import datetime
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.audit import append_audit_event
-from app.database import get_db
+from app.database import get_db, unit_of_work
 from app.i18n import pick_lang, t
 from app.metrics import metrics
 from app.repositories import (
+    count_quarantine_items,
     get_document,
     get_quarantine_item,
     list_quarantine_items,
     mark_quarantine_reprocessed,
+    summarize_quarantine_reasons,
     update_document_ingestion,
 )
-from app.schemas import QuarantineItemOut, QuarantineListResponse, QuarantineReprocessResponse
+from app.schemas import (
+    QuarantineItemOut,
+    QuarantineListResponse,
+    QuarantineReasonStat,
+    QuarantineReprocessResponse,
+    QuarantineStatsResponse,
+)
 from app.security import require_roles
 from app.services.quality_contract import evaluate_ingestion_contract
 from app.services.storage import save_quarantine_document, save_quarantine_metadata, save_raw_document
@@ -43,23 +54,51 @@ def _to_item_out(item) -> QuarantineItemOut:
     )
 
 
+def _encode_cursor(item) -> str:
+    raw = json.dumps([item.created_at.isoformat(), item.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, lang: str) -> tuple[datetime, str]:
+    try:
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(item_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=t("invalid_cursor", lang))
+
+
 @router.get("", response_model=QuarantineListResponse)
 def list_items(
     status_filter: str | None = Query(default=None, alias="status"),
     reason_code: str | None = Query(default=None),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     db: Session = Depends(get_db),
     user: dict = Depends(require_roles("Admin", "Reviewer", "Approver", "Auditor")),
+    accept_language: str | None = Header(default=None),
 ):
-    items = list_quarantine_items(
-        db,
-        tenant_id=user["tenant_id"],
-        status=status_filter,
-        reason_code=reason_code,
-        limit=limit,
-    )
+    lang = pick_lang(accept_language)
+    before = _decode_cursor(cursor, lang) if cursor else None
+    filters = {"tenant_id": user["tenant_id"], "status": status_filter, "reason_code": reason_code}
+    items = list_quarantine_items(db, **filters, limit=limit, before=before)
     out = [_to_item_out(item) for item in items]
-    return QuarantineListResponse(items=out, total=len(out))
+    return QuarantineListResponse(
+        items=out,
+        total=count_quarantine_items(db, **filters),
+        next_cursor=_encode_cursor(items[-1]) if len(items) == limit else None,
+    )
+
+
+@router.get("/stats", response_model=QuarantineStatsResponse)
+def quarantine_stats(
+    db: Session = Depends(get_db),
+    user: dict = Depends(require_roles("Admin", "Reviewer", "Approver", "Auditor")),
+):
+    stats = [
+        QuarantineReasonStat(reason_code=reason_code, status=item_status, count=count)
+        for reason_code, item_status, count in summarize_quarantine_reasons(db, tenant_id=user["tenant_id"])
+    ]
+    return QuarantineStatsResponse(tenant_id=user["tenant_id"], stats=stats)
 
 
 @router.get("/{item_id}", response_model=QuarantineItemOut)
@@ -94,14 +133,16 @@ def reprocess_item(
 
     path = Path(item.storage_path)
     if not path.exists():
-        mark_quarantine_reprocessed(
-            db,
-            item,
-            status="QUARANTINED_UNKNOWN",
-            reason_codes=["FILE_CORRUPT"],
-            details={"error": "missing_quarantine_file"},
-            resolved=False,
-        )
+        with unit_of_work(db):
+            mark_quarantine_reprocessed(
+                db,
+                item,
+                status="QUARANTINED_UNKNOWN",
+                reason_codes=["FILE_CORRUPT"],
+                details={"error": "missing_quarantine_file"},
+                resolved=False,
+                commit=False,
+            )
         return QuarantineReprocessResponse(
             quarantine_item_id=item.id,
             status=item.status,
@@ -115,54 +156,61 @@ def reprocess_item(
         filename=document.filename,
         content_type=document.content_type,
     )
-    if contract.decision == "ACCEPT":
-        raw_path = save_raw_document(document.id, document.filename, payload)
-        update_document_ingestion(
-            db,
-            document,
-            storage_path=raw_path,
-            ingestion_status="ACCEPTED",
-            quality_tier=contract.quality_tier,
-            quality_score=contract.quality_score,
-        )
-        mark_quarantine_reprocessed(
-            db,
-            item,
-            status="QUARANTINE_RESOLVED",
-            reason_codes=[],
-            details={"reprocess_result": "accepted"},
-            resolved=True,
-        )
-    else:
-        quarantine_path = save_quarantine_document(document.tenant_id, document.id, document.filename, payload)
-        save_quarantine_metadata(
-            quarantine_path,
-            payload=json.dumps(
-                {
-                    "stage": contract.stage,
-                    "reason_codes": contract.reason_codes,
-                    "details": contract.details,
-                    "reprocessed": True,
-                },
-                ensure_ascii=False,
-            ).encode("utf-8"),
-        )
-        update_document_ingestion(
-            db,
-            document,
-            storage_path=quarantine_path,
-            ingestion_status="QUARANTINED",
-            quality_tier=contract.quality_tier,
-            quality_score=contract.quality_score,
-        )
-        mark_quarantine_reprocessed(
-            db,
-            item,
-            status=contract.quarantine_status or "QUARANTINED_UNKNOWN",
-            reason_codes=contract.reason_codes,
-            details={"reprocess_result": "still_quarantined", "stage": contract.stage},
-            resolved=False,
-        )
+    # The document and its quarantine item change together, in one transaction.
+    with unit_of_work(db):
+        if contract.decision == "ACCEPT":
+            raw_path = save_raw_document(document.id, document.filename, payload)
+            update_document_ingestion(
+                db,
+                document,
+                storage_path=raw_path,
+                ingestion_status="ACCEPTED",
+                quality_tier=contract.quality_tier,
+                quality_score=contract.quality_score,
+                content_hash=contract.details.get("content_hash"),
+                commit=False,
+            )
+            mark_quarantine_reprocessed(
+                db,
+                item,
+                status="QUARANTINE_RESOLVED",
+                reason_codes=[],
+                details={"reprocess_result": "accepted"},
+                resolved=True,
+                commit=False,
+            )
+        else:
+            quarantine_path = save_quarantine_document(document.tenant_id, document.id, document.filename, payload)
+            save_quarantine_metadata(
+                quarantine_path,
+                payload=json.dumps(
+                    {
+                        "stage": contract.stage,
+                        "reason_codes": contract.reason_codes,
+                        "details": contract.details,
+                        "reprocessed": True,
+                    },
+                    ensure_ascii=False,
+                ).encode("utf-8"),
+            )
+            update_document_ingestion(
+                db,
+                document,
+                storage_path=quarantine_path,
+                ingestion_status="QUARANTINED",
+                quality_tier=contract.quality_tier,
+                quality_score=contract.quality_score,
+                commit=False,
+            )
+            mark_quarantine_reprocessed(
+                db,
+                item,
+                status=contract.quarantine_status or "QUARANTINED_UNKNOWN",
+                reason_codes=contract.reason_codes,
+                details={"reprocess_result": "still_quarantined", "stage": contract.stage},
+                resolved=False,
+                commit=False,
+            )
 
     append_audit_event(
         "quarantine_reprocessed",
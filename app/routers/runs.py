@@ -1,21 +1,23 @@
 from __future__ import annotations
 
-import json
-
-from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.audit import append_audit_event
-from app.config import settings
-from app.database import get_db
+from app.background import background_runs
+from app.cancellation import CANCEL_SIGNAL, cancellations
+from app.config import DEFAULT_PRIORITY, PRIORITY_CLASSES, queue_depth_limits, settings
+from app.database import get_db, unit_of_work
 from app.i18n import pick_lang, t
 from app.metrics import metrics
-from app.orchestrator import process_run
+from app.queue_gauge import queue_gauge
 from app.repositories import (
-    count_runs_by_status,
     create_run,
-    get_document,
-    get_latest_open_quarantine_for_document,
+    create_run_signal,
+    enqueue_run,
+    get_document_for_run,
     get_run,
     get_run_by_idempotency,
     list_run_stages,
@@ -23,112 +25,135 @@ from app.repositories import (
 )
 from app.schemas import CancelResponse, RunCreateResponse, RunExportResponse, RunOut, RunStageOut
 from app.security import require_roles
+from app.wakeup import notify_workers
 
 router = APIRouter(prefix="/v1", tags=["runs"])
 
 
+def _resolve_priority(raw: str | None, lang: str) -> str:
+    priority = (raw or DEFAULT_PRIORITY).strip().lower()
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=t("invalid_priority", lang))
+    return priority
+
+
 @router.post("/documents/{document_id}/runs", response_model=RunCreateResponse)
 def create_document_run(
     document_id: str,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     user: dict = Depends(require_roles("Admin", "Reviewer", "Approver")),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    x_priority: str | None = Header(default=None, alias="X-Priority"),
     accept_language: str | None = Header(default=None),
 ):
     lang = pick_lang(accept_language)
+    priority = _resolve_priority(x_priority, lang)
     tenant_id = user["tenant_id"]
-    doc = get_document(db, document_id, tenant_id=tenant_id)
-    if not doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=t("doc_not_found", lang))
-
-    if doc.ingestion_status != "ACCEPTED":
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=t("doc_quarantined", lang))
-    if get_latest_open_quarantine_for_document(db, document_id=document_id, tenant_id=tenant_id):
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=t("doc_quarantined", lang))
 
-    if idempotency_key:
-        existing = get_run_by_idempotency(db, idempotency_key, tenant_id=tenant_id)
-        if existing:
-            metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
-            return RunCreateResponse(run_id=existing.id, status=existing.status, message=t("run_created", lang))
-
-    queued_depth = count_runs_by_status(db, "QUEUED", tenant_id=tenant_id)
-    if queued_depth >= settings.queue_reject_depth:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=t("queue_overloaded", lang))
+    # The gauge is in memory; no COUNT(*) on the hot path.
+    warn_depth, reject_depth = queue_depth_limits(priority)
+    queued_depth = queue_gauge.depth(tenant_id, priority=priority)
+    if queued_depth >= reject_depth:
+        # A client retrying a request that already went through still gets its run.
+        existing = get_run_by_idempotency(db, idempotency_key, tenant_id=tenant_id) if idempotency_key else None
+        if not existing:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=t("queue_overloaded", lang))
+        return RunCreateResponse(run_id=existing.id, status=existing.status, message=t("run_created", lang))
 
-    run = create_run(
+    run = enqueue_run(
         db,
         document_id=document_id,
         tenant_id=tenant_id,
         requested_by=user["username"],
         idempotency_key=idempotency_key,
+        priority=priority,
     )
+    if run is None:
+        doc, _ = get_document_for_run(db, document_id, tenant_id=tenant_id)
+        if not doc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=t("doc_not_found", lang))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=t("doc_quarantined", lang))
+    if not run.created:
+        return RunCreateResponse(run_id=run.run_id, status=run.status, message=t("run_created", lang))
+
     append_audit_event(
         "run_created",
-        run_id=run.id,
+        run_id=run.run_id,
         payload={
             "tenant_id": tenant_id,
             "document_id": document_id,
             "requested_by": user["username"],
             "idempotency_key": idempotency_key,
+            "priority": priority,
         },
     )
     metrics.inc("run_created")
-    metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
     if settings.execution_mode in {"background", "hybrid"}:
-        background_tasks.add_task(process_run, run.id, "api-background")
+        background_runs.submit(run.run_id)
+    if settings.execution_mode in {"worker", "hybrid"}:
+        notify_workers()
 
-    message = t("queue_backpressure", lang) if queued_depth >= settings.queue_warn_depth else t("run_created", lang)
-    return RunCreateResponse(run_id=run.id, status=run.status, message=message)
+    message = t("queue_backpressure", lang) if queued_depth >= warn_depth else t("run_created", lang)
+    return RunCreateResponse(run_id=run.run_id, status=run.status, message=message)
+
+
+# RunOut fields served from the deferred JSON payload columns of Run.
+_PAYLOAD_FIELDS = {
+    "review_reason_codes": "review_reason_codes_json",
+    "decision_log": "decision_log_json",
+    "result": "result_json",
+    "validation_issues": "validation_issues_json",
+}
+
+
+def _resolve_fields(raw: str | None, lang: str) -> list[str]:
+    if raw is None:
+        return list(RunOut.model_fields)
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    if not requested or not requested <= RunOut.model_fields.keys():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=t("invalid_run_fields", lang))
+    # run_id always comes back, so a projected response still says which run it is
+    return [name for name in RunOut.model_fields if name in requested or name == "run_id"]
+
+
+def _run_field(db: Session, run, name: str):
+    if name == "run_id":
+        return run.id
+    if name == "stages":
+        return [
+            RunStageOut(
+                stage_name=s.stage_name,
+                status=s.status,
+                attempt=s.attempt,
+                error_code=s.error_code,
+                started_at=s.started_at,
+                finished_at=s.finished_at,
+            )
+            for s in list_run_stages(db, run.id)
+        ]
+    return getattr(run, _PAYLOAD_FIELDS.get(name, name))
 
 
 @router.get("/runs/{run_id}", response_model=RunOut)
 def get_run_details(
     run_id: str,
+    fields: str | None = Query(default=None, description="Comma-separated RunOut fields, e.g. status,review_decision"),
     db: Session = Depends(get_db),
     user: dict = Depends(require_roles("Admin", "Reviewer", "Approver", "Viewer", "Auditor")),
     accept_language: str | None = Header(default=None),
 ):
     lang = pick_lang(accept_language)
-    run = get_run(db, run_id, tenant_id=user["tenant_id"])
+    names = _resolve_fields(fields, lang)
+    # only the requested payload columns are read and decoded; stages only when asked for
+    payload = [_PAYLOAD_FIELDS[name] for name in names if name in _PAYLOAD_FIELDS]
+    run = get_run(db, run_id, tenant_id=user["tenant_id"], payload=payload)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=t("run_not_found", lang))
 
-    stages = [
-        RunStageOut(
-            stage_name=s.stage_name,
-            status=s.status,
-            attempt=s.attempt,
-            error_code=s.error_code,
-            started_at=s.started_at,
-            finished_at=s.finished_at,
-        )
-        for s in list_run_stages(db, run.id)
-    ]
-
-    review_reason_codes = json.loads(run.review_reason_codes_json) if run.review_reason_codes_json else None
-    decision_log = json.loads(run.decision_log_json) if run.decision_log_json else None
-
-    return RunOut(
-        run_id=run.id,
-        document_id=run.document_id,
-        tenant_id=run.tenant_id,
-        status=run.status,
-        model_name=run.model_name,
-        route_name=run.route_name,
-        error_code=run.error_code,
-        review_decision=run.review_decision,
-        review_reason_codes=review_reason_codes,
-        decision_log=decision_log,
-        cancel_requested=run.cancel_requested,
-        created_at=run.created_at,
-        updated_at=run.updated_at,
-        finished_at=run.finished_at,
-        result=json.loads(run.result_json) if run.result_json else None,
-        validation_issues=json.loads(run.validation_issues_json) if run.validation_issues_json else None,
-        stages=stages,
-    )
+    values = {name: _run_field(db, run, name) for name in names}
+    if fields is None:
+        return RunOut(**values)
+    return JSONResponse(jsonable_encoder(RunOut.model_construct(**values), include=set(names)))
 
 
 @router.post("/runs/{run_id}/cancel", response_model=CancelResponse)
@@ -147,10 +172,12 @@ def cancel_run(
         update_run_status(db, run, status="CANCELLED", finished=True)
         metrics.inc("run_cancelled")
         append_audit_event("run_cancelled", run_id=run.id, payload={"cancelled_before_start": True, "tenant_id": run.tenant_id})
-        metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
     else:
+        if run.status == "RUNNING" and cancellations.shared:
+            create_run_signal(db, run_id=run.id, signal=CANCEL_SIGNAL, commit=False)
         db.commit()
         db.refresh(run)
+        cancellations.request(run.id)
         append_audit_event("run_cancel_requested", run_id=run.id, payload={"status": run.status, "tenant_id": run.tenant_id})
     return CancelResponse(run_id=run.id, status=run.status, message=t("run_cancelled", lang))
 
@@ -158,38 +185,49 @@ def cancel_run(
 @router.post("/runs/{run_id}/replay", response_model=RunCreateResponse)
 def replay_run(
     run_id: str,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     user: dict = Depends(require_roles("Admin", "Reviewer", "Approver")),
+    x_priority: str | None = Header(default=None, alias="X-Priority"),
     accept_language: str | None = Header(default=None),
 ):
     lang = pick_lang(accept_language)
+    priority = _resolve_priority(x_priority, lang)
     old = get_run(db, run_id, tenant_id=user["tenant_id"])
     if not old:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=t("run_not_found", lang))
 
-    queued_depth = count_runs_by_status(db, "QUEUED", tenant_id=user["tenant_id"])
-    if queued_depth >= settings.queue_reject_depth:
+    warn_depth, reject_depth = queue_depth_limits(priority)
+    queued_depth = queue_gauge.depth(user["tenant_id"], priority=priority)
+    if queued_depth >= reject_depth:
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=t("queue_overloaded", lang))
 
-    run = create_run(
-        db,
-        document_id=old.document_id,
-        tenant_id=old.tenant_id,
-        requested_by=user["username"],
-        replay_of_run_id=old.id,
-    )
+    with unit_of_work(db):
+        run = create_run(
+            db,
+            document_id=old.document_id,
+            tenant_id=old.tenant_id,
+            requested_by=user["username"],
+            replay_of_run_id=old.id,
+            priority=priority,
+            commit=False,
+        )
     append_audit_event(
         "run_replayed",
         run_id=run.id,
-        payload={"replay_of_run_id": old.id, "requested_by": user["username"], "tenant_id": old.tenant_id},
+        payload={
+            "replay_of_run_id": old.id,
+            "requested_by": user["username"],
+            "tenant_id": old.tenant_id,
+            "priority": priority,
+        },
     )
     metrics.inc("run_created")
-    metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
     if settings.execution_mode in {"background", "hybrid"}:
-        background_tasks.add_task(process_run, run.id, "api-background")
+        background_runs.submit(run.id)
+    if settings.execution_mode in {"worker", "hybrid"}:
+        notify_workers()
 
-    message = t("queue_backpressure", lang) if queued_depth >= settings.queue_warn_depth else t("run_created", lang)
+    message = t("queue_backpressure", lang) if queued_depth >= warn_depth else t("run_created", lang)
     return RunCreateResponse(run_id=run.id, status=run.status, message=message)
 
 
@@ -201,7 +239,7 @@ def export_run_output(
     accept_language: str | None = Header(default=None),
 ):
     lang = pick_lang(accept_language)
-    run = get_run(db, run_id, tenant_id=user["tenant_id"])
+    run = get_run(db, run_id, tenant_id=user["tenant_id"], payload=("result_json",))
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=t("run_not_found", lang))
     if run.status not in {"SUCCESS", "WARN", "NEEDS_REVIEW"}:
@@ -217,5 +255,4 @@ def export_run_output(
             "status": run.status,
         },
     )
-    result_payload = json.loads(run.result_json) if run.result_json else None
-    return RunExportResponse(run_id=run.id, status=run.status, review_decision=run.review_decision, result=result_payload)
+    return RunExportResponse(run_id=run.id, status=run.status, review_decision=run.review_decision, result=run.result_json)
@@ -53,6 +53,7 @@ class RunOut(BaseModel):
     document_id: str
     tenant_id: str
     status: str
+    priority: str = "standard"
     model_name: str | None = None
     route_name: str | None = None
     error_code: str | None = None
@@ -93,6 +94,18 @@ class QuarantineItemOut(BaseModel):
 class QuarantineListResponse(BaseModel):
     items: list[QuarantineItemOut]
     total: int
+    next_cursor: str | None = None
+
+
+class QuarantineReasonStat(BaseModel):
+    reason_code: str
+    status: str
+    count: int
+
+
+class QuarantineStatsResponse(BaseModel):
+    tenant_id: str
+    stats: list[QuarantineReasonStat]
 
 
 class QuarantineReprocessResponse(BaseModel):
@@ -8,6 +8,8 @@ from datetime import date
 from pathlib import Path
 from typing import Any, Callable
 
+from app.cancellation import CancelToken, RunCancelled
+from app.deadlines import Deadline
 from app.config import settings
 from services.model_router import select_model_for_extraction
 
@@ -44,11 +46,36 @@ def detect_language(filename: str) -> str:
     return "en"
 
 
+def engine_fingerprint() -> dict[str, str]:
+    """Which optional OCR/extraction providers this process can use.
+
+    Results produced with a different provider set are not interchangeable, so
+    the stage cache folds this into its keys.
+    """
+    try:
+        import pytesseract  # noqa: F401
+        from PIL import Image  # noqa: F401
+
+        ocr_engine = "tesseract"
+    except Exception:  # noqa: BLE001
+        ocr_engine = "fallback"
+    return {
+        "ocr_engine": ocr_engine,
+        "invoice2data": "available" if _load_invoice2data_extract() is not None else "missing",
+    }
+
+
 def ocr_extract_text(file_path: str) -> str:
     return run_ocr(file_path).text
 
 
-def run_ocr(file_path: str, filename: str | None = None) -> OCRResult:
+def run_ocr(
+    file_path: str,
+    filename: str | None = None,
+    *,
+    cancel_token: CancelToken | None = None,
+    deadline: Deadline | None = None,
+) -> OCRResult:
     path = Path(file_path)
     effective_name = filename or path.name
 
@@ -56,10 +83,18 @@ def run_ocr(file_path: str, filename: str | None = None) -> OCRResult:
     if text_file:
         return text_file
 
-    tesseract_result = _extract_with_tesseract(path)
+    _check_cancelled(cancel_token)
+    if deadline is not None:
+        deadline.raise_if_expired("OCR")
+        if deadline.remaining() < settings.ocr_min_budget_seconds:
+            # Not enough budget left for an engine run; degrade instead of timing out.
+            return _deterministic_ocr_fallback(path, effective_name, reason="deadline_budget")
+    tesseract_result = _extract_with_tesseract(path, cancel_token=cancel_token, deadline=deadline)
     if tesseract_result:
         return tesseract_result
 
+    if deadline is not None and deadline.expired():
+        return _deterministic_ocr_fallback(path, effective_name, reason="deadline_budget")
     return _deterministic_ocr_fallback(path, effective_name)
 
 
@@ -88,7 +123,11 @@ def run_structured_extraction(
     language: str,
     file_path: str | None = None,
     ocr_confidence: float = 0.75,
+    cancel_token: CancelToken | None = None,
+    deadline: Deadline | None = None,
 ) -> StructuredExtractionResult:
+    if deadline is not None:
+        deadline.raise_if_expired("EXTRACT")
     model = select_model_for_extraction(
         {
             "language": language,
@@ -100,8 +139,13 @@ def run_structured_extraction(
 
     raw_data: dict[str, Any] | None = None
     probe_details: dict[str, Any] = {}
-    if file_path:
+    if file_path and deadline is not None and deadline.remaining() < settings.extract_min_budget_seconds:
+        # invoice2data cannot be interrupted; only start it when the budget allows.
+        probe_details = {"adapter": "invoice2data", "status": "skipped_deadline", "degraded": "deadline_budget"}
+    elif file_path:
+        _check_cancelled(cancel_token)
         raw_data, probe_details = _try_invoice2data_extract(file_path)
+    _check_cancelled(cancel_token)
 
     if raw_data:
         result = _map_invoice2data_to_invoice_v1(raw_data, text=text, language=language, filename=filename)
@@ -241,7 +285,17 @@ def _extract_from_plain_text(path: Path) -> OCRResult | None:
     return OCRResult(text=text, provider="plain_text_reader", confidence=0.99)
 
 
-def _extract_with_tesseract(path: Path) -> OCRResult | None:
+def _check_cancelled(cancel_token: CancelToken | None) -> None:
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+def _extract_with_tesseract(
+    path: Path,
+    *,
+    cancel_token: CancelToken | None = None,
+    deadline: Deadline | None = None,
+) -> OCRResult | None:
     try:
         import pytesseract
         from PIL import Image
@@ -253,8 +307,10 @@ def _extract_with_tesseract(path: Path) -> OCRResult | None:
 
     try:
         image = Image.open(path)
-        text = pytesseract.image_to_string(image).strip()
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        # pytesseract kills the engine subprocess once ``timeout`` elapses (0 = no limit)
+        text = pytesseract.image_to_string(image, timeout=_engine_timeout(deadline)).strip()
+        _check_cancelled(cancel_token)
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, timeout=_engine_timeout(deadline))
         conf_values = []
         for val in data.get("conf", []):
             try:
@@ -264,6 +320,8 @@ def _extract_with_tesseract(path: Path) -> OCRResult | None:
             if c >= 0:
                 conf_values.append(c / 100.0)
         confidence = sum(conf_values) / len(conf_values) if conf_values else 0.65
+    except RunCancelled:
+        raise
     except Exception:  # noqa: BLE001
         return None
 
@@ -276,7 +334,13 @@ def _extract_with_tesseract(path: Path) -> OCRResult | None:
     )
 
 
-def _deterministic_ocr_fallback(path: Path, filename: str) -> OCRResult:
+def _engine_timeout(deadline: Deadline | None) -> float:
+    if deadline is None:
+        return 0
+    return max(0.001, deadline.remaining())
+
+
+def _deterministic_ocr_fallback(path: Path, filename: str, *, reason: str = "no_ocr_engine_available") -> OCRResult:
     sample = b""
     if path.exists():
         sample = path.read_bytes()[:4096]
@@ -287,7 +351,7 @@ def _deterministic_ocr_fallback(path: Path, filename: str) -> OCRResult:
         text=text,
         provider="deterministic_fallback",
         confidence=0.74,
-        details={"reason": "no_ocr_engine_available"},
+        details={"reason": reason, "degraded": reason} if reason == "deadline_budget" else {"reason": reason},
     )
 
 
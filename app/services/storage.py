@@ -51,3 +51,22 @@ def save_run_output(run_id: str, name: str, payload: bytes) -> str:
     out_path = out_dir / name
     out_path.write_bytes(payload)
     return str(out_path)
+
+
+def save_run_checkpoint(run_id: str, name: str, payload: bytes) -> str:
+    out_dir = Path(settings.storage_root) / "runs" / run_id / "checkpoints"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / name
+    # write-then-rename so a crash never leaves a truncated checkpoint behind
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(out_path)
+    return str(out_path)
+
+
+def load_run_checkpoint(run_id: str, name: str) -> bytes | None:
+    path = Path(settings.storage_root) / "runs" / run_id / "checkpoints" / name
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import signal
+import time
+from threading import Event, Lock
+from typing import Callable
+
+from app.config import settings
+
+HANDLED_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+# How long past the grace period interrupted runs get to requeue themselves.
+DRAIN_MARGIN_SECONDS = 5.0
+
+
+class ShutdownCoordinator:
+    """Graceful shutdown of one process: stop taking runs, then finish or requeue the rest.
+
+    ``request`` (normally from SIGTERM) starts a grace period. Claim loops stop
+    claiming as soon as ``requested`` is set, and runs that were claimed but
+    not started give their lease back. Runs in flight keep going; once
+    ``grace_expired`` the orchestrator stops each one at its next check (at a
+    stage boundary or while waiting on a stage) and requeues it at that stage,
+    where the next worker resumes from the stage checkpoints.
+    """
+
+    def __init__(self, *, grace_seconds: float | None = None) -> None:
+        self.grace_seconds = settings.shutdown_grace_seconds if grace_seconds is None else grace_seconds
+        self._event = Event()
+        self._lock = Lock()
+        self._deadline: float | None = None
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def requested(self) -> bool:
+        return self._event.is_set()
+
+    def request(self) -> bool:
+        """Start the grace period; False if shutdown was already requested."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._deadline = time.monotonic() + max(0.0, self.grace_seconds)
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # noqa: BLE001
+                continue
+        return True
+
+    def grace_expired(self) -> bool:
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def remaining(self) -> float | None:
+        """Seconds left of the grace period, or None if no shutdown is under way."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def drain_timeout(self) -> float:
+        """How long to wait for in-flight runs: they finish or requeue within this."""
+        return max(0.0, self.grace_seconds) + DRAIN_MARGIN_SECONDS
+
+    def on_request(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` when shutdown is requested, e.g. to wake an idle loop."""
+        with self._lock:
+            self._callbacks.append(callback)
+            if not self._event.is_set():
+                return
+        callback()
+
+    def install_signal_handlers(self, *, chain: bool = False) -> bool:
+        """Request shutdown on SIGTERM/SIGINT; False where handlers can't be set.
+
+        With ``chain`` the previous handlers (uvicorn's, in the API) still run
+        on every signal. Otherwise the first signal starts the drain and the
+        previous handler is put back, so a second one stops the process at once.
+        """
+        try:
+            for sig in HANDLED_SIGNALS:
+                previous = signal.getsignal(sig)
+                if previous is None:
+                    previous = signal.SIG_DFL
+
+                def _handle(signum, frame, previous=previous):
+                    self.request()
+                    if chain:
+                        if callable(previous):
+                            previous(signum, frame)
+                    else:
+                        signal.signal(signum, previous)
+
+                signal.signal(sig, _handle)
+        except ValueError:
+            # not the main thread (e.g. an embedded test client)
+            return False
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._event.clear()
+            self._deadline = None
+            self._callbacks = []
+
+
+shutdown = ShutdownCoordinator()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import metrics
+from app.repositories import (
+    delete_stage_cache_entries,
+    get_stage_cache_entry,
+    list_stage_cache_lru,
+    total_stage_cache_bytes,
+    touch_stage_cache_entry,
+    upsert_stage_cache_entry,
+)
+from app.services.change_management import runtime_version_snapshot
+from app.services.extraction import engine_fingerprint
+
+CACHE_FORMAT = 1
+CACHEABLE_STAGES = ("OCR", "EXTRACT")
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def file_content_hash(path: str | Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Stage outputs keyed by (content hash, stage, inputs, version hashes).
+
+    Payloads are JSON files under ``<storage_root>/cache``; the
+    ``stage_cache_entries`` table indexes them and carries the access time used
+    for size-bounded LRU eviction. Every failure degrades to a miss: the cache
+    must never be the reason a run fails.
+    """
+
+    def __init__(
+        self,
+        *,
+        root: str | Path | None = None,
+        max_bytes: int | None = None,
+        stages: tuple[str, ...] | None = None,
+        enabled: bool | None = None,
+    ) -> None:
+        self.root = Path(root) if root is not None else Path(settings.storage_root) / "cache"
+        self.max_bytes = settings.stage_cache_max_bytes if max_bytes is None else max_bytes
+        self.stages = set(settings.stage_cache_stages if stages is None else stages)
+        self.enabled = settings.stage_cache_enabled if enabled is None else enabled
+        self._evict_lock = Lock()
+
+    def enabled_for(self, stage: str) -> bool:
+        return self.enabled and stage in self.stages
+
+    def versions_for(self, stage: str) -> dict[str, Any]:
+        versions: dict[str, Any] = {"format": CACHE_FORMAT, "engines": engine_fingerprint()}
+        if stage == "EXTRACT":
+            snapshot = runtime_version_snapshot()
+            versions.update(
+                {
+                    "versions": snapshot["versions"],
+                    "artifact_hashes": snapshot["artifact_hashes"],
+                    "runtime": snapshot["runtime"],
+                    "low_confidence_threshold": settings.low_confidence_threshold,
+                    "low_ocr_confidence_threshold": settings.low_ocr_confidence_threshold,
+                }
+            )
+        return versions
+
+    def key_for(self, stage: str, content_hash: str, inputs: dict[str, Any]) -> tuple[str, str]:
+        versions_hash = _digest(self.versions_for(stage))
+        cache_key = _digest({"stage": stage, "content_hash": content_hash, "inputs": inputs, "versions": versions_hash})
+        return cache_key, versions_hash
+
+    def get(self, stage: str, cache_key: str) -> dict[str, Any] | None:
+        db = SessionLocal()
+        try:
+            entry = get_stage_cache_entry(db, cache_key)
+            if not entry or entry.stage_name != stage:
+                metrics.inc("stage_cache_miss")
+                return None
+            try:
+                document = json.loads(Path(entry.storage_path).read_text(encoding="utf-8"))
+                payload = document["payload"]
+            except (OSError, ValueError, KeyError):
+                delete_stage_cache_entries(db, [entry])
+                metrics.inc("stage_cache_miss")
+                return None
+            touch_stage_cache_entry(db, entry)
+            metrics.inc("stage_cache_hit")
+            return payload
+        except SQLAlchemyError:
+            db.rollback()
+            metrics.inc("stage_cache_error")
+            metrics.inc("stage_cache_miss")
+            return None
+        finally:
+            db.close()
+
+    def put(self, stage: str, cache_key: str, *, content_hash: str, versions_hash: str, payload: dict[str, Any]) -> None:
+        target = self.root / stage.lower() / cache_key[:2] / f"{cache_key}.json"
+        body = json.dumps(
+            {"format": CACHE_FORMAT, "stage": stage, "content_hash": content_hash, "payload": payload},
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+        db = SessionLocal()
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temp file per write, so concurrent writers of one key never share it.
+            handle = tempfile.NamedTemporaryFile(dir=target.parent, prefix=f".{cache_key}.", suffix=".tmp", delete=False)
+            tmp = Path(handle.name)
+            try:
+                with handle:
+                    handle.write(body)
+                os.replace(tmp, target)
+            except OSError:
+                tmp.unlink(missing_ok=True)
+                raise
+            upsert_stage_cache_entry(
+                db,
+                cache_key=cache_key,
+                stage_name=stage,
+                content_hash=content_hash,
+                versions_hash=versions_hash,
+                storage_path=str(target),
+                size_bytes=len(body),
+            )
+            self._evict(db)
+        except (OSError, SQLAlchemyError):
+            db.rollback()
+            metrics.inc("stage_cache_error")
+        finally:
+            db.close()
+
+    def _evict(self, db) -> int:
+        with self._evict_lock:
+            total = total_stage_cache_bytes(db)
+            evicted = 0
+            while total > self.max_bytes:
+                batch = list_stage_cache_lru(db, limit=50)
+                if not batch:
+                    break
+                doomed = []
+                for entry in batch:
+                    if total <= self.max_bytes:
+                        break
+                    Path(entry.storage_path).unlink(missing_ok=True)
+                    total -= int(entry.size_bytes)
+                    doomed.append(entry)
+                delete_stage_cache_entries(db, doomed)
+                evicted += len(doomed)
+            metrics.set_gauge("stage_cache_bytes", total)
+            if evicted:
+                metrics.inc("stage_cache_evicted", evicted)
+            return evicted
+
+
+stage_cache = StageCache()
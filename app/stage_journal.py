@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import RunStage
+from app.repositories import apply_stage_transitions, now_utc
+
+
+class StageJournal:
+    """Write-behind buffer for the stage transitions of a single run.
+
+    Transitions are kept in memory and written in one transaction when a
+    checkpoint stage succeeds, or when the orchestrator flushes at run end.
+    Because every flush applies all buffered transitions in order, a crash can
+    only lose the tail after the last checkpoint: the persisted rows always
+    describe a prefix of the run, and the last SUCCESS row is the last durable
+    stage.
+    """
+
+    def __init__(self, db: Session, run_id: str, *, checkpoints: Iterable[str] | None = None) -> None:
+        self.db = db
+        self.run_id = run_id
+        self.checkpoints = set(settings.stage_journal_checkpoints if checkpoints is None else checkpoints)
+        self._pending: list[dict[str, Any]] = []
+        self._rows: dict[tuple[str, int], RunStage] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(
+        self,
+        *,
+        stage_name: str,
+        status: str,
+        attempt: int = 1,
+        error_code: str | None = None,
+        details: dict | None = None,
+        started: bool = False,
+        finished: bool = False,
+    ) -> None:
+        self._pending.append(
+            {
+                "stage_name": stage_name,
+                "status": status,
+                "attempt": attempt,
+                "error_code": error_code,
+                "details": details,
+                "started": started,
+                "finished": finished,
+                "at": now_utc(),
+            }
+        )
+        if finished and status == "SUCCESS" and stage_name in self.checkpoints:
+            self.flush()
+
+    def flush(self, *, commit: bool = True) -> int:
+        count = len(self._pending)
+        if not count:
+            return 0
+        apply_stage_transitions(
+            self.db,
+            run_id=self.run_id,
+            transitions=self._pending,
+            known_rows=self._rows,
+            commit=commit,
+        )
+        self._pending = []
+        return count
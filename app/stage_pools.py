@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable
+
+from app.config import settings
+from app.metrics import metrics
+
+
+class StagePool:
+    """Long-lived, size-bounded executor for one stage class.
+
+    A stage attempt that exceeds its timeout is handed to the reaper instead of
+    being joined, so the caller fails immediately. Its thread keeps occupying a
+    slot until the stuck call returns; such slots are counted as poisoned and,
+    once every slot is poisoned, the executor is recycled so new work is not
+    blocked behind threads that may never finish.
+    """
+
+    def __init__(self, stage: str, size: int) -> None:
+        self.stage = stage
+        self.size = max(1, size)
+        self._lock = Lock()
+        self._generation = 0
+        self._executor = self._new_executor()
+        self.busy = 0
+        self.poisoned = 0
+        self.retired = 0
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.size,
+            thread_name_prefix=f"im-{self.stage.lower()}-g{self._generation}",
+        )
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        enqueued = time.perf_counter()
+
+        def _run() -> Any:
+            metrics.observe(f"stage_pool_{self.stage.lower()}_wait_ms", (time.perf_counter() - enqueued) * 1000)
+            with self._lock:
+                self.busy += 1
+                self._publish_locked()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self._publish_locked()
+
+        with self._lock:
+            executor = self._executor
+        return executor.submit(_run)
+
+    def abandon(self, fut: Future) -> None:
+        if fut.cancel():
+            return
+        with self._lock:
+            generation = self._generation
+            self.poisoned += 1
+            metrics.inc("stage_pool_poisoned")
+            if self.poisoned >= self.size:
+                self._recycle_locked()
+            self._publish_locked()
+        reaper.watch(self, fut, generation)
+
+    def release_poisoned(self, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self.poisoned = max(0, self.poisoned - 1)
+            else:
+                self.retired = max(0, self.retired - 1)
+            self._publish_locked()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _recycle_locked(self) -> None:
+        old = self._executor
+        self.retired += self.poisoned
+        self.poisoned = 0
+        self._generation += 1
+        self._executor = self._new_executor()
+        old.shutdown(wait=False)
+        metrics.inc("stage_pool_recycled")
+
+    def _publish_locked(self) -> None:
+        prefix = f"stage_pool_{self.stage.lower()}"
+        metrics.set_gauge(f"{prefix}_size", self.size)
+        metrics.set_gauge(f"{prefix}_busy", self.busy)
+        metrics.set_gauge(f"{prefix}_poisoned", self.poisoned + self.retired)
+        metrics.set_gauge(f"{prefix}_occupancy", round(min(self.busy, self.size) / self.size, 4))
+
+
+class StageReaper:
+    """Tracks abandoned stage futures until their threads finally return."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._pending: set[Future] = set()
+
+    def watch(self, pool: StagePool, fut: Future, generation: int) -> None:
+        with self._lock:
+            self._pending.add(fut)
+            metrics.set_gauge("stage_pool_abandoned_inflight", len(self._pending))
+
+        def _reap(done: Future) -> None:
+            with self._lock:
+                self._pending.discard(done)
+                metrics.set_gauge("stage_pool_abandoned_inflight", len(self._pending))
+            pool.release_poisoned(generation)
+            metrics.inc("stage_pool_reaped")
+
+        fut.add_done_callback(_reap)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+reaper = StageReaper()
+_pools: dict[str, StagePool] = {}
+_pools_lock = Lock()
+
+
+def get_stage_pool(stage: str) -> StagePool:
+    with _pools_lock:
+        pool = _pools.get(stage)
+        if pool is None:
+            pool = StagePool(stage, max(settings.stage_pool_size, dict(settings.stage_concurrency).get(stage, 1)))
+            _pools[stage] = pool
+        return pool
+
+
+def shutdown_stage_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import select
+import socket
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.metrics import metrics
+
+SOCKET_SUFFIX = ".sock"
+
+
+def wakeup_dir() -> Path:
+    return Path(settings.storage_root) / "wakeup"
+
+
+def wakeup_supported() -> bool:
+    return settings.worker_wakeup_enabled and hasattr(socket, "AF_UNIX")
+
+
+class WakeupListener:
+    """A worker's end of the wakeup channel: one datagram socket in ``<storage_root>/wakeup``.
+
+    Enqueue paths send a byte to every socket in the directory, and a worker
+    blocked in ``wait`` returns as soon as one arrives instead of sleeping out
+    its poll interval. Without Unix sockets (or if binding fails) the listener
+    is inert and ``wait`` is a plain sleep, so polling remains the fallback.
+    """
+
+    def __init__(self, directory: str | Path | None = None, *, name: str | None = None) -> None:
+        self.directory = Path(directory) if directory is not None else wakeup_dir()
+        self.path = self.directory / f"{name or f'worker-{os.getpid()}'}{SOCKET_SUFFIX}"
+        self._sock: socket.socket | None = None
+        if not wakeup_supported():
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            sock.bind(str(self.path))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            return
+        self._sock = sock
+
+    @property
+    def active(self) -> bool:
+        return self._sock is not None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a wakeup arrives or ``timeout`` elapses; True if woken."""
+        if self._sock is None:
+            time.sleep(timeout)
+            return False
+        ready, _, _ = select.select([self._sock], [], [], max(0.0, timeout))
+        if not ready:
+            return False
+        self._drain()
+        return True
+
+    async def wait_async(self, timeout: float) -> bool:
+        if self._sock is None:
+            await asyncio.sleep(timeout)
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.sock_recv(self._sock, 64), max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return False
+        self._drain()
+        return True
+
+    def wake(self) -> None:
+        """Cut a ``wait`` in progress short, e.g. from a shutdown signal handler."""
+        if self._sock is None:
+            return
+        try:
+            self._sock.sendto(b"\x00", str(self.path))
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+    def _drain(self) -> None:
+        # Several enqueues before the worker woke collapse into one wakeup.
+        metrics.inc("worker_wakeups")
+        while True:
+            try:
+                self._sock.recv(64)
+            except OSError:
+                return
+
+
+def notify_workers(directory: str | Path | None = None) -> int:
+    """Wake every listening worker; returns how many sockets were signalled.
+
+    Never raises: a lost wakeup only costs the fallback poll interval.
+    """
+    if not wakeup_supported():
+        return 0
+    target = Path(directory) if directory is not None else wakeup_dir()
+    try:
+        paths = list(target.glob(f"*{SOCKET_SUFFIX}"))
+    except OSError:
+        return 0
+    if not paths:
+        return 0
+    signalled = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for path in paths:
+            try:
+                sock.sendto(b"\x01", str(path))
+            except BlockingIOError:
+                # receive buffer full: that worker already has wakeups pending
+                pass
+            except (ConnectionRefusedError, FileNotFoundError):
+                # left behind by a worker that died without closing its listener
+                path.unlink(missing_ok=True)
+                continue
+            except OSError:
+                continue
+            signalled += 1
+    return signalled
@@ -0,0 +1,10 @@
+-- Cross-process run signals (cancellation) for worker/hybrid execution
+CREATE TABLE IF NOT EXISTS run_signals (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  run_id TEXT NOT NULL,
+  signal TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY(run_id) REFERENCES runs(id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_run_signals_run_id ON run_signals(run_id);
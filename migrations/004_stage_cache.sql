@@ -0,0 +1,18 @@
+-- Stage output cache index (payloads live under <storage_root>/cache)
+ALTER TABLE documents ADD COLUMN content_hash TEXT NULL;
+CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents(content_hash);
+
+CREATE TABLE IF NOT EXISTS stage_cache_entries (
+  cache_key TEXT PRIMARY KEY,
+  stage_name TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  versions_hash TEXT NOT NULL,
+  storage_path TEXT NOT NULL,
+  size_bytes INTEGER NOT NULL,
+  hit_count INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL,
+  last_accessed_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_stage_cache_entries_content_hash ON stage_cache_entries(content_hash);
+CREATE INDEX IF NOT EXISTS ix_stage_cache_entries_last_accessed_at ON stage_cache_entries(last_accessed_at);
@@ -0,0 +1,3 @@
+-- Heartbeat timestamp used to detect RUNNING runs orphaned by a dead worker
+ALTER TABLE runs ADD COLUMN heartbeat_at TEXT NULL;
+CREATE INDEX IF NOT EXISTS ix_runs_heartbeat_at ON runs(heartbeat_at);
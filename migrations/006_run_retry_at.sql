@@ -0,0 +1,2 @@
+-- Due time of a run parked on the delayed retry queue (NULL when not waiting)
+ALTER TABLE runs ADD COLUMN retry_at TEXT NULL;
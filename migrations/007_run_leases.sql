@@ -0,0 +1,4 @@
+-- Lease on a claimed run: owner plus expiry, refreshed by heartbeats
+ALTER TABLE runs ADD COLUMN lease_owner TEXT NULL;
+ALTER TABLE runs ADD COLUMN lease_expires_at TEXT NULL;
+CREATE INDEX IF NOT EXISTS ix_runs_lease_expires_at ON runs(lease_expires_at);
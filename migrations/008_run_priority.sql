@@ -0,0 +1,3 @@
+-- Priority lane of a run: interactive, standard or bulk
+ALTER TABLE runs ADD COLUMN priority TEXT NOT NULL DEFAULT 'standard';
+CREATE INDEX IF NOT EXISTS ix_runs_priority ON runs(priority);
@@ -0,0 +1,3 @@
+-- Stage a queued run waits for when handed off between stage workers (NULL: first stage)
+ALTER TABLE runs ADD COLUMN next_stage TEXT;
+CREATE INDEX IF NOT EXISTS ix_runs_next_stage ON runs(next_stage);
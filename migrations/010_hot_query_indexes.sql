@@ -0,0 +1,5 @@
+-- Composite indexes for the queue scans, status counts, stage upserts and quarantine listings
+CREATE INDEX IF NOT EXISTS ix_runs_status_created_at ON runs(status, created_at);
+CREATE INDEX IF NOT EXISTS ix_runs_status_tenant_priority ON runs(status, tenant_id, priority);
+CREATE INDEX IF NOT EXISTS ix_run_stages_run_stage_attempt ON run_stages(run_id, stage_name, attempt);
+CREATE INDEX IF NOT EXISTS ix_quarantine_items_tenant_status_created_at ON quarantine_items(tenant_id, status, created_at);
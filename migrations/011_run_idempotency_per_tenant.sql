@@ -0,0 +1,4 @@
+-- Idempotency keys unique per tenant; enqueue inserts with ON CONFLICT (tenant_id, idempotency_key)
+-- The global UNIQUE on runs.idempotency_key from 001 is inline, so dropping it on SQLite
+-- takes a table rebuild; alembic revision 20261017_0011 does that.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_runs_tenant_idempotency_key ON runs(tenant_id, idempotency_key);
@@ -0,0 +1,4 @@
+-- Run payload columns (result, decision log, validation issues, review reason codes) as native JSON.
+-- SQLite stores JSON as TEXT, so the json.dumps values written so far read back unchanged: nothing to do.
+-- On Postgres alembic revision 20261017_0012 converts them to JSONB:
+--   ALTER TABLE runs ALTER COLUMN result_json TYPE JSONB USING result_json::jsonb;  (and the other three)
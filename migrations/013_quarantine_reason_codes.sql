@@ -0,0 +1,18 @@
+-- Quarantine reason codes as an indexed child table; listing, counts and /v1/quarantine/stats filter on it
+CREATE TABLE IF NOT EXISTS quarantine_reason_codes (
+  quarantine_item_id TEXT NOT NULL,
+  reason_code TEXT NOT NULL,
+  tenant_id TEXT NOT NULL,
+  status TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  PRIMARY KEY(quarantine_item_id, reason_code),
+  FOREIGN KEY(quarantine_item_id) REFERENCES quarantine_items(id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_quarantine_reason_codes_tenant_code_status_created_at
+  ON quarantine_reason_codes(tenant_id, reason_code, status, created_at);
+
+-- Backfill from the JSON list kept on each item
+INSERT OR IGNORE INTO quarantine_reason_codes (quarantine_item_id, reason_code, tenant_id, status, created_at)
+SELECT q.id, codes.value, q.tenant_id, q.status, q.created_at
+FROM quarantine_items q, json_each(q.reason_codes_json) codes;
@@ -0,0 +1,2 @@
+-- First time a run went RUNNING; the run timeout counts from it across retries, hand-offs and requeues
+ALTER TABLE runs ADD COLUMN started_at TEXT NULL;
@@ -0,0 +1,4 @@
+-- Claim indexes for the lane-ordered dequeue, unscoped and per tenant; the tenant one supersedes ix_runs_status_tenant_priority
+CREATE INDEX IF NOT EXISTS ix_runs_claim ON runs(status, priority, created_at, retry_at, lease_expires_at);
+CREATE INDEX IF NOT EXISTS ix_runs_claim_tenant ON runs(status, tenant_id, priority, created_at, retry_at, lease_expires_at);
+DROP INDEX IF EXISTS ix_runs_status_tenant_priority;
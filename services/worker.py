@@ -1,62 +1,528 @@
 """InvoiceMind queue worker.
 
 This worker polls queued runs from DB and executes them through the same stage
-orchestrator used by API background tasks.
+orchestrator used by API background tasks. With ``--pipeline`` the runs flow
+through per-stage queues so different runs occupy different stages at once;
+with ``--async`` each run is a coroutine on one event loop, so a single process
+can keep up to ``INVOICEMIND_ASYNC_MAX_INFLIGHT`` runs in flight. With
+``--concurrency N`` the parent keeps claiming runs and hands each one to a pool
+of N child processes, so CPU-bound stages use N cores. With ``--stages`` the
+worker only executes the listed stages and requeues each run for the next
+worker class at the first stage it does not own (e.g. ``--stages OCR`` on
+OCR-sized nodes and ``--stages EXTRACT,VALIDATE,PERSIST,EXPORT`` elsewhere).
+With ``--supervise`` the process runs no stages itself: it keeps between
+``--min-workers`` and ``--max-workers`` worker processes (started with the
+remaining flags) and scales them on queue depth, queue age and recent stage
+latency.
+
+Every mode recycles its worker processes at ``INVOICEMIND_WORKER_MAX_RSS_MB``
+resident memory or after ``INVOICEMIND_WORKER_MAX_RUNS`` runs: it stops
+claiming, finishes the runs it holds, releases the leases of runs it has
+not started and exec's a fresh process (``--concurrency`` replaces its
+children instead).
+
+SIGTERM (or Ctrl-C) drains the worker: it stops claiming, hands back the
+leases of runs it has not started, and gives the runs in flight
+``INVOICEMIND_SHUTDOWN_GRACE_SECONDS`` to finish; any still running then are
+requeued at their current stage and resume there on another worker. A second
+signal stops the process at once.
+
+Idle loops block on a local wakeup socket that the API signals on every
+enqueue, so a new run starts within milliseconds; polling every
+``INVOICEMIND_WORKER_WAKEUP_FALLBACK_SECONDS`` only covers missed wakeups.
+
+The claiming loops are ``run_forever`` (the default: one batch at a time, in
+process), ``run_pipelined`` (``--pipeline``), ``run_concurrent``
+(``--concurrency``) and ``_run_async_loop`` (``--async``); the last three claim
+only as many runs as they have free slots. Each of them also requeues runs
+orphaned by a dead worker (stale heartbeat), which the next pickup resumes from
+their last stage checkpoint, and prunes cancel signals older than
+``INVOICEMIND_RUN_SIGNAL_RETENTION_SECONDS``. ``supervise`` (``--supervise``)
+claims nothing itself and leaves all of this to its worker processes.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
 import socket
+import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.config import settings
+from app.autoscaler import Autoscaler
+from app.cancellation import cancellations
+from app.config import PIPELINE_STAGES, PRIORITY_CLASSES, settings
 from app.database import SessionLocal
+from app.fair_share import fair_share
+from app.heartbeat import orphan_reaper
 from app.metrics import metrics
-from app.orchestrator import process_run
-from app.repositories import count_runs_by_status, list_queued_runs
+from app.orchestrator import process_run, process_run_async
+from app.pipeline import StagePipeline
+from app.queue_gauge import queue_gauge
+from app.recycling import WorkerRecycler, current_rss_bytes
+from app.repositories import claim_queued_runs, release_run_lease
+from app.shutdown import shutdown
+from app.wakeup import WakeupListener
 
 
 def _default_worker_id() -> str:
-    return f"worker:{socket.gethostname()}"
+    # The pid keeps two workers on one host from sharing run leases.
+    return f"worker:{socket.gethostname()}:{os.getpid()}"
 
 
-def drain_once(*, max_runs: int | None = None, worker_id: str | None = None) -> int:
-    limit = max_runs if max_runs is not None else max(1, settings.worker_batch_size)
-    wid = worker_id or _default_worker_id()
+def _stage_set(names) -> tuple[str, ...] | None:
+    """Normalise a ``--stages`` list into pipeline order; None means every stage."""
+    stages = {name.strip().upper() for name in names if name.strip()}
+    if not stages:
+        return None
+    unknown = stages - set(PIPELINE_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    if "OCR" in stages:
+        # PREPROCESS only stages the upload for OCR; it runs wherever OCR does.
+        stages.add("PREPROCESS")
+    return tuple(stage for stage in PIPELINE_STAGES if stage in stages)
+
 
+def _claim_run_ids(
+    limit: int,
+    owner: str,
+    *,
+    reserved: int = 0,
+    stages: tuple[str, ...] | None = None,
+) -> list[str]:
+    """Claim up to ``limit`` runs, interactive lane first.
+
+    Standard and bulk runs may take at most ``limit - reserved`` of the slots,
+    so the last ``reserved`` free slots stay available to interactive runs.
+    """
     db = SessionLocal()
     try:
-        queued = list_queued_runs(db, limit=limit)
-        run_ids = [r.id for r in queued]
-        metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
+        run_ids = _claim_lanes(db, owner, limit, PRIORITY_CLASSES[:1], stages)
+        other = min(limit - len(run_ids), limit - reserved)
+        if other > 0:
+            run_ids += _claim_lanes(db, owner, other, PRIORITY_CLASSES[1:], stages)
     finally:
         db.close()
+    metrics.set_queue_depth(queue_gauge.depth())
+    return run_ids
+
 
+def _claim_lanes(
+    db,
+    owner: str,
+    limit: int,
+    priorities: tuple[str, ...],
+    stages: tuple[str, ...] | None = None,
+) -> list[str]:
+    claim = fair_share.claim if settings.fair_share_enabled else claim_queued_runs
+    return claim(
+        db,
+        owner=owner,
+        lease_seconds=settings.run_orphan_after_seconds,
+        limit=limit,
+        priorities=priorities,
+        stages=stages,
+    )
+
+
+def drain_once(
+    *,
+    max_runs: int | None = None,
+    worker_id: str | None = None,
+    stages: tuple[str, ...] | None = None,
+    recycler: WorkerRecycler | None = None,
+) -> int:
+    limit = max_runs if max_runs is not None else max(1, settings.worker_batch_size)
+    wid = worker_id or _default_worker_id()
+
+    run_ids = _claim_run_ids(limit, wid, reserved=min(settings.interactive_reserved_slots, limit - 1), stages=stages)
+    processed = 0
     for run_id in run_ids:
-        process_run(run_id, wid)
+        if shutdown.requested:
+            _release_leases(run_ids[processed:], wid)
+            break
+        process_run(run_id, wid, stages=stages)
+        processed += 1
+        if recycler is not None and recycler.note_run():
+            # Hand the rest of the batch back rather than carry it into the recycle.
+            _release_leases(run_ids[processed:], wid)
+            break
+
+    metrics.set_queue_depth(queue_gauge.depth())
+    return processed
 
+
+def _release_leases(run_ids: list[str], owner: str) -> None:
+    if not run_ids:
+        return
     db = SessionLocal()
     try:
-        metrics.set_queue_depth(count_runs_by_status(db, "QUEUED"))
+        for run_id in run_ids:
+            release_run_lease(db, run_id, owner=owner)
     finally:
         db.close()
 
-    return len(run_ids)
 
+def _listen() -> WakeupListener:
+    listener = WakeupListener()
+    # A shutdown signal must not wait out an idle poll interval.
+    shutdown.on_request(listener.wake)
+    return listener
+
+
+def _keep_claiming(recycler: WorkerRecycler | None) -> bool:
+    return not shutdown.requested and (recycler is None or not recycler.due)
+
+
+def _record_recycle(recycler: WorkerRecycler | None, worker_id: str) -> None:
+    if recycler is not None and recycler.due:
+        recycler.record(worker_id)
+
+
+def _idle_seconds(poll_seconds: float | None, listener: WakeupListener) -> float:
+    if poll_seconds is not None:
+        return poll_seconds
+    if listener.active:
+        return settings.worker_wakeup_fallback_seconds
+    return max(0.1, settings.worker_poll_seconds)
+
+
+def _housekeeping() -> None:
+    # Both are rate-limited internally, so every loop turn may call this.
+    orphan_reaper.maybe_reap()
+    cancellations.maybe_prune()
+
+
+def run_forever(
+    *,
+    poll_seconds: float | None = None,
+    max_runs_per_cycle: int | None = None,
+    stages: tuple[str, ...] | None = None,
+    recycler: WorkerRecycler | None = None,
+) -> None:
+    """Claim and execute runs in this process; returns once ``recycler`` is due or on shutdown."""
+    listener = _listen()
+    interval = _idle_seconds(poll_seconds, listener)
+    wid = _default_worker_id()
+    try:
+        while _keep_claiming(recycler):
+            _housekeeping()
+            processed = drain_once(max_runs=max_runs_per_cycle, worker_id=wid, stages=stages, recycler=recycler)
+            if processed == 0:
+                listener.wait(interval)
+    finally:
+        listener.close()
+    _record_recycle(recycler, wid)
+
+
+def run_pipelined(
+    *,
+    poll_seconds: float | None = None,
+    max_runs_per_cycle: int | None = None,
+    recycler: WorkerRecycler | None = None,
+) -> None:
+    listener = _listen()
+    interval = _idle_seconds(poll_seconds, listener)
+    limit = max_runs_per_cycle if max_runs_per_cycle is not None else max(1, settings.worker_batch_size)
+    reserved = min(settings.interactive_reserved_slots, limit - 1)
+    wid = _default_worker_id()
+    # Count runs as they finish: a claimed run that loses start_run or is handed back never ran.
+    pipeline = StagePipeline(worker_id=wid, on_finish=recycler.note_run if recycler is not None else None).start()
+    try:
+        while _keep_claiming(recycler):
+            _housekeeping()
+            free = pipeline.free_slots
+            metrics.set_gauge("worker_inflight", pipeline.inflight)
+            if free <= 0:
+                # A full pipeline: wait for the first stage to take a run, not for new work.
+                pipeline.wait_for_slot(interval)
+                continue
+            # Claim no more than can enter the pipeline now, so no lease ages waiting for room.
+            run_ids = _claim_run_ids(min(limit, free), wid, reserved=reserved)
+            for idx, run_id in enumerate(run_ids):
+                if not pipeline.submit(run_id) and pipeline.free_slots <= 0:
+                    # A retry took the last place; the rest go back to the queue.
+                    _release_leases(run_ids[idx:], wid)
+                    break
+            if not run_ids:
+                listener.wait(interval)
+    finally:
+        listener.close()
+        pipeline.stop(timeout=shutdown.drain_timeout() if shutdown.requested else settings.run_timeout_seconds)
+    _record_recycle(recycler, wid)
+
+
+def run_concurrent(
+    *,
+    concurrency: int | None = None,
+    poll_seconds: float | None = None,
+    stages: tuple[str, ...] | None = None,
+) -> None:
+    """Claim runs in this process and execute them on ``concurrency`` child processes.
+
+    A child is replaced by the executor after ``INVOICEMIND_WORKER_MAX_RUNS``
+    runs. A child reporting RSS over ``INVOICEMIND_WORKER_MAX_RSS_MB`` can't be
+    replaced on its own, so the parent stops claiming, lets the pool finish
+    its runs and starts a fresh pool. On shutdown the children are told to
+    drain through a shared event (they ignore the signal itself, which
+    reaches the whole process group from a terminal or a service manager).
+    """
+    listener = _listen()
+    interval = _idle_seconds(poll_seconds, listener)
+    size = max(1, concurrency if concurrency is not None else settings.worker_concurrency)
+    reserved = min(settings.interactive_reserved_slots, size - 1)
+    wid = _default_worker_id()
+    max_runs = WorkerRecycler().max_runs
+    stop_event = multiprocessing.get_context("spawn").Event()
+    pool = _new_process_pool(size, max_runs, stop_event)
+    inflight: dict[Future, str] = {}
+    children: dict[int, WorkerRecycler] = {}
+    draining = False
+    try:
+        while True:
+            if shutdown.requested:
+                stop_event.set()
+                wait_futures(inflight, timeout=shutdown.drain_timeout())
+                break
+            _housekeeping()
+            free = 0 if draining else size - len(inflight)
+            run_ids = _claim_run_ids(free, wid, reserved=reserved, stages=stages) if free > 0 else []
+            for run_id in run_ids:
+                inflight[pool.submit(_process_run_in_child, run_id, wid, stages)] = run_id
+            metrics.set_gauge("worker_inflight", len(inflight))
+            if len(inflight) >= size or (draining and inflight):
+                wait_futures(inflight, timeout=interval, return_when=FIRST_COMPLETED)
+            elif not run_ids and not draining:
+                # Free slots and an empty queue: wait for new work, not for children.
+                listener.wait(interval)
+            broken = False
+            for future in [f for f in inflight if f.done()]:
+                inflight.pop(future, None)
+                try:
+                    pid, rss = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    continue
+                except Exception:  # noqa: BLE001
+                    # process_run records its own failures; anything escaping it
+                    # leaves the run to the orphan reaper.
+                    continue
+                child = children.setdefault(pid, WorkerRecycler())
+                if draining or not child.note_run(rss_bytes=rss if rss is not None else 0):
+                    continue
+                child.record(f"{wid}/{pid}")
+                # The executor retires a child at its run limit by itself.
+                children.pop(pid, None)
+                draining = child.reason == "rss"
+            if draining and not inflight:
+                pool.shutdown(wait=True)
+                pool = _new_process_pool(size, max_runs, stop_event)
+                children.clear()
+                draining = False
+            if broken:
+                # A child died mid-run. Its runs stay RUNNING until their
+                # lease expires and the reaper requeues them.
+                metrics.inc("worker_children_lost")
+                pool.shutdown(wait=False, cancel_futures=True)
+                inflight.clear()
+                pool = _new_process_pool(size, max_runs, stop_event)
+                children.clear()
+                draining = False
+    finally:
+        listener.close()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _new_process_pool(size: int, max_runs: int = 0, stop_event=None) -> ProcessPoolExecutor:
+    # spawn, not fork: the parent already runs the reaper and metrics threads
+    # and holds pooled DB connections, none of which may leak into a child.
+    return ProcessPoolExecutor(
+        max_workers=size,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=max_runs if max_runs > 0 else None,
+        initializer=_init_child if stop_event is not None else None,
+        initargs=(stop_event,) if stop_event is not None else (),
+    )
+
+
+def _init_child(stop_event) -> None:
+    # The parent decides when to drain and says so through ``stop_event``.
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_IGN)
+
+    def _watch() -> None:
+        stop_event.wait()
+        shutdown.request()
+
+    threading.Thread(target=_watch, name="im-shutdown-watch", daemon=True).start()
+
+
+def _process_run_in_child(
+    run_id: str,
+    worker_id: str,
+    stages: tuple[str, ...] | None = None,
+) -> tuple[int, int | None]:
+    # Each child imports the app afresh, so it owns its engine, connection pool,
+    # heartbeat thread and stage pools. The parent holds the lease it claimed.
+    process_run(run_id, f"{worker_id}/{os.getpid()}", lease_owner=worker_id, stages=stages)
+    # The parent tracks each child's runs and memory to decide on recycling.
+    return os.getpid(), current_rss_bytes()
+
+
+def supervise(
+    *,
+    worker_args: list[str] | None = None,
+    stages: tuple[str, ...] | None = None,
+    min_workers: int | None = None,
+    max_workers: int | None = None,
+) -> None:
+    """Run and scale worker processes started as ``worker.py <worker_args>``."""
+    scaler = Autoscaler(min_workers=min_workers, max_workers=max_workers, stages=stages)
+    args = list(worker_args or [])
+    # SIGTERM unwinds through the finally below so the workers are stopped too.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    children: list[subprocess.Popen] = []
+    retiring: list[subprocess.Popen] = []
+    target = 0
+    try:
+        while True:
+            alive = [child for child in children if child.poll() is None]
+            if len(alive) < len(children):
+                # Replaced below; their runs come back through the orphan reaper.
+                metrics.inc("worker_children_lost", len(children) - len(alive))
+            children = alive
+            retiring = [child for child in retiring if child.poll() is None]
+            decision = None
+            try:
+                db = SessionLocal()
+                try:
+                    signals = scaler.collect(db)
+                finally:
+                    db.close()
+                decision = scaler.decide(signals, target)
+            except Exception:  # noqa: BLE001
+                # Without fresh signals, hold the current size within the bounds.
+                target = min(max(target, scaler.min_workers), scaler.max_workers)
+            if decision is not None:
+                scaler.record(decision, signals)
+                target = decision.target
+            while len(children) < target:
+                children.append(_spawn_worker(args))
+            while len(children) > target:
+                child = children.pop()
+                child.terminate()
+                retiring.append(child)
+            metrics.set_gauge("autoscaler_workers", len(children))
+            time.sleep(settings.autoscale_interval_seconds)
+    finally:
+        for child in children + retiring:
+            child.terminate()
+        # Each worker drains on SIGTERM: its runs finish or requeue within the drain timeout.
+        for child in children + retiring:
+            try:
+                child.wait(timeout=shutdown.drain_timeout())
+            except subprocess.TimeoutExpired:
+                child.kill()
 
-def run_forever(*, poll_seconds: float | None = None, max_runs_per_cycle: int | None = None) -> None:
-    interval = poll_seconds if poll_seconds is not None else max(0.1, settings.worker_poll_seconds)
-    while True:
-        processed = drain_once(max_runs=max_runs_per_cycle)
-        if processed == 0:
-            time.sleep(interval)
+
+def _spawn_worker(args: list[str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, str(Path(__file__).resolve()), *args], cwd=str(ROOT))
+
+
+def _supervised_worker_args(args: argparse.Namespace) -> list[str]:
+    """The flags a supervised worker is started with: everything but the supervisor's own."""
+    forwarded: list[str] = []
+    for flag, value in (
+        ("--max-runs", args.max_runs),
+        ("--poll-seconds", args.poll_seconds),
+        ("--concurrency", args.concurrency),
+        ("--max-inflight", args.max_inflight),
+        ("--stages", args.stages),
+    ):
+        if value is not None:
+            forwarded += [flag, str(value)]
+    if args.pipeline:
+        forwarded.append("--pipeline")
+    if args.use_async:
+        forwarded.append("--async")
+    return forwarded
+
+
+def run_async(
+    *,
+    poll_seconds: float | None = None,
+    max_runs_per_cycle: int | None = None,
+    max_inflight: int | None = None,
+    recycler: WorkerRecycler | None = None,
+) -> None:
+    asyncio.run(
+        _run_async_loop(
+            poll_seconds=poll_seconds,
+            max_runs_per_cycle=max_runs_per_cycle,
+            max_inflight=max_inflight,
+            recycler=recycler,
+        )
+    )
+
+
+async def _run_async_loop(
+    *,
+    poll_seconds: float | None = None,
+    max_runs_per_cycle: int | None = None,
+    max_inflight: int | None = None,
+    recycler: WorkerRecycler | None = None,
+) -> None:
+    listener = _listen()
+    interval = _idle_seconds(poll_seconds, listener)
+    limit = max_runs_per_cycle if max_runs_per_cycle is not None else max(1, settings.worker_batch_size)
+    capacity = max_inflight if max_inflight is not None else settings.async_max_inflight
+    reserved = min(settings.interactive_reserved_slots, capacity - 1)
+    wid = _default_worker_id()
+    tasks: set[asyncio.Task] = set()
+
+    def _done(task: asyncio.Task) -> None:
+        tasks.discard(task)
+        # Only runs that started count towards the recycle limit, once they end.
+        if recycler is not None and not task.cancelled() and task.exception() is None and task.result():
+            recycler.note_run()
+
+    try:
+        while _keep_claiming(recycler):
+            await asyncio.to_thread(_housekeeping)
+            free = capacity - len(tasks)
+            if free <= 0:
+                await asyncio.wait(tasks, timeout=interval, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            # Claim no more than can start now, so no lease ages while waiting for a slot.
+            batch = min(limit, free)
+            # Hold back whatever part of the reserved slots this batch would eat into.
+            held_back = max(0, reserved - (free - batch))
+            run_ids = await asyncio.to_thread(_claim_run_ids, batch, wid, reserved=held_back)
+            for run_id in run_ids:
+                task = asyncio.create_task(process_run_async(run_id, wid))
+                tasks.add(task)
+                task.add_done_callback(_done)
+            if not run_ids:
+                await listener.wait_async(interval)
+        if tasks:
+            await asyncio.wait(tasks)
+    finally:
+        listener.close()
+    _record_recycle(recycler, wid)
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -64,16 +530,66 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--once", action="store_true", help="Process a single poll cycle and exit")
     parser.add_argument("--max-runs", type=int, default=None, help="Maximum runs to process per cycle")
     parser.add_argument("--poll-seconds", type=float, default=None, help="Poll interval in seconds")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap stages of different runs via per-stage queues")
+    parser.add_argument("--concurrency", type=int, default=None, help="Execute runs on N child processes")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run each claimed run as a coroutine on one event loop")
+    parser.add_argument("--max-inflight", type=int, default=None, help="Maximum concurrent runs in --async mode")
+    parser.add_argument("--stages", default=None, help="Comma-separated stages this worker executes, e.g. OCR")
+    parser.add_argument("--supervise", action="store_true", help="Run and autoscale worker processes instead of working")
+    parser.add_argument("--min-workers", type=int, default=None, help="Fewest worker processes in --supervise mode")
+    parser.add_argument("--max-workers", type=int, default=None, help="Most worker processes in --supervise mode")
     return parser
 
 
 def main() -> None:
-    args = _build_arg_parser().parse_args()
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+    try:
+        stages = _stage_set(args.stages.split(",") if args.stages is not None else settings.worker_stages)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if stages is not None and (args.use_async or args.pipeline):
+        parser.error("--stages cannot be combined with --async or --pipeline")
+    concurrency = args.concurrency if args.concurrency is not None else settings.worker_concurrency
+    if concurrency > 1 and (args.use_async or args.pipeline):
+        parser.error("--concurrency (or INVOICEMIND_WORKER_CONCURRENCY) above 1 cannot be combined with --async or --pipeline")
+    if args.supervise:
+        supervise(
+            worker_args=_supervised_worker_args(args),
+            stages=stages,
+            min_workers=args.min_workers,
+            max_workers=args.max_workers,
+        )
+        return
+    shutdown.install_signal_handlers()
     if args.once:
-        processed = drain_once(max_runs=args.max_runs)
+        processed = drain_once(max_runs=args.max_runs, stages=stages)
         print(f"Processed runs: {processed}")
         return
-    run_forever(poll_seconds=args.poll_seconds, max_runs_per_cycle=args.max_runs)
+    if concurrency > 1:
+        run_concurrent(concurrency=concurrency, poll_seconds=args.poll_seconds, stages=stages)
+        return
+    recycler = WorkerRecycler()
+    if args.use_async:
+        run_async(
+            poll_seconds=args.poll_seconds,
+            max_runs_per_cycle=args.max_runs,
+            max_inflight=args.max_inflight,
+            recycler=recycler,
+        )
+    elif args.pipeline:
+        run_pipelined(poll_seconds=args.poll_seconds, max_runs_per_cycle=args.max_runs, recycler=recycler)
+    else:
+        run_forever(poll_seconds=args.poll_seconds, max_runs_per_cycle=args.max_runs, stages=stages, recycler=recycler)
+    if recycler.due and not shutdown.requested:
+        _exec_fresh_worker()
+
+
+def _exec_fresh_worker() -> None:
+    # Same interpreter, same flags; the new image starts with a clean heap.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable, *sys.argv])
 
 
 if __name__ == "__main__":
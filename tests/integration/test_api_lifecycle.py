@@ -19,6 +19,7 @@ from fastapi.testclient import TestClient
 
 from app.main import create_app
 from app.config import settings
+from app.metrics import metrics
 import app.orchestrator as orchestrator
 
 
@@ -73,8 +74,23 @@ def test_full_run_lifecycle():
         time.sleep(0.2)
     assert state in {"SUCCESS", "WARN", "NEEDS_REVIEW"}
 
+    projected = client.get(f"/v1/runs/{run_id}?fields=status,review_decision", headers=headers)
+    assert projected.status_code == 200
+    assert projected.json() == {"run_id": run_id, "status": state, "review_decision": g.json()["review_decision"]}
+    assert isinstance(g.json()["decision_log"], dict)
+    assert client.get(f"/v1/runs/{run_id}?fields=status,ocr_text", headers=headers).status_code == 400
+
+    hits_before = metrics.snapshot()["stage_cache_hit"]
     replay = client.post(f"/v1/runs/{run_id}/replay", headers=headers)
     assert replay.status_code == 200
+    replay_id = replay.json()["run_id"]
+    deadline = time.time() + 8
+    while time.time() < deadline:
+        if client.get(f"/v1/runs/{replay_id}", headers=headers).json()["status"] not in {"QUEUED", "RUNNING"}:
+            break
+        time.sleep(0.2)
+    # unchanged bytes and versions: OCR and EXTRACT are served from the stage cache
+    assert metrics.snapshot()["stage_cache_hit"] >= hits_before + 2
 
 
 def test_cancel_flow():
@@ -148,6 +164,85 @@ def test_backpressure_rejects_when_queue_is_full():
         object.__setattr__(settings, "queue_warn_depth", old_warn)
 
 
+def test_interactive_lane_has_its_own_backpressure():
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    old_lanes = settings.lane_queue_depths
+
+    object.__setattr__(settings, "execution_mode", "worker")
+    object.__setattr__(settings, "lane_queue_depths", (("interactive", 0, 1),))
+
+    try:
+        doc_ids = []
+        for idx in range(2):
+            up = client.post(
+                "/v1/documents",
+                content=valid_png_payload(),
+                headers={
+                    **headers,
+                    "Content-Type": "application/octet-stream",
+                    "X-Filename": f"lane_{idx}.png",
+                    "X-Content-Type": "image/png",
+                },
+            )
+            assert up.status_code == 200
+            doc_ids.append(up.json()["id"])
+
+        bad = client.post(f"/v1/documents/{doc_ids[0]}/runs", headers={**headers, "X-Priority": "urgent"})
+        assert bad.status_code == 400
+
+        r1 = client.post(f"/v1/documents/{doc_ids[0]}/runs", headers={**headers, "X-Priority": "interactive"})
+        assert r1.status_code == 200
+        assert client.get(f"/v1/runs/{r1.json()['run_id']}", headers=headers).json()["priority"] == "interactive"
+
+        # the interactive lane is full, the standard lane is not
+        r2 = client.post(f"/v1/documents/{doc_ids[1]}/runs", headers={**headers, "X-Priority": "interactive"})
+        assert r2.status_code == 429
+        r3 = client.post(f"/v1/documents/{doc_ids[1]}/runs", headers=headers)
+        assert r3.status_code == 200
+
+        for response in (r1, r3):
+            orchestrator.process_run(response.json()["run_id"], "test-lanes")
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+        object.__setattr__(settings, "lane_queue_depths", old_lanes)
+
+
+def test_run_hands_off_between_stage_workers():
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "worker")
+    try:
+        up = client.post(
+            "/v1/documents",
+            content=valid_png_payload(),
+            headers={
+                **headers,
+                "Content-Type": "application/octet-stream",
+                "X-Filename": "handoff.png",
+                "X-Content-Type": "image/png",
+            },
+        )
+        run_id = client.post(f"/v1/documents/{up.json()['id']}/runs", headers=headers).json()["run_id"]
+        handed_off, resumed = metrics.run_handed_off, metrics.run_resumed
+
+        orchestrator.process_run(run_id, "test-ocr-worker", stages=("PREPROCESS", "OCR"))
+        data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+        assert data["status"] == "QUEUED"
+        assert [s["stage_name"] for s in data["stages"] if s["status"] == "SUCCESS"] == ["PREPROCESS", "OCR"]
+
+        orchestrator.process_run(run_id, "test-extract-worker", stages=("EXTRACT", "VALIDATE", "PERSIST", "EXPORT"))
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+
+    data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+    assert data["status"] in {"SUCCESS", "WARN", "NEEDS_REVIEW"}
+    # each stage ran exactly once, on the worker class that owns it
+    assert sorted(s["stage_name"] for s in data["stages"]) == sorted(orchestrator.STAGES)
+    assert metrics.run_handed_off == handed_off + 1
+    assert metrics.run_resumed == resumed
+
+
 def test_retry_on_transient_ocr_failure():
     headers = auth_header()
     sample = valid_png_payload()
@@ -166,11 +261,11 @@ def test_retry_on_transient_ocr_failure():
     original_run_ocr = orchestrator.run_ocr
     state = {"attempt": 0}
 
-    def flaky_run_ocr(file_path: str, filename: str | None = None):
+    def flaky_run_ocr(file_path: str, filename: str | None = None, **kwargs):
         if state["attempt"] == 0:
             state["attempt"] += 1
             raise orchestrator.StageExecutionError("OCR_TIMEOUT", retryable=True, detail="simulated transient timeout")
-        return original_run_ocr(file_path, filename)
+        return original_run_ocr(file_path, filename, **kwargs)
 
     orchestrator.run_ocr = flaky_run_ocr
     try:
@@ -193,3 +288,193 @@ def test_retry_on_transient_ocr_failure():
         assert len(ocr_attempts) >= 2
     finally:
         orchestrator.run_ocr = original_run_ocr
+
+
+def test_pipeline_executes_queued_runs_end_to_end():
+    from app.pipeline import StagePipeline
+
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "worker")
+    run_ids: list[str] = []
+    try:
+        for idx in range(3):
+            up = client.post(
+                "/v1/documents",
+                content=valid_png_payload(),
+                headers={
+                    **headers,
+                    "Content-Type": "application/octet-stream",
+                    "X-Filename": f"pipe_{idx}.png",
+                    "X-Content-Type": "image/png",
+                },
+            )
+            assert up.status_code == 200
+            r = client.post(f"/v1/documents/{up.json()['id']}/runs", headers=headers)
+            assert r.status_code == 200
+            run_ids.append(r.json()["run_id"])
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+
+    pipe = StagePipeline(worker_id="test-pipeline").start()
+    try:
+        for run_id in run_ids:
+            assert pipe.submit(run_id)
+        assert pipe.drain(timeout=20)
+    finally:
+        pipe.stop(timeout=1)
+
+    for run_id in run_ids:
+        data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+        assert data["status"] in {"SUCCESS", "WARN", "NEEDS_REVIEW"}
+        assert {s["stage_name"] for s in data["stages"]} == set(orchestrator.STAGES)
+
+
+def test_async_orchestrator_executes_queued_runs_end_to_end():
+    import asyncio
+
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "worker")
+    run_ids: list[str] = []
+    try:
+        for idx in range(4):
+            up = client.post(
+                "/v1/documents",
+                content=valid_png_payload(),
+                headers={
+                    **headers,
+                    "Content-Type": "application/octet-stream",
+                    "X-Filename": f"async_{idx}.png",
+                    "X-Content-Type": "image/png",
+                },
+            )
+            assert up.status_code == 200
+            r = client.post(f"/v1/documents/{up.json()['id']}/runs", headers=headers)
+            assert r.status_code == 200
+            run_ids.append(r.json()["run_id"])
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+
+    async def _run_all() -> None:
+        await asyncio.gather(*(orchestrator.process_run_async(run_id, "test-async") for run_id in run_ids))
+
+    asyncio.run(_run_all())
+
+    for run_id in run_ids:
+        data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+        assert data["status"] in {"SUCCESS", "WARN", "NEEDS_REVIEW"}
+        assert {s["stage_name"] for s in data["stages"]} == set(orchestrator.STAGES)
+
+
+def test_cancel_interrupts_running_ocr():
+    import threading
+
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "worker")
+    try:
+        up = client.post(
+            "/v1/documents",
+            content=valid_png_payload(),
+            headers={
+                **headers,
+                "Content-Type": "application/octet-stream",
+                "X-Filename": "cancel_mid_ocr.png",
+                "X-Content-Type": "image/png",
+            },
+        )
+        run_id = client.post(f"/v1/documents/{up.json()['id']}/runs", headers=headers).json()["run_id"]
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+
+    original_run_ocr = orchestrator.run_ocr
+
+    def slow_run_ocr(file_path: str, filename: str | None = None, *, cancel_token=None, **kwargs):
+        for _ in range(250):
+            cancel_token.raise_if_cancelled()
+            time.sleep(0.02)
+        return original_run_ocr(file_path, filename, cancel_token=cancel_token, **kwargs)
+
+    orchestrator.run_ocr = slow_run_ocr
+    worker = threading.Thread(target=orchestrator.process_run, args=(run_id, "test-cancel"))
+    try:
+        worker.start()
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if client.get(f"/v1/runs/{run_id}", headers=headers).json()["status"] == "RUNNING":
+                break
+            time.sleep(0.02)
+        started = time.time()
+        assert client.post(f"/v1/runs/{run_id}/cancel", headers=headers).status_code == 200
+        worker.join(timeout=5)
+        assert time.time() - started < 2
+    finally:
+        orchestrator.run_ocr = original_run_ocr
+
+    data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+    assert data["status"] == "CANCELLED"
+    assert [s["status"] for s in data["stages"] if s["stage_name"] == "OCR"] == ["CANCELLED"]
+
+
+def test_orphaned_run_resumes_from_last_checkpoint(monkeypatch):
+    from datetime import timedelta
+
+    from app.database import SessionLocal
+    from app.heartbeat import OrphanReaper
+    from app.models import Run
+    from app.repositories import now_utc
+
+    class WorkerKilled(BaseException):
+        pass
+
+    headers = auth_header()
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "worker")
+    try:
+        up = client.post(
+            "/v1/documents",
+            content=valid_png_payload(),
+            headers={
+                **headers,
+                "Content-Type": "application/octet-stream",
+                "X-Filename": "resume_after_crash.png",
+                "X-Content-Type": "image/png",
+            },
+        )
+        run_id = client.post(f"/v1/documents/{up.json()['id']}/runs", headers=headers).json()["run_id"]
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+
+    def killed(context):
+        raise WorkerKilled()
+
+    monkeypatch.setattr(orchestrator, "_stage_validate", killed)
+    try:
+        orchestrator.process_run(run_id, "doomed-worker")
+    except WorkerKilled:
+        pass
+    monkeypatch.undo()
+    assert client.get(f"/v1/runs/{run_id}", headers=headers).json()["status"] == "RUNNING"
+
+    db = SessionLocal()
+    try:
+        run = db.get(Run, run_id)
+        run.heartbeat_at = run.lease_expires_at = now_utc() - timedelta(minutes=5)
+        db.commit()
+        assert OrphanReaper(stale_after_seconds=60).reap(db) == [run_id]
+    finally:
+        db.close()
+
+    def must_not_rerun(*args, **kwargs):
+        raise AssertionError("stage should have been restored from its checkpoint")
+
+    monkeypatch.setattr(orchestrator, "_stage_ocr", must_not_rerun)
+    monkeypatch.setattr(orchestrator, "_stage_extract", must_not_rerun)
+    resumed_before = metrics.snapshot()["run_resumed"]
+    orchestrator.process_run(run_id, "rescue-worker")
+
+    data = client.get(f"/v1/runs/{run_id}", headers=headers).json()
+    assert data["status"] in {"SUCCESS", "WARN", "NEEDS_REVIEW"}
+    assert {s["stage_name"] for s in data["stages"] if s["status"] == "SUCCESS"} == set(orchestrator.STAGES)
+    assert metrics.snapshot()["run_resumed"] == resumed_before + 1
@@ -57,6 +57,14 @@ def test_quarantine_lifecycle_for_invalid_mime():
     ids = {item["id"] for item in payload["items"]}
     assert quarantine_item_id in ids
 
+    by_code = client.get("/v1/quarantine?reason_code=UNSUPPORTED_MIME&limit=1", headers=headers).json()
+    assert by_code["items"][0]["id"] == quarantine_item_id and by_code["total"] >= 1
+    assert client.get("/v1/quarantine?cursor=not-a-cursor", headers=headers).status_code == 400
+
+    stats = client.get("/v1/quarantine/stats", headers=headers)
+    assert stats.status_code == 200
+    assert any(stat["reason_code"] == "UNSUPPORTED_MIME" and stat["count"] >= 1 for stat in stats.json()["stats"])
+
     item = client.get(f"/v1/quarantine/{quarantine_item_id}", headers=headers)
     assert item.status_code == 200
     assert "UNSUPPORTED_MIME" in item.json()["reason_codes"]
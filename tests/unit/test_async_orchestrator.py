@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.orchestrator as orchestrator
+from app.database import Base
+from app.orchestrator import RunToken, StageExecutionError, advance_run_async
+from app.retry import RetryPolicy
+from app.stage_journal import StageJournal
+
+
+def _token() -> RunToken:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    return RunToken(
+        run_id="async-run",
+        worker_id="test-async",
+        db=db,
+        journal=StageJournal(db, "async-run", checkpoints=()),
+        run_started=time.monotonic(),
+    )
+
+
+def test_retry_backoff_sleeps_on_the_loop_without_blocking_it(monkeypatch):
+    calls: list[float] = []
+
+    def flaky_stage(stage, run_id, doc, context):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise StageExecutionError("STORAGE_UNAVAILABLE", retryable=True)
+        return {"ok": True}
+
+    monkeypatch.setattr(orchestrator, "_execute_stage", flaky_stage)
+    monkeypatch.setattr(orchestrator, "save_checkpoint", lambda run_id, stage, context: "")
+    monkeypatch.setattr(orchestrator, "policy_for", lambda code: RetryPolicy(0.3, 0.3, 0.0, 3))
+    token = _token()
+
+    async def scenario() -> int:
+        ticks = 0
+        stage = asyncio.create_task(advance_run_async(token, "EXTRACT"))
+        while not stage.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await stage
+        return ticks
+
+    ticks = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.29
+    # the loop kept serving other coroutines throughout the backoff
+    assert ticks >= 15
+    assert token.attempts["EXTRACT"] == 2
+    statuses = [(item["status"], item["attempt"]) for item in token.journal._pending]
+    assert statuses == [("RUNNING", 1), ("FAILED", 1), ("RUNNING", 2), ("SUCCESS", 2)]
+
+
+def test_non_retryable_failure_propagates(monkeypatch):
+    def broken_stage(stage, run_id, doc, context):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(orchestrator, "_execute_stage", broken_stage)
+    token = _token()
+
+    with pytest.raises(StageExecutionError) as excinfo:
+        asyncio.run(advance_run_async(token, "EXTRACT"))
+    assert excinfo.value.error_code == "UNEXPECTED_RUNTIME_ERROR"
+    assert token.attempts["EXTRACT"] == 1
+
+
+class _SlowPollCancel:
+    """A cancel token whose shared-channel poll is a slow DB query."""
+
+    def __init__(self) -> None:
+        self.polls = 0
+
+    def is_cancelled(self) -> bool:
+        self.polls += 1
+        time.sleep(0.15)
+        return False
+
+
+def test_cancel_polls_and_journal_writes_stay_off_the_loop(monkeypatch):
+    monkeypatch.setattr(orchestrator, "_execute_stage", lambda stage, run_id, doc, context: time.sleep(0.6) or {"ok": True})
+    monkeypatch.setattr(orchestrator, "save_checkpoint", lambda run_id, stage, context: "")
+    token = _token()
+    token.cancel = _SlowPollCancel()
+
+    async def scenario() -> list[float]:
+        gaps, last = [], time.monotonic()
+        stage = asyncio.create_task(advance_run_async(token, "EXTRACT"))
+        while not stage.done():
+            await asyncio.sleep(0.01)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+        await stage
+        return gaps
+
+    gaps = asyncio.run(scenario())
+    assert token.cancel.polls >= 2
+    # no tick waited out a whole poll
+    assert max(gaps) < 0.1
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.autoscaler import Autoscaler, ScalingSignals
+from app.database import Base
+from app.models import Document, Run, RunStage
+from app.repositories import now_utc
+
+
+def _scaler(**overrides) -> Autoscaler:
+    options = dict(
+        min_workers=1,
+        max_workers=8,
+        queue_per_worker=10,
+        max_queue_age_seconds=60,
+        target_drain_seconds=100,
+        cooldown_seconds=30,
+    )
+    options.update(overrides)
+    return Autoscaler(**options)
+
+
+def test_spike_jumps_to_the_backlog_size_within_bounds():
+    scaler = _scaler()
+    assert scaler.decide(ScalingSignals(0, 0.0, 0.0), 0, now=0).target == 1
+
+    decision = scaler.decide(ScalingSignals(queued=55, oldest_queued_seconds=5, run_service_ms=100), 1, now=1)
+    assert (decision.target, decision.reason) == (6, "queue_depth")
+    assert _scaler(max_workers=4).decide(ScalingSignals(500, 5, 100), 1, now=1).target == 4
+
+
+def test_age_and_drain_time_add_one_worker_at_a_time():
+    assert _scaler().decide(ScalingSignals(3, 90, 100), 2, now=0).reason == "queue_age"
+    # 15 runs at 30s each take 225s on two workers; 5 workers get it under 100s
+    decision = _scaler().decide(ScalingSignals(15, 5, 30_000), 2, now=0)
+    assert (decision.target, decision.reason) == (5, "drain_time")
+
+
+def test_cooldown_and_hysteresis_prevent_flapping():
+    scaler = _scaler()
+    assert scaler.decide(ScalingSignals(40, 5, 100), 2, now=0).target == 4
+    # still busy but inside the cooldown
+    assert scaler.decide(ScalingSignals(80, 5, 100), 4, now=10) is None
+    # below the scale-up threshold but above half of it for one worker fewer
+    assert scaler.decide(ScalingSignals(20, 5, 100), 4, now=100) is None
+    decision = scaler.decide(ScalingSignals(10, 5, 100), 4, now=100)
+    assert (decision.target, decision.reason) == (3, "idle")
+    assert scaler.decide(ScalingSignals(0, 0, 0), 3, now=110) is None
+    assert scaler.decide(ScalingSignals(0, 0, 0), 1, now=200) is None
+
+
+def test_collect_reads_backlog_and_recent_stage_latency():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    now = now_utc()
+    done = Run(document_id=doc.id, status="SUCCESS")
+    db.add_all(
+        [
+            Run(document_id=doc.id, status="QUEUED", created_at=now - timedelta(seconds=40)),
+            Run(document_id=doc.id, status="QUEUED", created_at=now - timedelta(seconds=10), next_stage="EXTRACT"),
+            done,
+        ]
+    )
+    db.flush()
+    for stage, seconds in (("OCR", 2.0), ("OCR", 4.0), ("EXTRACT", 1.0)):
+        started = now - timedelta(seconds=30)
+        db.add(
+            RunStage(
+                run_id=done.id,
+                stage_name=stage,
+                status="SUCCESS",
+                started_at=started,
+                finished_at=started + timedelta(seconds=seconds),
+            )
+        )
+    db.commit()
+
+    signals = _scaler().collect(db)
+    assert signals.queued == 2
+    assert 39 <= signals.oldest_queued_seconds < 45
+    assert signals.run_service_ms == 4000.0
+
+    ocr_only = _scaler(stages=("PREPROCESS", "OCR")).collect(db)
+    assert (ocr_only.queued, ocr_only.run_service_ms) == (1, 3000.0)
@@ -0,0 +1,52 @@
+import threading
+
+from app import background
+from app.background import BackgroundRunExecutor
+from app.config import settings
+from app.metrics import metrics
+
+
+class _DummySession:
+    def close(self) -> None:
+        return
+
+
+def test_full_executor_overflows_to_the_queue_and_claims_it_when_a_slot_frees(monkeypatch):
+    release = threading.Event()
+    started: list[tuple[str, str | None]] = []
+    finished = threading.Event()
+    claims: list[int] = []
+
+    def fake_process(run_id, worker_id, lease_owner=None):
+        started.append((run_id, lease_owner))
+        if run_id == "run-1":
+            release.wait(5)
+        else:
+            finished.set()
+
+    def fake_claim(db, *, owner, lease_seconds, limit):
+        claims.append(limit)
+        return ["run-2"] if len(claims) == 1 else []
+
+    monkeypatch.setattr(background, "process_run", fake_process)
+    monkeypatch.setattr(background, "claim_queued_runs", fake_claim)
+    monkeypatch.setattr(background, "SessionLocal", lambda: _DummySession())
+    old_mode = settings.execution_mode
+    object.__setattr__(settings, "execution_mode", "background")
+    overflowed = metrics.snapshot()["background_runs_overflowed"]
+    executor = BackgroundRunExecutor(max_runs=1, worker_id="api-background:test")
+    try:
+        assert executor.submit("run-1")
+        # no slot: the run is left QUEUED rather than waiting in memory
+        assert not executor.submit("run-2")
+        snapshot = metrics.snapshot()
+        assert snapshot["background_runs_overflowed"] == overflowed + 1
+        assert snapshot["background_saturation"] == 1.0
+
+        release.set()
+        assert finished.wait(5)
+    finally:
+        object.__setattr__(settings, "execution_mode", old_mode)
+    # the overflowed run comes back through a claim, under the executor's lease
+    assert started == [("run-1", None), ("run-2", "api-background:test")]
+    assert claims[0] == 1
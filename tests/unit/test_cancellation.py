@@ -0,0 +1,96 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import cancellation
+from app import orchestrator
+from app.cancellation import CancellationRegistry, RunCancelled
+from app.database import Base
+from app.models import Document, Run, RunSignal
+from app.repositories import create_run_signal, now_utc, update_run_status
+
+
+def test_in_process_request_flips_registered_token():
+    registry = CancellationRegistry(shared=False)
+    token = registry.register("run-1")
+    assert not token.is_cancelled()
+    assert registry.request("run-1")
+    assert token.is_cancelled()
+    with pytest.raises(RunCancelled):
+        token.raise_if_cancelled()
+    registry.unregister("run-1")
+    assert not registry.request("run-1")
+
+
+def test_shared_channel_delivers_signals_written_after_registration(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    local_session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(cancellation, "SessionLocal", local_session)
+
+    db = local_session()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    old, current = Run(document_id=doc.id), Run(document_id=doc.id)
+    db.add_all([old, current])
+    db.commit()
+    create_run_signal(db, run_id=old.id, signal="CANCEL")
+
+    registry = CancellationRegistry(shared=True, poll_seconds=60)
+    token = registry.register(current.id)
+    create_run_signal(db, run_id=current.id, signal="CANCEL")
+
+    # rate limited: the first poll was not forced and the interval has not elapsed
+    registry._last_poll = time.monotonic()
+    assert not token.is_cancelled()
+    registry.poll_shared(force=True)
+    assert token.is_cancelled()
+    db.close()
+    engine.dispose()
+
+
+
+def test_signals_go_when_the_run_finishes_or_age_out(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    local_session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(cancellation, "SessionLocal", local_session)
+    db = local_session()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    finished, stale, live = Run(document_id=doc.id), Run(document_id=doc.id), Run(document_id=doc.id)
+    db.add_all([finished, stale, live])
+    db.commit()
+    create_run_signal(db, run_id=finished.id, signal="CANCEL")
+    create_run_signal(db, run_id=stale.id, signal="CANCEL").created_at = now_utc() - timedelta(days=1)
+    create_run_signal(db, run_id=live.id, signal="CANCEL")
+    db.commit()
+
+    update_run_status(db, finished, status="CANCELLED", finished=True)
+    registry = CancellationRegistry(shared=True)
+    assert registry.maybe_prune() == 1
+    # rate limited until a quarter of the retention has passed
+    assert registry.maybe_prune() == 0
+    assert [row.run_id for row in db.query(RunSignal).all()] == [live.id]
+    db.close()
+    engine.dispose()
+
+def test_stage_wait_observes_cancellation_mid_stage(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(orchestrator, "_execute_stage", lambda stage, run_id, doc, context: release.wait(5))
+    token = CancellationRegistry(shared=False).register("run-mid")
+    threading.Timer(0.1, token.cancel).start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(orchestrator.StageExecutionError) as err:
+            orchestrator._run_stage_with_timeout(stage="EXPORT", run_id="run-mid", doc=None, context={}, cancel=token)
+    finally:
+        release.set()
+    assert err.value.error_code == "RUN_CANCELLED"
+    assert time.monotonic() - started < 2
@@ -0,0 +1,97 @@
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import heartbeat
+from app.checkpoints import restore_checkpoints, save_checkpoint
+from app.config import settings
+from app.database import Base
+from app.heartbeat import OrphanReaper
+from app.models import Document, Run
+from app.repositories import now_utc
+from app.services.extraction import OCRResult
+
+
+def test_restore_returns_the_checkpointed_prefix_and_rehydrates_context():
+    run_id = f"ckpt-{uuid.uuid4()}"
+    try:
+        ocr = OCRResult(text="Invoice 42", provider="fallback", confidence=0.7, details={"pages": 1})
+        save_checkpoint(run_id, "PREPROCESS", {})
+        save_checkpoint(run_id, "OCR", {"ocr": ocr, "content_hash": "abc"})
+        # VALIDATE without EXTRACT is not a resumable prefix
+        save_checkpoint(run_id, "VALIDATE", {"issues": [], "quality_status": "SUCCESS"})
+
+        context: dict = {"ocr": None}
+        assert restore_checkpoints(run_id, context) == ["PREPROCESS", "OCR"]
+        assert context["ocr"] == ocr
+        assert context["content_hash"] == "abc"
+        assert "quality_status" not in context
+    finally:
+        shutil.rmtree(Path(settings.storage_root) / "runs" / run_id, ignore_errors=True)
+
+
+def test_restore_without_checkpoints_is_a_fresh_run():
+    assert restore_checkpoints(f"ckpt-{uuid.uuid4()}", {}) == []
+
+
+def test_reaper_requeues_stale_running_runs_only():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    stale = now_utc() - timedelta(minutes=10)
+    orphan = Run(document_id=doc.id, status="RUNNING", heartbeat_at=stale)
+    cancelled = Run(document_id=doc.id, status="RUNNING", heartbeat_at=stale, cancel_requested=True)
+    alive = Run(document_id=doc.id, status="RUNNING", heartbeat_at=now_utc())
+    db.add_all([orphan, cancelled, alive])
+    db.commit()
+
+    reaped = OrphanReaper(stale_after_seconds=60).reap(db)
+    assert set(reaped) == {orphan.id, cancelled.id}
+    db.expire_all()
+    assert db.get(Run, orphan.id).status == "QUEUED"
+    assert db.get(Run, cancelled.id).status == "CANCELLED"
+    assert db.get(Run, alive.id).status == "RUNNING"
+    # a second reaper finds nothing left to claim
+    assert OrphanReaper(stale_after_seconds=60).reap(db) == []
+    db.close()
+    engine.dispose()
+
+
+def test_started_reaper_hands_requeued_runs_back_to_the_process(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    local_session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(heartbeat, "SessionLocal", local_session)
+    db = local_session()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    stale = now_utc() - timedelta(minutes=10)
+    orphan = Run(document_id=doc.id, status="RUNNING", heartbeat_at=stale)
+    cancelled = Run(document_id=doc.id, status="RUNNING", heartbeat_at=stale, cancel_requested=True)
+    db.add_all([orphan, cancelled])
+    db.commit()
+    orphan_id = orphan.id
+    db.close()
+
+    resubmitted: list[str] = []
+    submitted = threading.Event()
+    reaper = OrphanReaper(stale_after_seconds=60, interval_seconds=0.01)
+    reaper.start(on_requeued=lambda run_id: (resubmitted.append(run_id), submitted.set()))
+    try:
+        assert submitted.wait(5)
+    finally:
+        reaper.stop()
+        reaper._thread.join(5)
+    # the cancelled run is finished, not restarted
+    assert resubmitted == [orphan_id]
+    engine.dispose()
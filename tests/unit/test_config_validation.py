@@ -37,3 +37,33 @@ def test_validate_settings_rejects_default_prod_secret():
         assert "JWT_SECRET" in str(exc)
     else:
         raise AssertionError("Expected ValueError")
+
+
+def test_validate_settings_rejects_retry_policy_with_cap_below_base():
+    cfg = Settings(retry_policies=(("MODEL_OOM", 5.0, 1.0, 0.2, 2),))
+    try:
+        validate_settings(cfg)
+    except ValueError as exc:
+        assert "MODEL_OOM" in str(exc)
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_validate_settings_rejects_non_positive_tenant_weight():
+    cfg = Settings(tenant_weights=(("acme", 0.0),))
+    try:
+        validate_settings(cfg)
+    except ValueError as exc:
+        assert "TENANT_WEIGHTS" in str(exc)
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_validate_settings_rejects_unknown_priority_lane():
+    cfg = Settings(lane_queue_depths=(("urgent", 1, 2),))
+    try:
+        validate_settings(cfg)
+    except ValueError as exc:
+        assert "LANE_QUEUE_DEPTHS" in str(exc)
+    else:
+        raise AssertionError("Expected ValueError")
@@ -0,0 +1,142 @@
+import sys
+import time
+import types
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import orchestrator
+from app.config import settings
+from app.database import Base
+from app.deadlines import Deadline, DeadlineExceeded
+from app.models import Document, Run
+from app.repositories import now_utc
+from app.retry import RetryPolicy
+from app.services.extraction import run_ocr, run_structured_extraction
+
+
+def _fake_tesseract(monkeypatch, calls: list):
+    pytesseract = types.ModuleType("pytesseract")
+    pytesseract.Output = types.SimpleNamespace(DICT="dict")
+
+    def image_to_string(image, timeout=0):
+        calls.append(("string", timeout))
+        return "Invoice No: 7"
+
+    def image_to_data(image, output_type=None, timeout=0):
+        calls.append(("data", timeout))
+        return {"conf": ["90"]}
+
+    pytesseract.image_to_string = image_to_string
+    pytesseract.image_to_data = image_to_data
+    pil = types.ModuleType("PIL")
+    pil.Image = types.SimpleNamespace(open=lambda path: object())
+    monkeypatch.setitem(sys.modules, "pytesseract", pytesseract)
+    monkeypatch.setitem(sys.modules, "PIL", pil)
+
+
+def test_tesseract_timeout_comes_from_the_remaining_budget(tmp_path, monkeypatch):
+    calls: list = []
+    _fake_tesseract(monkeypatch, calls)
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"png")
+
+    ocr = run_ocr(str(image), deadline=Deadline.after(10))
+    assert ocr.provider == "tesseract"
+    assert [name for name, _ in calls] == ["string", "data"]
+    assert all(0 < timeout <= 10 for _, timeout in calls)
+
+
+def test_ocr_degrades_to_fallback_when_budget_is_too_small(tmp_path, monkeypatch):
+    calls: list = []
+    _fake_tesseract(monkeypatch, calls)
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"png")
+
+    ocr = run_ocr(str(image), deadline=Deadline.after(0.5))
+    assert calls == []
+    assert ocr.provider == "deterministic_fallback"
+    assert ocr.details["degraded"] == "deadline_budget"
+
+
+def test_expired_deadline_gives_up_before_any_work():
+    with pytest.raises(DeadlineExceeded):
+        run_ocr("missing.png", deadline=Deadline.after(0))
+    with pytest.raises(DeadlineExceeded):
+        run_structured_extraction(text="x", filename="a.png", language="en", deadline=Deadline.after(0))
+
+
+def test_extraction_skips_invoice2data_on_a_small_budget(tmp_path):
+    source = tmp_path / "a.pdf"
+    source.write_bytes(b"%PDF-1.4")
+    extracted = run_structured_extraction(
+        text="Invoice No: 1",
+        filename="a.pdf",
+        language="en",
+        file_path=str(source),
+        deadline=Deadline.after(0.5),
+    )
+    assert extracted.details["status"] == "skipped_deadline"
+    assert extracted.provider == "heuristic_rules"
+
+
+def test_stage_wait_is_bounded_by_the_run_deadline(monkeypatch):
+    monkeypatch.setattr(orchestrator, "_execute_stage", lambda stage, run_id, doc, context: time.sleep(1.5))
+    started = time.monotonic()
+    with pytest.raises(orchestrator.StageExecutionError) as err:
+        orchestrator._run_stage_with_timeout(
+            stage="EXPORT",
+            run_id="run-deadline",
+            doc=None,
+            context={},
+            deadline=Deadline.after(0.3),
+        )
+    assert err.value.error_code == "RUN_TIMEOUT"
+    assert not err.value.retryable
+    assert time.monotonic() - started < 1.0
+
+
+def test_run_budget_counts_from_the_first_start_across_pickups(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    local_session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(orchestrator, "SessionLocal", local_session)
+    monkeypatch.setattr(orchestrator.heartbeats, "track", lambda run_id: None)
+    monkeypatch.setattr(orchestrator, "append_audit_event", lambda *args, **kwargs: None)
+    db = local_session()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    first_start = now_utc() - timedelta(seconds=settings.run_timeout_seconds - 5)
+    # requeued mid-run (retry, hand-off or drain) with most of its budget spent
+    run = Run(document_id=doc.id, status="QUEUED", next_stage="EXTRACT", started_at=first_start)
+    db.add(run)
+    db.commit()
+
+    token = orchestrator.open_run(run.id, "worker:test")
+    try:
+        assert orchestrator.begin_run(token)
+        assert token.deadline.remaining() < 6
+        # a backoff longer than what is left fails now instead of deferring
+        monkeypatch.setattr(orchestrator, "policy_for", lambda code: RetryPolicy(base_seconds=10, cap_seconds=10, jitter=0.0, max_attempts=3))
+        error = orchestrator.StageExecutionError("OCR_TIMEOUT", retryable=True)
+        assert orchestrator._retry_delay("OCR", error, 1, token.run_started) is None
+        assert orchestrator._retry_delay("OCR", error, 1, time.monotonic()) == 10
+        db.expire_all()
+        assert db.get(Run, run.id).started_at.replace(tzinfo=None) == first_start.replace(tzinfo=None)
+    finally:
+        orchestrator.close_run(token)
+
+    run.status, run.started_at = "QUEUED", now_utc() - timedelta(seconds=settings.run_timeout_seconds + 1)
+    db.commit()
+    token = orchestrator.open_run(run.id, "worker:test")
+    try:
+        assert not orchestrator.begin_run(token)
+    finally:
+        orchestrator.close_run(token)
+    db.expire_all()
+    assert (db.get(Run, run.id).status, db.get(Run, run.id).error_code) == ("FAILED", "RUN_TIMEOUT")
+    engine.dispose()
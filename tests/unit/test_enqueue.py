@@ -0,0 +1,64 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Document, QuarantineItem, Run
+from app.queue_gauge import queue_gauge
+from app.repositories import enqueue_run
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(tenant_id="acme", filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.commit()
+    return engine, db, doc
+
+
+def test_new_run_is_one_statement_and_the_key_returns_it_afterwards(monkeypatch):
+    engine, db, doc = _session()
+    monkeypatch.setattr(queue_gauge, "adjust", lambda *args, **kwargs: None)
+    doc_id = doc.id
+    statements: list[str] = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)  # noqa: E731
+
+    event.listen(engine, "before_cursor_execute", listener)
+    first = enqueue_run(db, document_id=doc_id, tenant_id="acme", requested_by="erp", idempotency_key="po-1")
+    event.remove(engine, "before_cursor_execute", listener)
+    assert first.created and first.status == "QUEUED"
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith("INSERT")
+
+    again = enqueue_run(db, document_id=doc_id, tenant_id="acme", requested_by="erp", idempotency_key="po-1")
+    assert (again.run_id, again.created) == (first.run_id, False)
+    # another tenant neither sees the document nor the key
+    assert enqueue_run(db, document_id=doc_id, tenant_id="beta", requested_by="erp", idempotency_key="po-1") is None
+    assert db.query(Run).count() == 1
+    stored = db.get(Run, first.run_id)
+    assert (stored.document_id, stored.priority, stored.cancel_requested) == (doc.id, "standard", False)
+    engine.dispose()
+
+
+def test_quarantined_or_unaccepted_documents_take_no_run(monkeypatch):
+    engine, db, doc = _session()
+    monkeypatch.setattr(queue_gauge, "adjust", lambda *args, **kwargs: None)
+    db.add(
+        QuarantineItem(
+            document_id=doc.id,
+            tenant_id="acme",
+            stage="INGEST",
+            status="QUARANTINED_UNKNOWN",
+            reason_codes_json="[]",
+            storage_path="q",
+        )
+    )
+    db.commit()
+    assert enqueue_run(db, document_id=doc.id, tenant_id="acme", requested_by="erp") is None
+
+    rejected = Document(tenant_id="acme", filename="b.png", content_type="image/png", size_bytes=1, storage_path="x", ingestion_status="REJECTED")
+    db.add(rejected)
+    db.commit()
+    assert enqueue_run(db, document_id=rejected.id, tenant_id="acme", requested_by="erp") is None
+    assert db.query(Run).count() == 0
+    engine.dispose()
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.fair_share import FairShareScheduler
+from app.metrics import metrics
+from app.models import Document, Run
+from app.repositories import now_utc
+
+
+def _scheduler(**kwargs) -> FairShareScheduler:
+    options = {"weights": {}, "default_weight": 1.0, "max_inflight": {}, "default_max_inflight": 0}
+    options.update(kwargs)
+    return FairShareScheduler(**options)
+
+
+def test_shares_follow_weights_over_many_cycles():
+    scheduler = _scheduler(weights={"big": 3.0})
+    totals = {"big": 0, "small": 0}
+    for _ in range(50):
+        for tenant, count in scheduler.plan({"big": 1000, "small": 1000}, {}, limit=4).items():
+            totals[tenant] += count
+    assert totals["big"] + totals["small"] == 200
+    assert totals["big"] == 3 * totals["small"]
+
+
+def test_single_slot_cycles_alternate_between_tenants():
+    scheduler = _scheduler()
+    picks = [next(iter(scheduler.plan({"bulk": 50_000, "tiny": 3}, {}, limit=1))) for _ in range(4)]
+    assert sorted(picks[:2]) == ["bulk", "tiny"]
+    assert picks.count("tiny") == 2
+
+
+def test_in_flight_cap_leaves_room_for_others():
+    scheduler = _scheduler(max_inflight={"bulk": 2})
+    plan = scheduler.plan({"bulk": 100, "other": 100}, {"bulk": 1}, limit=6)
+    assert plan == {"bulk": 1, "other": 5}
+    assert scheduler.plan({"bulk": 100}, {"bulk": 2}, limit=6) == {}
+
+
+def test_claim_serves_a_late_tenant_ahead_of_a_bulk_backlog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    base = now_utc() - timedelta(minutes=10)
+    bulk = [Run(document_id=doc.id, tenant_id="bulk", created_at=base + timedelta(seconds=i)) for i in range(20)]
+    late = Run(document_id=doc.id, tenant_id="late", created_at=now_utc() - timedelta(seconds=30))
+    db.add_all([*bulk, late])
+    db.commit()
+
+    claimed = _scheduler().claim(db, owner="worker-a", lease_seconds=60, limit=2)
+
+    assert late.id in claimed
+    assert len(claimed) == 2
+    ages = metrics.snapshot()
+    assert ages["queue_age_seconds:bulk"] >= 590
+    assert 25 <= ages["queue_age_seconds:late"] < 300
@@ -0,0 +1,108 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app import pipeline as pipeline_mod
+from app.pipeline import StagePipeline
+
+
+class _DummySession:
+    def commit(self) -> None:
+        return
+
+
+def _install_fakes(monkeypatch, events: list, *, slow_stages: dict[str, float]):
+    lock = threading.Lock()
+
+    def fake_open(run_id, worker_id):
+        return SimpleNamespace(run_id=run_id, worker_id=worker_id, db=_DummySession())
+
+    def fake_advance(token, stage):
+        start = time.monotonic()
+        time.sleep(slow_stages.get(stage, 0.0))
+        with lock:
+            events.append((token.run_id, stage, start, time.monotonic()))
+
+    monkeypatch.setattr(pipeline_mod, "open_run", fake_open)
+    monkeypatch.setattr(pipeline_mod, "begin_run", lambda token: True)
+    monkeypatch.setattr(pipeline_mod, "advance_run", fake_advance)
+    monkeypatch.setattr(pipeline_mod, "complete_run", lambda token: None)
+    monkeypatch.setattr(pipeline_mod, "close_run", lambda token: None)
+
+
+def test_pipeline_overlaps_ocr_and_extract_of_different_runs(monkeypatch):
+    events: list = []
+    _install_fakes(monkeypatch, events, slow_stages={"OCR": 0.08, "EXTRACT": 0.08})
+    pipe = StagePipeline(concurrency={"OCR": 1, "EXTRACT": 1}, queue_size=2).start()
+    try:
+        for idx in range(4):
+            assert pipe.wait_for_slot(5)
+            assert pipe.submit(f"run-{idx}")
+        assert pipe.drain(timeout=5)
+    finally:
+        pipe.stop(timeout=1)
+
+    ocr = {run_id: (s, e) for run_id, stage, s, e in events if stage == "OCR"}
+    extract = {run_id: (s, e) for run_id, stage, s, e in events if stage == "EXTRACT"}
+    assert len(ocr) == len(extract) == 4
+    # the extract of run-0 runs while the OCR of run-1 is in progress
+    assert extract["run-0"][0] < ocr["run-1"][1]
+    assert ocr["run-1"][0] < extract["run-0"][1]
+
+
+def test_pipeline_capacity_model_uses_observed_service_times(monkeypatch):
+    events: list = []
+    _install_fakes(monkeypatch, events, slow_stages={"OCR": 0.02})
+    pipe = StagePipeline(concurrency={"OCR": 2}, queue_size=4).start()
+    try:
+        pipe.submit("run-a")
+        assert pipe.drain(timeout=5)
+    finally:
+        pipe.stop(timeout=1)
+
+    model = {item["stage"]: item for item in pipe.capacity_model()}
+    assert model["ocr"]["concurrency"] == 2
+    assert model["ocr"]["service_time_ms"] >= 15
+    assert pipe.estimate()["capacity_system_docs_per_sec"] > 0
+
+
+def test_a_full_pipeline_refuses_runs_before_starting_them(monkeypatch):
+    events: list = []
+    begun: list[str] = []
+    release = threading.Event()
+    _install_fakes(monkeypatch, events, slow_stages={})
+    monkeypatch.setattr(pipeline_mod, "begin_run", lambda token: begun.append(token.run_id) or True)
+    monkeypatch.setattr(pipeline_mod, "advance_run", lambda token, stage: release.wait(5))
+    pipe = StagePipeline(concurrency={stage: 1 for stage in pipeline_mod.STAGES}, queue_size=1).start()
+    try:
+        # one run held by the OCR worker, one waiting in its queue
+        assert pipe.submit("run-0")
+        deadline = time.monotonic() + 5
+        while pipe._queues[pipeline_mod.STAGES[0]].qsize() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pipe.submit("run-1")
+        assert pipe.free_slots == 0
+        assert not pipe.submit("run-2")
+        assert begun == ["run-0", "run-1"]
+        assert not pipe.wait_for_slot(0.05)
+        release.set()
+        assert pipe.wait_for_slot(5)
+    finally:
+        release.set()
+        pipe.stop(timeout=5)
+
+
+def test_pipeline_reports_each_started_run_once_it_finishes(monkeypatch):
+    events: list = []
+    finished: list[int] = []
+    _install_fakes(monkeypatch, events, slow_stages={})
+    monkeypatch.setattr(pipeline_mod, "begin_run", lambda token: token.run_id != "run-lost")
+    pipe = StagePipeline(queue_size=4, on_finish=lambda: finished.append(1)).start()
+    try:
+        assert pipe.submit("run-a")
+        assert not pipe.submit("run-lost")
+        assert pipe.submit("run-b")
+        assert pipe.drain(timeout=5)
+    finally:
+        pipe.stop(timeout=1)
+    assert len(finished) == 2
@@ -0,0 +1,74 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Document, QuarantineReasonCode
+from app.repositories import (
+    count_quarantine_items,
+    create_quarantine_item,
+    list_quarantine_items,
+    mark_quarantine_reprocessed,
+    summarize_quarantine_reasons,
+)
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(tenant_id="t1", filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.commit()
+    return db, doc
+
+
+def _quarantine(db, doc, reason_codes, *, tenant_id="t1", status="QUARANTINED_UNKNOWN"):
+    return create_quarantine_item(
+        db,
+        document_id=doc.id,
+        tenant_id=tenant_id,
+        stage="INGEST",
+        status=status,
+        reason_codes=reason_codes,
+        storage_path="q",
+    )
+
+
+def test_reason_code_filter_fills_the_page_and_pages_by_keyset():
+    db, doc = _session()
+    matching = [_quarantine(db, doc, ["UNSUPPORTED_MIME", "FILE_CORRUPT"]) for _ in range(3)]
+    matching.sort(key=lambda item: (item.created_at, item.id), reverse=True)
+    # the newest items lack the code; filtering after the LIMIT would have found none of them
+    for _ in range(3):
+        _quarantine(db, doc, ["FILE_CORRUPT"])
+    _quarantine(db, doc, ["UNSUPPORTED_MIME"], tenant_id="t2")
+
+    first = list_quarantine_items(db, tenant_id="t1", reason_code="UNSUPPORTED_MIME", limit=2)
+    assert [item.id for item in first] == [item.id for item in matching[:2]]
+    rest = list_quarantine_items(
+        db, tenant_id="t1", reason_code="UNSUPPORTED_MIME", limit=2, before=(first[-1].created_at, first[-1].id)
+    )
+    assert [item.id for item in rest] == [matching[2].id]
+    assert count_quarantine_items(db, tenant_id="t1", reason_code="UNSUPPORTED_MIME") == 3
+    assert count_quarantine_items(db, tenant_id="t1") == 6
+
+
+def test_reprocessing_keeps_the_reason_rows_and_stats_in_step():
+    db, doc = _session()
+    item = _quarantine(db, doc, ["UNSUPPORTED_MIME", "FILE_CORRUPT", "UNSUPPORTED_MIME"])
+    _quarantine(db, doc, ["FILE_CORRUPT"])
+    assert summarize_quarantine_reasons(db, tenant_id="t1") == [
+        ("FILE_CORRUPT", "QUARANTINED_UNKNOWN", 2),
+        ("UNSUPPORTED_MIME", "QUARANTINED_UNKNOWN", 1),
+    ]
+
+    mark_quarantine_reprocessed(db, item, status="QUARANTINED_MIME", reason_codes=["FILE_CORRUPT"])
+    assert summarize_quarantine_reasons(db, tenant_id="t1") == [
+        ("FILE_CORRUPT", "QUARANTINED_MIME", 1),
+        ("FILE_CORRUPT", "QUARANTINED_UNKNOWN", 1),
+    ]
+    assert count_quarantine_items(db, tenant_id="t1", status="QUARANTINED_MIME", reason_code="FILE_CORRUPT") == 1
+
+    mark_quarantine_reprocessed(db, item, status="QUARANTINE_RESOLVED", reason_codes=[], resolved=True)
+    assert db.query(QuarantineReasonCode).filter_by(quarantine_item_id=item.id).count() == 0
+    assert summarize_quarantine_reasons(db, tenant_id="t2") == []
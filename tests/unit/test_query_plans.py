@@ -0,0 +1,97 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Run
+from app.repositories import (
+    apply_stage_transitions,
+    claim_queued_runs,
+    count_inflight_runs_by_tenant,
+    count_runs_by_tenant,
+    list_quarantine_items,
+    now_utc,
+    start_run,
+    summarize_quarantine_reasons,
+    touch_run_heartbeats,
+)
+
+
+def _plans(engine, fn) -> list[str]:
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+            statements.append((statement, parameters))
+
+    db = sessionmaker(bind=engine, autoflush=False)()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+        db.close()
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plans += [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+    return plans
+
+
+def test_hot_queries_are_served_by_the_composite_indexes():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    db.add(Run(id="r1", document_id="d1", tenant_id="t1"))
+    db.commit()
+    run = db.get(Run, "r1")
+
+    # one lane in age order straight off the claim index: no sort step
+    claim = _plans(engine, lambda db: claim_queued_runs(db, owner="w1", lease_seconds=60, priorities=("interactive",)))
+    assert any("ix_runs_claim (status=? AND priority=?)" in line for line in claim)
+    assert not any("TEMP B-TREE" in line for line in claim)
+    tenant_claim = _plans(
+        engine,
+        lambda db: claim_queued_runs(
+            db, owner="w1", lease_seconds=60, tenant_id="t1", priorities=("standard",), stages=("OCR",)
+        ),
+    )
+    assert any("ix_runs_claim_tenant (status=? AND tenant_id=? AND priority=?)" in line for line in tenant_claim)
+    assert not any("TEMP B-TREE" in line for line in tenant_claim)
+    assert any(
+        "ix_runs_claim_tenant" in line for line in _plans(engine, lambda db: count_runs_by_tenant(db, "QUEUED"))
+    )
+    inflight = _plans(engine, lambda db: count_inflight_runs_by_tenant(db))
+    assert inflight and all("COVERING INDEX ix_runs_claim_tenant (status=?)" in line for line in inflight)
+
+    assert any(
+        "sqlite_autoindex_runs_1 (id=?)" in line
+        for line in _plans(engine, lambda _: start_run(db, run, owner="w1", lease_seconds=60))
+    )
+    assert any(
+        "sqlite_autoindex_runs_1 (id=?)" in line
+        for line in _plans(engine, lambda db: touch_run_heartbeats(db, ["r1", "r2"], lease_seconds=60))
+    )
+    transition = {"stage_name": "OCR", "status": "RUNNING", "attempt": 1, "started": True, "at": now_utc()}
+    assert any(
+        "ix_run_stages_run_stage_attempt (run_id=?)" in line
+        for line in _plans(
+            engine, lambda db: apply_stage_transitions(db, run_id="r1", transitions=[transition], known_rows={})
+        )
+    )
+    db.close()
+    assert any(
+        "ix_quarantine_items_tenant_status_created_at" in line
+        for line in _plans(engine, lambda db: list_quarantine_items(db, tenant_id="t1", status="QUARANTINED_UNKNOWN"))
+    )
+    assert any(
+        "ix_quarantine_reason_codes_tenant_code_status_created_at" in line
+        for line in _plans(
+            engine,
+            lambda db: list_quarantine_items(db, tenant_id="t1", status="QUARANTINED_UNKNOWN", reason_code="FILE_CORRUPT"),
+        )
+    )
+    assert any(
+        "COVERING INDEX ix_quarantine_reason_codes_tenant_code_status_created_at" in line
+        for line in _plans(engine, lambda db: summarize_quarantine_reasons(db, tenant_id="t1"))
+    )
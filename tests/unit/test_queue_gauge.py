@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.metrics import metrics
+from app.models import Document, Run
+from app.queue_gauge import QueueDepthGauge, queue_gauge
+from app.repositories import create_run, update_run_status
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.commit()
+    return engine, db, doc
+
+
+def test_repository_transitions_maintain_gauge_without_counting(monkeypatch):
+    engine, db, doc = _session()
+    queue_gauge.reset()
+    monkeypatch.setattr(queue_gauge, "reconcile_seconds", 3600)
+    queue_gauge.reconcile(db)
+
+    a = create_run(db, document_id=doc.id, tenant_id="acme", requested_by="t")
+    create_run(db, document_id=doc.id, tenant_id="acme", requested_by="t")
+    create_run(db, document_id=doc.id, tenant_id="beta", requested_by="t")
+    assert queue_gauge.depth("acme") == 2
+    assert queue_gauge.depth() == 3
+    assert metrics.snapshot()["queue_depth"] == 3
+
+    update_run_status(db, a, status="RUNNING")
+    update_run_status(db, a, status="SUCCESS", finished=True)
+    assert queue_gauge.depth("acme") == 1
+    assert queue_gauge.depth() == 2
+    queue_gauge.reset()
+    engine.dispose()
+
+
+def test_reconcile_replaces_drifted_counts():
+    engine, db, doc = _session()
+    db.add_all([Run(document_id=doc.id, tenant_id="acme", status="QUEUED") for _ in range(3)])
+    db.add(Run(document_id=doc.id, tenant_id="acme", status="RUNNING"))
+    db.commit()
+
+    gauge = QueueDepthGauge(reconcile_seconds=3600)
+    gauge.adjust("acme", 10)
+    assert gauge.reconcile(db) == {"acme": 3}
+    assert gauge.depth("acme") == 3
+    engine.dispose()
@@ -0,0 +1,29 @@
+from app.recycling import WorkerRecycler, current_rss_bytes
+
+
+def test_current_rss_is_readable():
+    assert current_rss_bytes() > 0
+
+
+def test_recycles_at_the_run_limit():
+    recycler = WorkerRecycler(max_runs=3, max_rss_bytes=0)
+    assert recycler.note_run(2, rss_bytes=100) is None
+    assert recycler.note_run(rss_bytes=50) == "run_count"
+    assert recycler.due
+    assert recycler.peak_rss_bytes == 100
+
+
+def test_rss_limit_wins_and_the_first_reason_sticks():
+    recycler = WorkerRecycler(max_runs=2, max_rss_bytes=1000)
+    assert recycler.note_run(rss_bytes=999) is None
+    assert recycler.note_run(rss_bytes=1500) == "rss"
+    assert recycler.note_run(rss_bytes=10) == "rss"
+    assert recycler.peak_rss_bytes == 1500
+
+    recycler.reset()
+    assert not recycler.due and recycler.runs == 0
+
+
+def test_zero_disables_both_limits():
+    recycler = WorkerRecycler(max_runs=0, max_rss_bytes=0)
+    assert recycler.note_run(10_000, rss_bytes=10**12) is None
@@ -0,0 +1,83 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from app import pipeline as pipeline_mod
+from app.orchestrator import RetryDeferred
+from app.pipeline import StagePipeline
+from app.retry import RetryPolicy, RetryScheduler, policy_for
+
+
+def test_backoff_is_exponential_capped_and_jittered_downwards():
+    policy = RetryPolicy(base_seconds=0.1, cap_seconds=0.5, jitter=0.0, max_attempts=5)
+    assert [round(policy.delay_for(n), 3) for n in range(1, 5)] == [0.1, 0.2, 0.4, 0.5]
+
+    jittered = RetryPolicy(base_seconds=1.0, cap_seconds=1.0, jitter=0.5, max_attempts=2)
+    rng = random.Random(7)
+    samples = [jittered.delay_for(1, rng=rng) for _ in range(50)]
+    assert all(0.5 <= value <= 1.0 for value in samples)
+    assert len({round(value, 4) for value in samples}) > 1
+
+
+def test_error_codes_get_their_configured_policy():
+    storage = policy_for("STORAGE_UNAVAILABLE")
+    oom = policy_for("MODEL_OOM")
+    assert storage.max_attempts > oom.max_attempts
+    assert storage.base_seconds < oom.base_seconds
+    default = policy_for("OCR_TIMEOUT")
+    assert default.max_attempts >= 1
+
+
+def test_scheduler_runs_callbacks_in_due_order():
+    scheduler = RetryScheduler()
+    fired: list[str] = []
+    done = threading.Event()
+    scheduler.schedule(0.08, lambda: (fired.append("late"), done.set()))
+    scheduler.schedule(0.01, fired.append, "early")
+    assert done.wait(2)
+    assert fired == ["early", "late"]
+    assert scheduler.pending() == 0
+
+
+class _DummySession:
+    def commit(self) -> None:
+        return
+
+
+def test_pipeline_keeps_working_while_a_run_waits_for_its_retry(monkeypatch):
+    events: list[tuple[str, str, float]] = []
+    lock = threading.Lock()
+    failed_once: set[str] = set()
+
+    def fake_advance(token, stage):
+        if token.run_id == "flaky" and stage == "OCR" and "flaky" not in failed_once:
+            failed_once.add("flaky")
+            raise RetryDeferred(stage="OCR", attempt=1, delay_seconds=0.3, error_code="OCR_TIMEOUT")
+        with lock:
+            events.append((token.run_id, stage, time.monotonic()))
+
+    monkeypatch.setattr(
+        pipeline_mod,
+        "open_run",
+        lambda run_id, worker_id: SimpleNamespace(run_id=run_id, worker_id=worker_id, db=_DummySession()),
+    )
+    monkeypatch.setattr(pipeline_mod, "begin_run", lambda token: True)
+    monkeypatch.setattr(pipeline_mod, "advance_run", fake_advance)
+    monkeypatch.setattr(pipeline_mod, "complete_run", lambda token: None)
+    monkeypatch.setattr(pipeline_mod, "close_run", lambda token: None)
+
+    pipe = StagePipeline(concurrency={"OCR": 1}, queue_size=4).start()
+    try:
+        deferred_at = time.monotonic()
+        assert pipe.submit("flaky")
+        assert pipe.submit("steady")
+        assert pipe.drain(timeout=5)
+    finally:
+        pipe.stop(timeout=1)
+
+    finished = {run_id: at for run_id, stage, at in events if stage == "EXPORT"}
+    flaky_ocr = [at for run_id, stage, at in events if run_id == "flaky" and stage == "OCR"]
+    # the single OCR slot served "steady" during the backoff instead of sleeping
+    assert finished["steady"] < flaky_ocr[0]
+    assert flaky_ocr[0] - deferred_at >= 0.25
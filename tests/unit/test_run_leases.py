@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.heartbeat import OrphanReaper
+from app.models import Document, Run
+from app.repositories import claim_queued_runs, now_utc, start_run, touch_run_heartbeats
+
+
+def _session_with_runs(count: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    base = now_utc() - timedelta(minutes=5)
+    runs = [Run(document_id=doc.id, status="QUEUED", created_at=base + timedelta(seconds=idx)) for idx in range(count)]
+    db.add_all(runs)
+    db.commit()
+    return db, [run.id for run in runs]
+
+
+def test_claims_are_disjoint_and_oldest_first():
+    db, run_ids = _session_with_runs(5)
+
+    first = claim_queued_runs(db, owner="worker-a", lease_seconds=60, limit=2)
+    second = claim_queued_runs(db, owner="worker-b", lease_seconds=60, limit=10)
+
+    assert sorted(first) == sorted(run_ids[:2])
+    assert sorted(second) == sorted(run_ids[2:])
+    assert claim_queued_runs(db, owner="worker-c", lease_seconds=60, limit=10) == []
+    db.expire_all()
+    assert {db.get(Run, run_id).lease_owner for run_id in first} == {"worker-a"}
+
+
+def test_only_the_lease_owner_can_start_a_claimed_run():
+    db, run_ids = _session_with_runs(1)
+    claim_queued_runs(db, owner="worker-a", lease_seconds=60, limit=1)
+    run = db.get(Run, run_ids[0])
+
+    # e.g. the API background task in hybrid mode racing the worker
+    assert not start_run(db, run, owner="api-background", lease_seconds=60)
+    assert run.status == "QUEUED"
+    assert start_run(db, run, owner="worker-a", lease_seconds=60)
+    assert run.status == "RUNNING"
+    # a second start of the same run loses the compare-and-set
+    assert not start_run(db, run, owner="worker-a", lease_seconds=60)
+
+
+def test_expired_leases_are_claimable_again_and_reaped_when_running():
+    db, run_ids = _session_with_runs(2)
+    claim_queued_runs(db, owner="worker-a", lease_seconds=-1, limit=2)
+    # a claimer that died before starting its runs loses them to the next one
+    assert sorted(claim_queued_runs(db, owner="worker-b", lease_seconds=60, limit=2)) == sorted(run_ids)
+
+    held, lost = (db.get(Run, run_id) for run_id in run_ids)
+    assert start_run(db, held, owner="worker-b", lease_seconds=60)
+    assert start_run(db, lost, owner="worker-b", lease_seconds=-1)
+    touch_run_heartbeats(db, [held.id], lease_seconds=60)
+
+    assert OrphanReaper(stale_after_seconds=60).reap(db) == [lost.id]
+    db.expire_all()
+    assert db.get(Run, lost.id).status == "QUEUED"
+    assert db.get(Run, lost.id).lease_owner is None
+    assert db.get(Run, held.id).status == "RUNNING"
+
+
+def test_claims_take_higher_lanes_first_and_filter_by_lane():
+    db, run_ids = _session_with_runs(3)
+    bulk, standard, interactive = (db.get(Run, run_id) for run_id in run_ids)
+    bulk.priority, interactive.priority = "bulk", "interactive"
+    db.commit()
+
+    assert claim_queued_runs(db, owner="worker-a", lease_seconds=60, limit=1, priorities=("standard", "bulk")) == [standard.id]
+    assert claim_queued_runs(db, owner="worker-a", lease_seconds=60, limit=1) == [interactive.id]
+    assert claim_queued_runs(db, owner="worker-a", lease_seconds=60, limit=1, priorities=("interactive",)) == []
+
+
+def test_stage_workers_only_claim_runs_waiting_for_their_stages():
+    db, run_ids = _session_with_runs(2)
+    fresh, handed_off = (db.get(Run, run_id) for run_id in run_ids)
+    handed_off.next_stage = "EXTRACT"
+    db.commit()
+
+    assert claim_queued_runs(db, owner="ocr", lease_seconds=60, limit=5, stages=("PREPROCESS", "OCR")) == [fresh.id]
+    assert claim_queued_runs(db, owner="extract", lease_seconds=60, limit=5, stages=("EXTRACT", "VALIDATE")) == [handed_off.id]
+    # starting the run clears its hand-off marker
+    assert start_run(db, handed_off, owner="extract", lease_seconds=60)
+    assert handed_off.next_stage is None
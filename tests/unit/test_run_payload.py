@@ -0,0 +1,45 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Document
+from app.repositories import create_run, get_run, update_run_status
+
+
+def test_run_payload_is_native_json_and_only_loaded_when_asked_for():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(tenant_id="t1", filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.commit()
+    run = create_run(db, document_id=doc.id, tenant_id="t1", requested_by="u")
+    update_run_status(
+        db,
+        run,
+        status="SUCCESS",
+        review_decision="AUTO_APPROVED",
+        decision_log={"route": "fast", "steps": [1, 2]},
+        result={"total": "12.50"},
+        finished=True,
+    )
+    run_id = run.id
+    db.close()
+
+    statements: list[str] = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    polled = get_run(db, run_id, tenant_id="t1")
+    assert polled.status == "SUCCESS" and polled.review_decision == "AUTO_APPROVED"
+    assert len(statements) == 1 and "decision_log_json" not in statements[0]
+
+    exported = get_run(sessionmaker(bind=engine)(), run_id, payload=("result_json",))
+    assert "result_json" in statements[1] and "decision_log_json" not in statements[1]
+    assert exported.result_json == {"total": "12.50"}
+    event.remove(engine, "before_cursor_execute", listener)
+    assert polled.decision_log_json == {"route": "fast", "steps": [1, 2]} and polled.validation_issues_json is None
+    # never written: SQL NULL rather than JSON 'null'
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT validation_issues_json IS NULL FROM runs").scalar_one() == 1
+    engine.dispose()
@@ -0,0 +1,81 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import orchestrator
+from app.orchestrator import RunInterrupted
+from app.shutdown import ShutdownCoordinator
+from app.wakeup import WakeupListener
+
+
+def test_request_starts_the_grace_period_once_and_runs_callbacks(tmp_path):
+    coordinator = ShutdownCoordinator(grace_seconds=60)
+    listener = WakeupListener(tmp_path, name="w1")
+    try:
+        coordinator.on_request(listener.wake)
+        assert not coordinator.requested and coordinator.remaining() is None
+
+        started = time.monotonic()
+        assert coordinator.request()
+        assert not coordinator.request()
+        # the idle loop is woken rather than left to sleep out its poll interval
+        assert listener.wait(5)
+        assert time.monotonic() - started < 1
+    finally:
+        listener.close()
+    assert coordinator.requested
+    assert not coordinator.grace_expired()
+    assert 59 < coordinator.remaining() <= 60
+    assert coordinator.drain_timeout() > 60
+
+
+def test_runs_stop_at_the_next_stage_once_the_grace_period_is_over(monkeypatch):
+    coordinator = ShutdownCoordinator(grace_seconds=0)
+    monkeypatch.setattr(orchestrator, "shutdown", coordinator)
+    token = SimpleNamespace(restored=["PREPROCESS"])
+
+    coordinator.request()
+    assert coordinator.grace_expired()
+    # restored stages are skipped as before; the first real one is not started
+    orchestrator.advance_run(token, "PREPROCESS")
+    with pytest.raises(RunInterrupted) as excinfo:
+        orchestrator.advance_run(token, "OCR")
+    assert excinfo.value.stage == "OCR"
+    assert excinfo.value.error_code == "WORKER_SHUTDOWN"
+
+
+def test_interrupted_runs_are_requeued_at_their_stage(monkeypatch):
+    events: list[tuple[str, str | None]] = []
+
+    def fake_advance(token, stage):
+        if stage == "EXTRACT":
+            raise RunInterrupted(stage)
+        events.append(("advance", stage))
+
+    monkeypatch.setattr(orchestrator, "open_run", lambda run_id, worker_id, lease_owner=None: SimpleNamespace(restored=[]))
+    monkeypatch.setattr(orchestrator, "begin_run", lambda token: True)
+    monkeypatch.setattr(orchestrator, "advance_run", fake_advance)
+    monkeypatch.setattr(orchestrator, "interrupt_run", lambda token, stage: events.append(("interrupt", stage)))
+    monkeypatch.setattr(orchestrator, "fail_run", lambda token, exc: events.append(("fail", None)))
+    monkeypatch.setattr(orchestrator, "close_run", lambda token: events.append(("close", None)))
+
+    orchestrator.process_run("run-1", "worker:test")
+    assert events == [
+        ("advance", "PREPROCESS"),
+        ("advance", "OCR"),
+        ("interrupt", "EXTRACT"),
+        ("close", None),
+    ]
+
+
+def test_claimed_runs_are_handed_back_instead_of_started(monkeypatch):
+    coordinator = ShutdownCoordinator(grace_seconds=30)
+    coordinator.request()
+    released: list[tuple[str, str]] = []
+    monkeypatch.setattr(orchestrator, "shutdown", coordinator)
+    monkeypatch.setattr(orchestrator, "release_run_lease", lambda db, run_id, owner: released.append((run_id, owner)))
+
+    token = SimpleNamespace(db=None, run_id="run-1", worker_id="worker:1/42", lease_owner="worker:1")
+    assert orchestrator.begin_run(token) is False
+    assert released == [("run-1", "worker:1")]
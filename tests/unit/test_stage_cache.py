@@ -0,0 +1,119 @@
+import os
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import stage_cache as stage_cache_mod
+from app.database import Base
+from app.metrics import metrics
+from app.models import StageCacheEntry
+from app.stage_cache import StageCache
+
+
+def _install_db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    local_session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(stage_cache_mod, "SessionLocal", local_session)
+    return engine, local_session
+
+
+def test_put_then_get_round_trips_and_counts_hits(tmp_path, monkeypatch):
+    engine, local_session = _install_db(monkeypatch)
+    cache = StageCache(root=tmp_path, max_bytes=1024 * 1024, stages=("OCR",), enabled=True)
+    key, versions_hash = cache.key_for("OCR", "abc", {"filename": "a.png"})
+    hits_before = metrics.snapshot()["stage_cache_hit"]
+
+    assert cache.get("OCR", key) is None
+    cache.put("OCR", key, content_hash="abc", versions_hash=versions_hash, payload={"text": "hello", "confidence": 0.9})
+    assert cache.get("OCR", key) == {"text": "hello", "confidence": 0.9}
+
+    db = local_session()
+    entry = db.get(StageCacheEntry, key)
+    assert entry.hit_count == 1
+    assert entry.stage_name == "OCR"
+    db.close()
+    assert metrics.snapshot()["stage_cache_hit"] == hits_before + 1
+    engine.dispose()
+
+
+def test_key_depends_on_inputs_and_versions(monkeypatch):
+    cache = StageCache(enabled=True, stages=("OCR", "EXTRACT"))
+    base, _ = cache.key_for("OCR", "abc", {"filename": "a.png"})
+    assert cache.key_for("OCR", "abc", {"filename": "b.png"})[0] != base
+    assert cache.key_for("OCR", "def", {"filename": "a.png"})[0] != base
+    monkeypatch.setattr(cache, "versions_for", lambda stage: {"format": 99})
+    assert cache.key_for("OCR", "abc", {"filename": "a.png"})[0] != base
+
+
+def test_eviction_drops_least_recently_used_until_under_budget(tmp_path, monkeypatch):
+    engine, local_session = _install_db(monkeypatch)
+    cache = StageCache(root=tmp_path, max_bytes=1024 * 1024, stages=("OCR",), enabled=True)
+    payload = {"text": "x" * 100}
+    keys = [cache.key_for("OCR", f"doc-{idx}", {})[0] for idx in range(4)]
+
+    cache.put("OCR", keys[0], content_hash="doc-0", versions_hash="v", payload=payload)
+    db = local_session()
+    cache.max_bytes = db.get(StageCacheEntry, keys[0]).size_bytes * 3  # room for three entries
+    db.close()
+    cache.put("OCR", keys[1], content_hash="doc-1", versions_hash="v", payload=payload)
+    assert cache.get("OCR", keys[0]) is not None  # doc-0 becomes most recently used
+    cache.put("OCR", keys[2], content_hash="doc-2", versions_hash="v", payload=payload)
+    cache.put("OCR", keys[3], content_hash="doc-3", versions_hash="v", payload=payload)
+
+    db = local_session()
+    remaining = {row.content_hash for row in db.query(StageCacheEntry).all()}
+    db.close()
+    assert remaining == {"doc-0", "doc-2", "doc-3"}
+    assert not list((tmp_path / "ocr").rglob(f"{keys[1]}.json"))
+    engine.dispose()
+
+
+def test_missing_payload_file_degrades_to_miss(tmp_path, monkeypatch):
+    engine, local_session = _install_db(monkeypatch)
+    cache = StageCache(root=tmp_path, max_bytes=1024 * 1024, stages=("OCR",), enabled=True)
+    key, versions_hash = cache.key_for("OCR", "abc", {})
+    cache.put("OCR", key, content_hash="abc", versions_hash=versions_hash, payload={"text": "t"})
+    for path in tmp_path.rglob("*.json"):
+        path.unlink()
+
+    assert cache.get("OCR", key) is None
+    db = local_session()
+    assert db.get(StageCacheEntry, key) is None
+    db.close()
+    engine.dispose()
+
+
+
+def test_concurrent_puts_of_one_key_write_separate_temp_files(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(stage_cache_mod, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    cache = StageCache(root=tmp_path / "cache", max_bytes=64 * 1024 * 1024, stages=("OCR",), enabled=True)
+    key, versions_hash = cache.key_for("OCR", "abc", {"filename": "a.png"})
+    replace = os.replace
+    both_written = threading.Barrier(2, timeout=5)
+    sources: list[str] = []
+
+    def replace_together(src, dst):
+        # both writers have finished their temp file before either renames it
+        sources.append(str(src))
+        both_written.wait()
+        replace(src, dst)
+
+    monkeypatch.setattr(stage_cache_mod.os, "replace", replace_together)
+    payloads = [{"text": "a" * 1000}, {"text": "b" * 1000}]
+    threads = [
+        threading.Thread(target=cache.put, args=("OCR", key), kwargs={"content_hash": "abc", "versions_hash": versions_hash, "payload": payload})
+        for payload in payloads
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(sources)) == 2
+    assert cache.get("OCR", key) in payloads
+    assert not list((tmp_path / "cache").rglob("*.tmp"))
+    engine.dispose()
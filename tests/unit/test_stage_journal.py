@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Document, Run, RunStage
+from app.stage_journal import StageJournal
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doc = Document(filename="a.png", content_type="image/png", size_bytes=1, storage_path="x")
+    db.add(doc)
+    db.flush()
+    run = Run(document_id=doc.id, status="RUNNING")
+    db.add(run)
+    db.commit()
+    return engine, db, run
+
+
+def test_journal_buffers_until_checkpoint_and_flushes_in_one_commit():
+    engine, db, run = _session()
+    commits: list[int] = []
+    event.listen(db, "after_commit", lambda _session: commits.append(1))
+
+    journal = StageJournal(db, run.id, checkpoints={"OCR"})
+    journal.record(stage_name="PREPROCESS", status="RUNNING", started=True)
+    journal.record(stage_name="PREPROCESS", status="SUCCESS", finished=True)
+    journal.record(stage_name="OCR", status="RUNNING", started=True)
+    assert db.query(RunStage).count() == 0
+    assert commits == []
+
+    journal.record(stage_name="OCR", status="SUCCESS", finished=True)
+    assert len(commits) == 1
+    rows = {r.stage_name: r for r in db.query(RunStage).all()}
+    assert rows["PREPROCESS"].status == "SUCCESS"
+    assert rows["OCR"].status == "SUCCESS"
+    assert rows["OCR"].started_at is not None and rows["OCR"].finished_at is not None
+
+    journal.record(stage_name="EXTRACT", status="RUNNING", started=True)
+    assert journal.pending == 1
+    assert journal.flush() == 1
+    assert db.query(RunStage).count() == 3
+    engine.dispose()
+
+
+def test_journal_keeps_retry_attempts_as_separate_rows():
+    engine, db, run = _session()
+    journal = StageJournal(db, run.id, checkpoints=())
+    journal.record(stage_name="OCR", status="FAILED", attempt=1, error_code="OCR_TIMEOUT", finished=True)
+    journal.record(stage_name="OCR", status="SUCCESS", attempt=2, finished=True)
+    journal.flush()
+    attempts = sorted((r.attempt, r.status) for r in db.query(RunStage).filter(RunStage.stage_name == "OCR"))
+    assert attempts == [(1, "FAILED"), (2, "SUCCESS")]
+    engine.dispose()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from app.metrics import metrics
+from app.stage_pools import StagePool
+
+
+def test_stage_pool_reuses_long_lived_threads():
+    pool = StagePool("OCR", 2)
+    try:
+        names = {pool.submit(lambda: threading.current_thread().name).result(timeout=2) for _ in range(6)}
+        assert len(names) <= 2
+        assert all(name.startswith("im-ocr-") for name in names)
+        snap = metrics.snapshot()
+        assert snap["stage_pool_ocr_size"] == 2
+        assert snap["stage_pool_ocr_wait_ms_count"] >= 6
+    finally:
+        pool.shutdown()
+
+
+def test_abandoned_future_is_poisoned_then_reaped():
+    pool = StagePool("EXTRACT", 2)
+    release = threading.Event()
+    try:
+        fut = pool.submit(release.wait, 5)
+        time.sleep(0.05)
+        pool.abandon(fut)
+        assert pool.poisoned == 1
+
+        # the healthy slot still serves work while the stuck thread is pending
+        assert pool.submit(lambda: "ok").result(timeout=2) == "ok"
+
+        release.set()
+        fut.result(timeout=2)
+        deadline = time.time() + 2
+        while pool.poisoned and time.time() < deadline:
+            time.sleep(0.01)
+        assert pool.poisoned == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_pool_recycles_when_every_slot_is_poisoned():
+    pool = StagePool("PERSIST", 1)
+    release = threading.Event()
+    try:
+        fut = pool.submit(release.wait, 5)
+        time.sleep(0.05)
+        pool.abandon(fut)
+        assert pool.poisoned == 0
+        assert pool.retired == 1
+        assert pool.submit(lambda: "fresh").result(timeout=2) == "fresh"
+    finally:
+        release.set()
+        pool.shutdown()
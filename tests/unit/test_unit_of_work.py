@@ -0,0 +1,108 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, unit_of_work
+from app.repositories import create_document, create_quarantine_item, create_run, get_document_for_run, update_document_ingestion
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _count_round_trips(engine, db, fn) -> int:
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    commits: list[int] = []
+    event.listen(engine, "before_cursor_execute", _record)
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return len(statements) + len(commits)
+
+
+def _upload(db, *, commit: bool):
+    doc = create_document(
+        db,
+        tenant_id="t1",
+        filename="a.png",
+        content_type="image/png",
+        size_bytes=1,
+        storage_path="pending",
+        language="en",
+        commit=commit,
+    )
+    update_document_ingestion(db, doc, storage_path=f"raw/{doc.id}", ingestion_status="ACCEPTED", commit=commit)
+    return doc
+
+
+def test_unit_of_work_writes_an_upload_once_and_keeps_the_values():
+    engine = _engine()
+    db = sessionmaker(bind=engine, autoflush=False)()
+    legacy = _count_round_trips(engine, db, lambda: db.refresh(_upload(db, commit=True)))
+
+    uploaded = []
+
+    def staged():
+        with unit_of_work(db):
+            uploaded.append(_upload(db, commit=False))
+        doc = uploaded[0]
+        # everything the response needs, without a reload
+        return doc.id, doc.storage_path, doc.created_at
+
+    staged_trips = _count_round_trips(engine, db, staged)
+    assert staged_trips * 2 < legacy
+    doc = uploaded[0]
+    assert doc.storage_path == f"raw/{doc.id}"
+    db.expire_all()
+    assert db.get(type(doc), doc.id).storage_path == f"raw/{doc.id}"
+
+
+def test_unit_of_work_rolls_back_everything_on_error():
+    engine = _engine()
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        with unit_of_work(db):
+            doc = _upload(db, commit=False)
+            create_quarantine_item(
+                db,
+                document_id=doc.id,
+                tenant_id="t1",
+                stage="INGEST",
+                status="QUARANTINED_UNKNOWN",
+                reason_codes=["FILE_CORRUPT"],
+                storage_path="q",
+                commit=False,
+            )
+            raise RuntimeError("storage write failed")
+    except RuntimeError:
+        pass
+    assert get_document_for_run(db, doc.id, tenant_id="t1") == (None, False)
+
+
+def test_document_lookup_for_a_run_reports_open_quarantine():
+    engine = _engine()
+    db = sessionmaker(bind=engine, autoflush=False)()
+    with unit_of_work(db):
+        doc = _upload(db, commit=False)
+        create_quarantine_item(
+            db,
+            document_id=doc.id,
+            tenant_id="t1",
+            stage="INGEST",
+            status="QUARANTINED_UNKNOWN",
+            reason_codes=["FILE_CORRUPT"],
+            storage_path="q",
+            commit=False,
+        )
+        run = create_run(db, document_id=doc.id, tenant_id="t1", requested_by="u", commit=False)
+    found, quarantined = get_document_for_run(db, doc.id, tenant_id="t1")
+    assert found.id == doc.id and quarantined
+    assert get_document_for_run(db, doc.id, tenant_id="t2") == (None, False)
+    assert run.status == "QUEUED" and run.id
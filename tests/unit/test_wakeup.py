@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from app.config import settings
+from app.wakeup import WakeupListener, notify_workers
+
+
+def test_notify_wakes_a_blocked_listener_immediately(tmp_path):
+    listener = WakeupListener(tmp_path, name="w1")
+    try:
+        assert listener.active
+        assert notify_workers(tmp_path) == 1
+        assert notify_workers(tmp_path) == 1
+        started = time.monotonic()
+        assert listener.wait(5)
+        assert time.monotonic() - started < 1
+        # both wakeups were drained by the first wait
+        assert not listener.wait(0.05)
+    finally:
+        listener.close()
+    assert not listener.path.exists()
+
+
+def test_async_wait_and_fallback_timeout(tmp_path):
+    listener = WakeupListener(tmp_path, name="w2")
+
+    async def scenario() -> tuple[bool, bool]:
+        timed_out = await listener.wait_async(0.05)
+        asyncio.get_running_loop().call_later(0.05, notify_workers, tmp_path)
+        woken = await listener.wait_async(5)
+        return timed_out, woken
+
+    try:
+        assert asyncio.run(scenario()) == (False, True)
+    finally:
+        listener.close()
+
+
+def test_stale_sockets_are_pruned(tmp_path):
+    stale = WakeupListener(tmp_path, name="dead")
+    stale._sock.close()  # the process died without unlinking its socket
+    assert notify_workers(tmp_path) == 0
+    assert not stale.path.exists()
+
+
+def test_disabled_channel_degrades_to_polling(tmp_path):
+    old = settings.worker_wakeup_enabled
+    object.__setattr__(settings, "worker_wakeup_enabled", False)
+    try:
+        listener = WakeupListener(tmp_path, name="w3")
+        assert not listener.active
+        assert notify_workers(tmp_path) == 0
+        assert not listener.wait(0.01)
+    finally:
+        object.__setattr__(settings, "worker_wakeup_enabled", old)
@@ -1,5 +1,9 @@
-from types import SimpleNamespace
+import sys
 
+import pytest
+
+from app.config import settings
+from app.shutdown import ShutdownCoordinator
 from services import worker
 
 
@@ -13,14 +17,208 @@ def test_drain_once_processes_queued_runs(monkeypatch):
 
     monkeypatch.setattr(worker, "SessionLocal", lambda: _DummySession())
     monkeypatch.setattr(
-        worker,
-        "list_queued_runs",
-        lambda db, limit: [SimpleNamespace(id="run-1"), SimpleNamespace(id="run-2")][:limit],
+        worker.fair_share,
+        "claim",
+        lambda db, owner, lease_seconds, limit, priorities, stages: (["run-1"] if "interactive" in priorities else ["run-2"])[:limit],
     )
-    monkeypatch.setattr(worker, "count_runs_by_status", lambda db, status: 0)
+    monkeypatch.setattr(worker.queue_gauge, "depth", lambda tenant_id=None: 0)
     monkeypatch.setattr(worker.metrics, "set_queue_depth", lambda depth: None)
-    monkeypatch.setattr(worker, "process_run", lambda run_id, wid: processed.append((run_id, wid)))
+    monkeypatch.setattr(worker, "process_run", lambda run_id, wid, stages=None: processed.append((run_id, wid)))
 
     count = worker.drain_once(max_runs=2, worker_id="worker:test")
     assert count == 2
     assert processed == [("run-1", "worker:test"), ("run-2", "worker:test")]
+
+
+def test_child_process_runs_with_a_per_process_worker_id(monkeypatch):
+    processed: list[tuple[str, str, str]] = []
+    monkeypatch.setattr(
+        worker,
+        "process_run",
+        lambda run_id, wid, lease_owner=None, stages=None: processed.append((run_id, wid, lease_owner)),
+    )
+
+    worker._process_run_in_child("run-1", "worker:test")
+    assert processed == [("run-1", f"worker:test/{worker.os.getpid()}", "worker:test")]
+
+
+def test_reserved_slots_only_take_interactive_runs(monkeypatch):
+    requested: list[tuple[tuple[str, ...], int]] = []
+
+    def fake_claim(db, owner, lease_seconds, limit, priorities, stages):
+        requested.append((priorities, limit))
+        return [f"{priorities[0]}-{idx}" for idx in range(limit)] if priorities != ("interactive",) else []
+
+    monkeypatch.setattr(worker, "SessionLocal", lambda: _DummySession())
+    monkeypatch.setattr(worker.fair_share, "claim", fake_claim)
+    monkeypatch.setattr(worker.queue_gauge, "depth", lambda tenant_id=None: 0)
+    monkeypatch.setattr(worker.metrics, "set_queue_depth", lambda depth: None)
+
+    assert len(worker._claim_run_ids(4, "worker:test", reserved=1)) == 3
+    assert worker._claim_run_ids(1, "worker:test", reserved=1) == []
+    assert requested == [(("interactive",), 4), (("standard", "bulk"), 3), (("interactive",), 1)]
+
+
+def test_drain_once_keeps_a_slot_of_a_bulk_batch_for_interactive_runs(monkeypatch):
+    queued = {"interactive": [], "bulk": [f"bulk-{idx}" for idx in range(5)]}
+    processed: list[str] = []
+
+    def fake_claim(db, owner, lease_seconds, limit, priorities, stages):
+        lane = queued["interactive"] if priorities == ("interactive",) else queued["bulk"]
+        claimed, lane[:] = lane[:limit], lane[limit:]
+        return claimed
+
+    monkeypatch.setattr(worker, "SessionLocal", lambda: _DummySession())
+    monkeypatch.setattr(worker.fair_share, "claim", fake_claim)
+    monkeypatch.setattr(worker.queue_gauge, "depth", lambda tenant_id=None: 0)
+    monkeypatch.setattr(worker.metrics, "set_queue_depth", lambda depth: None)
+    monkeypatch.setattr(worker, "process_run", lambda run_id, wid, stages=None: processed.append(run_id))
+    old_reserved = settings.interactive_reserved_slots
+    object.__setattr__(settings, "interactive_reserved_slots", 1)
+    try:
+        assert worker.drain_once(max_runs=3, worker_id="worker:test") == 2
+        queued["interactive"].append("interactive-0")
+        assert worker.drain_once(max_runs=3, worker_id="worker:test") == 3
+    finally:
+        object.__setattr__(settings, "interactive_reserved_slots", old_reserved)
+    assert processed == ["bulk-0", "bulk-1", "interactive-0", "bulk-2", "bulk-3"]
+
+
+def test_stage_set_orders_stages_and_keeps_preprocess_with_ocr():
+    assert worker._stage_set([]) is None
+    assert worker._stage_set(["ocr"]) == ("PREPROCESS", "OCR")
+    assert worker._stage_set("EXPORT,EXTRACT, validate,PERSIST".split(",")) == ("EXTRACT", "VALIDATE", "PERSIST", "EXPORT")
+    try:
+        worker._stage_set(["OCR", "SCAN"])
+    except ValueError as exc:
+        assert "SCAN" in str(exc)
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_supervised_workers_inherit_the_worker_flags_but_not_the_supervisor_ones():
+    args = worker._build_arg_parser().parse_args(
+        ["--supervise", "--min-workers", "2", "--max-workers", "6", "--stages", "OCR", "--poll-seconds", "0.5"]
+    )
+    assert worker._supervised_worker_args(args) == ["--poll-seconds", "0.5", "--stages", "OCR"]
+
+
+def test_drain_once_stops_at_the_recycle_limit_and_releases_the_rest(monkeypatch):
+    processed: list[str] = []
+    released: list[str] = []
+
+    monkeypatch.setattr(worker, "SessionLocal", lambda: _DummySession())
+    monkeypatch.setattr(worker, "_claim_run_ids", lambda limit, owner, reserved=0, stages=None: ["run-1", "run-2", "run-3"])
+    monkeypatch.setattr(worker, "process_run", lambda run_id, wid, stages=None: processed.append(run_id))
+    monkeypatch.setattr(worker, "release_run_lease", lambda db, run_id, owner: released.append(run_id))
+    monkeypatch.setattr(worker.queue_gauge, "depth", lambda tenant_id=None: 0)
+    monkeypatch.setattr(worker.metrics, "set_queue_depth", lambda depth: None)
+
+    recycler = worker.WorkerRecycler(max_runs=1, max_rss_bytes=0)
+    assert worker.drain_once(worker_id="worker:test", recycler=recycler) == 1
+    assert processed == ["run-1"]
+    assert released == ["run-2", "run-3"]
+    assert recycler.reason == "run_count"
+
+
+def test_drain_once_hands_back_unstarted_runs_on_shutdown(monkeypatch):
+    processed: list[str] = []
+    released: list[str] = []
+    coordinator = ShutdownCoordinator(grace_seconds=30)
+
+    def fake_process(run_id, wid, stages=None):
+        processed.append(run_id)
+        coordinator.request()
+
+    monkeypatch.setattr(worker, "shutdown", coordinator)
+    monkeypatch.setattr(worker, "SessionLocal", lambda: _DummySession())
+    monkeypatch.setattr(worker, "_claim_run_ids", lambda limit, owner, reserved=0, stages=None: ["run-1", "run-2", "run-3"])
+    monkeypatch.setattr(worker, "process_run", fake_process)
+    monkeypatch.setattr(worker, "release_run_lease", lambda db, run_id, owner: released.append(run_id))
+    monkeypatch.setattr(worker.queue_gauge, "depth", lambda tenant_id=None: 0)
+    monkeypatch.setattr(worker.metrics, "set_queue_depth", lambda depth: None)
+
+    assert worker.drain_once(worker_id="worker:test") == 1
+    assert processed == ["run-1"]
+    assert released == ["run-2", "run-3"]
+
+
+def test_pipelined_worker_claims_only_what_the_pipeline_can_take(monkeypatch):
+    claimed: list[int] = []
+    submitted: list[str] = []
+    coordinator = ShutdownCoordinator(grace_seconds=30)
+
+    class FakePipeline:
+        inflight = 0
+        free_slots = 2
+
+        def __init__(self, worker_id, on_finish=None):
+            return
+
+        def start(self):
+            return self
+
+        def submit(self, run_id):
+            submitted.append(run_id)
+            return True
+
+        def stop(self, timeout=None):
+            return
+
+    def fake_claim(limit, owner, reserved=0, stages=None):
+        claimed.append(limit)
+        coordinator.request()
+        return [f"run-{idx}" for idx in range(limit)]
+
+    monkeypatch.setattr(worker, "shutdown", coordinator)
+    monkeypatch.setattr(worker, "StagePipeline", FakePipeline)
+    monkeypatch.setattr(worker, "_claim_run_ids", fake_claim)
+    monkeypatch.setattr(worker, "_housekeeping", lambda: None)
+
+    worker.run_pipelined(poll_seconds=0.01, max_runs_per_cycle=10)
+    assert claimed == [2]
+    assert submitted == ["run-0", "run-1"]
+
+
+def test_async_worker_counts_runs_towards_recycling_when_they_finish(monkeypatch):
+    coordinator = ShutdownCoordinator(grace_seconds=30)
+    batches = [["run-1", "run-lost", "run-2"]]
+
+    async def fake_process(run_id, wid):
+        return run_id != "run-lost"
+
+    def fake_claim(limit, owner, reserved=0):
+        if not batches:
+            coordinator.request()
+            return []
+        return batches.pop()
+
+    monkeypatch.setattr(worker, "shutdown", coordinator)
+    monkeypatch.setattr(worker, "process_run_async", fake_process)
+    monkeypatch.setattr(worker, "_claim_run_ids", fake_claim)
+    monkeypatch.setattr(worker, "_housekeeping", lambda: None)
+
+    recycler = worker.WorkerRecycler(max_runs=0, max_rss_bytes=0)
+    worker.run_async(poll_seconds=0.01, max_inflight=10, recycler=recycler)
+    # the run that lost start_run was claimed but never ran
+    assert recycler.runs == 2
+
+
+def test_concurrency_cannot_silently_override_async_or_pipeline(monkeypatch, capsys):
+    monkeypatch.setattr(worker, "run_concurrent", lambda **kwargs: pytest.fail("started the process pool"))
+    monkeypatch.setattr(sys, "argv", ["worker.py", "--concurrency", "2", "--async"])
+    with pytest.raises(SystemExit) as excinfo:
+        worker.main()
+    assert excinfo.value.code == 2
+    assert "cannot be combined with --async or --pipeline" in capsys.readouterr().err
+
+    # the environment setting counts the same as the flag
+    old_concurrency = settings.worker_concurrency
+    object.__setattr__(settings, "worker_concurrency", 4)
+    monkeypatch.setattr(sys, "argv", ["worker.py", "--pipeline"])
+    try:
+        with pytest.raises(SystemExit):
+            worker.main()
+    finally:
+        object.__setattr__(settings, "worker_concurrency", old_concurrency)
+    assert "INVOICEMIND_WORKER_CONCURRENCY" in capsys.readouterr().err
@@ -0,0 +1,367 @@
+"""Query plans and latencies of the hot repository functions on a seeded database.
+
+Seeds documents, runs, run_stages, quarantine_items and their reason codes at
+production-like volumes (a million runs by default), then calls each repository
+function on the hot paths: the lane-ordered claim, the ``start_run`` compare-and-set,
+stage transitions, heartbeats, the queue gauges and the quarantine listings. Each
+query runs in a transaction that is rolled back afterwards, so the claims and
+writes leave the seeded rows as they were. For every statement a call issues it prints the query plan
+(``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on Postgres) and reports
+p50/p95 latency over ``--repeat`` calls. With ``--check`` it exits non-zero
+when a plan falls back to a full scan of a hot table, so a query change that
+loses its index shows up before it ships::
+
+    python tools/perf/query_benchmark.py --check
+    python tools/perf/query_benchmark.py --db-url postgresql+psycopg://im:im@localhost/im_bench --runs 2000000
+
+The target database is created from the models (``--reuse`` keeps the rows
+of an earlier seed); never point it at a database you care about.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import PIPELINE_STAGES, PRIORITY_CLASSES
+from app.database import Base
+from app.models import Document, QuarantineItem, QuarantineReasonCode, Run, RunStage
+from app.repositories import (
+    apply_stage_transitions,
+    claim_queued_runs,
+    count_inflight_runs_by_tenant,
+    count_quarantine_items,
+    count_queued_runs_by_lane,
+    count_runs_by_tenant,
+    get_latest_open_quarantine_for_document,
+    list_quarantine_items,
+    list_run_stages,
+    now_utc,
+    start_run,
+    summarize_claimable_runs,
+    summarize_quarantine_reasons,
+    touch_run_heartbeats,
+)
+
+HOT_TABLES = ("runs", "run_stages", "quarantine_items", "quarantine_reason_codes")
+# Mostly finished runs with a thin queued tail, as in a long-lived deployment.
+RUN_STATUSES = (("SUCCESS", 0.80), ("WARN", 0.06), ("NEEDS_REVIEW", 0.05), ("FAILED", 0.04), ("QUEUED", 0.03), ("RUNNING", 0.02))
+QUARANTINE_STATUSES = ("QUARANTINED_UNKNOWN", "QUARANTINED_MIME", "QUARANTINE_RESOLVED")
+REASON_CODES = ("UNSUPPORTED_MIME", "FILE_CORRUPT", "LOW_RESOLUTION", "DUPLICATE_DOCUMENT")
+CHUNK = 10_000
+
+
+def _engine(db_url: str) -> Engine:
+    return create_engine(db_url, connect_args={"check_same_thread": False} if db_url.startswith("sqlite") else {})
+
+
+def seed(engine: Engine, *, runs: int, stages_per_run: int, quarantine: int, tenants: int, rng: random.Random) -> None:
+    Base.metadata.create_all(bind=engine)
+    tenant_ids = [f"tenant-{idx:03d}" for idx in range(tenants)]
+    statuses, weights = zip(*RUN_STATUSES)
+    start = now_utc() - timedelta(days=90)
+    span = 90 * 24 * 3600
+    doc_ids: list[tuple[str, str]] = []
+    with engine.begin() as conn:
+        for offset in range(0, max(1, runs // 4), CHUNK):
+            rows = []
+            for _ in range(min(CHUNK, max(1, runs // 4) - offset)):
+                doc = (str(uuid.uuid4()), rng.choice(tenant_ids))
+                doc_ids.append(doc)
+                rows.append(
+                    {
+                        "id": doc[0],
+                        "tenant_id": doc[1],
+                        "filename": "bench.png",
+                        "content_type": "image/png",
+                        "size_bytes": 1024,
+                        "storage_path": "bench",
+                        "created_at": start,
+                    }
+                )
+            conn.execute(insert(Document.__table__), rows)
+    for offset in range(0, runs, CHUNK):
+        run_rows, stage_rows = [], []
+        for _ in range(min(CHUNK, runs - offset)):
+            doc_id, tenant_id = rng.choice(doc_ids)
+            run_id = str(uuid.uuid4())
+            created = start + timedelta(seconds=rng.randrange(span))
+            status = rng.choices(statuses, weights)[0]
+            run_rows.append(
+                {
+                    "id": run_id,
+                    "document_id": doc_id,
+                    "tenant_id": tenant_id,
+                    "status": status,
+                    "priority": rng.choice(PRIORITY_CLASSES),
+                    "requested_by": "bench",
+                    "cancel_requested": False,
+                    "created_at": created,
+                    "updated_at": created,
+                    **_queue_state(status, rng),
+                }
+            )
+            for idx, stage in enumerate(PIPELINE_STAGES[:stages_per_run]):
+                stage_rows.append(
+                    {
+                        "run_id": run_id,
+                        "stage_name": stage,
+                        "status": "SUCCESS",
+                        "attempt": 1,
+                        "started_at": created + timedelta(seconds=idx),
+                        "finished_at": created + timedelta(seconds=idx + 1),
+                    }
+                )
+        with engine.begin() as conn:
+            conn.execute(insert(Run.__table__), run_rows)
+            if stage_rows:
+                conn.execute(insert(RunStage.__table__), stage_rows)
+    with engine.begin() as conn:
+        for offset in range(0, quarantine, CHUNK):
+            rows, reason_rows = [], []
+            for _ in range(min(CHUNK, quarantine - offset)):
+                doc_id, tenant_id = rng.choice(doc_ids)
+                item_id = str(uuid.uuid4())
+                created = start + timedelta(seconds=rng.randrange(span))
+                item_status = rng.choice(QUARANTINE_STATUSES)
+                codes = [] if item_status == "QUARANTINE_RESOLVED" else rng.sample(REASON_CODES, rng.randint(1, 2))
+                rows.append(
+                    {
+                        "id": item_id,
+                        "document_id": doc_id,
+                        "tenant_id": tenant_id,
+                        "stage": "INGEST",
+                        "status": item_status,
+                        "reason_codes_json": json.dumps(codes),
+                        "storage_path": "bench",
+                        "reprocess_count": 0,
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                )
+                reason_rows += [
+                    {
+                        "quarantine_item_id": item_id,
+                        "reason_code": code,
+                        "tenant_id": tenant_id,
+                        "status": item_status,
+                        "created_at": created,
+                    }
+                    for code in codes
+                ]
+            conn.execute(insert(QuarantineItem.__table__), rows)
+            if reason_rows:
+                conn.execute(insert(QuarantineReasonCode.__table__), reason_rows)
+
+
+def _queue_state(status: str, rng: random.Random) -> dict[str, Any]:
+    # Retry backoff, leases and stage hand-offs on the live rows, so the claim
+    # predicates filter something. Every row carries every key (executemany).
+    now = now_utc()
+    state = dict.fromkeys(("started_at", "heartbeat_at", "retry_at", "next_stage", "lease_owner", "lease_expires_at", "finished_at"))
+    if status == "QUEUED":
+        roll = rng.random()
+        if roll < 0.1:
+            state["retry_at"] = now + timedelta(seconds=30)
+        elif roll < 0.2:
+            state.update(lease_owner="bench-worker", lease_expires_at=now + timedelta(seconds=60))
+        state["next_stage"] = rng.choice((None, *PIPELINE_STAGES[1:]))
+    elif status == "RUNNING":
+        state.update(started_at=now, heartbeat_at=now, lease_owner="bench-worker", lease_expires_at=now + timedelta(seconds=60))
+    else:
+        state["finished_at"] = now
+    return state
+
+
+def _samples(db: Session) -> dict[str, Any]:
+    # Look-up keys for the parameterised queries, taken from the seeded data.
+    tenant_id = db.execute(select(Run.tenant_id).limit(1)).scalar_one()
+    run_id = db.execute(select(RunStage.run_id).limit(1)).scalar_one_or_none() or db.execute(select(Run.id).limit(1)).scalar_one()
+    queued_run_id = db.execute(select(Run.id).where(Run.status == "QUEUED").limit(1)).scalar_one_or_none() or run_id
+    running_run_ids = list(db.execute(select(Run.id).where(Run.status == "RUNNING").limit(8)).scalars())
+    document_id = db.execute(select(QuarantineItem.document_id).limit(1)).scalar_one_or_none() or ""
+    return {
+        "tenant_id": tenant_id,
+        "run_id": run_id,
+        "queued_run_id": queued_run_id,
+        "running_run_ids": running_run_ids,
+        "document_id": document_id,
+    }
+
+
+def hot_queries(keys: dict[str, Any]) -> dict[str, Callable[[Session], Any]]:
+    tenant_id, run_id = keys["tenant_id"], keys["run_id"]
+    interactive, others = PRIORITY_CLASSES[:1], PRIORITY_CLASSES[1:]
+    transitions = [
+        {"stage_name": PIPELINE_STAGES[0], "status": "SUCCESS", "attempt": 1, "finished": True, "at": now_utc()},
+        {"stage_name": PIPELINE_STAGES[1], "status": "RUNNING", "attempt": 1, "started": True, "at": now_utc()},
+    ]
+    return {
+        # the worker's dequeue: interactive lane first, then the rest, per tenant under fair share
+        "claim_queued_runs_interactive": lambda db: claim_queued_runs(
+            db, owner="bench", lease_seconds=60, priorities=interactive
+        ),
+        "claim_queued_runs_other_lanes": lambda db: claim_queued_runs(db, owner="bench", lease_seconds=60, priorities=others),
+        "claim_queued_runs_tenant": lambda db: claim_queued_runs(
+            db, owner="bench", lease_seconds=60, tenant_id=tenant_id, priorities=interactive
+        ),
+        "claim_queued_runs_stage": lambda db: claim_queued_runs(
+            db, owner="bench", lease_seconds=60, tenant_id=tenant_id, priorities=interactive, stages=PIPELINE_STAGES[1:2]
+        ),
+        "start_run": lambda db: start_run(db, db.get(Run, keys["queued_run_id"]), owner="bench", lease_seconds=60),
+        "apply_stage_transitions": lambda db: apply_stage_transitions(
+            db, run_id=run_id, transitions=[dict(item) for item in transitions], known_rows={}
+        ),
+        "touch_run_heartbeats": lambda db: touch_run_heartbeats(db, keys["running_run_ids"], lease_seconds=60),
+        "count_runs_by_tenant": lambda db: count_runs_by_tenant(db, "QUEUED"),
+        "count_queued_runs_by_lane": lambda db: count_queued_runs_by_lane(db),
+        "summarize_claimable_runs": lambda db: summarize_claimable_runs(db),
+        "count_inflight_runs_by_tenant": lambda db: count_inflight_runs_by_tenant(db),
+        "list_run_stages": lambda db: list_run_stages(db, run_id),
+        "list_quarantine_items": lambda db: list_quarantine_items(db, tenant_id=tenant_id, status=QUARANTINE_STATUSES[0], limit=50),
+        "list_quarantine_items_by_reason": lambda db: list_quarantine_items(
+            db, tenant_id=tenant_id, status=QUARANTINE_STATUSES[0], reason_code=REASON_CODES[0], limit=50
+        ),
+        "count_quarantine_items_by_reason": lambda db: count_quarantine_items(db, tenant_id=tenant_id, reason_code=REASON_CODES[0]),
+        "summarize_quarantine_reasons": lambda db: summarize_quarantine_reasons(db, tenant_id=tenant_id),
+        "get_latest_open_quarantine_for_document": lambda db: get_latest_open_quarantine_for_document(
+            db, document_id=keys["document_id"], tenant_id=tenant_id
+        ),
+    }
+
+
+def _capture_statements(engine: Engine, db: Session, fn: Callable[[Session], Any]) -> list[tuple[str, Any]]:
+    captured: list[tuple[str, Any]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return captured
+
+
+def explain(conn: Connection, statement: str, parameters: Any) -> list[str]:
+    # On the benchmark's own connection: a second one would wait on its write lock.
+    sqlite = conn.dialect.name == "sqlite"
+    rows = conn.exec_driver_sql(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters).all()
+    return [str(row[-1]) if sqlite else str(row[0]) for row in rows]
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    tables = "|".join(HOT_TABLES)
+    # SQLite's SCAN walks the whole table or index (SEARCH is the bounded one), so
+    # "SCAN runs USING INDEX ..." counts as well: it reads every row in index order.
+    sqlite_scan = re.compile(rf"^SCAN ({tables})\b")
+    postgres_scan = re.compile(rf"Seq Scan on ({tables})\b")
+    return [line for line in plan if sqlite_scan.search(line.strip()) or postgres_scan.search(line)]
+
+
+def run_benchmark(engine: Engine, *, repeat: int) -> list[dict[str, Any]]:
+    results = []
+    with sessionmaker(bind=engine)() as db:
+        queries = hot_queries(_samples(db))
+    for name, fn in queries.items():
+        # The repository functions commit; inside an outer transaction those
+        # commits only release savepoints, and the rollback undoes the claims.
+        with engine.connect() as conn:
+            outer = conn.begin()
+            with Session(bind=conn, autoflush=False, join_transaction_mode="create_savepoint") as db:
+                statements = _capture_statements(engine, db, fn)
+                timings = []
+                for _ in range(max(1, repeat)):
+                    started = time.perf_counter()
+                    fn(db)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    db.expire_all()
+                plans = [{"sql": " ".join(sql.split()), "plan": explain(conn, sql, params)} for sql, params in statements]
+            outer.rollback()
+        ordered = sorted(timings)
+        results.append(
+            {
+                "query": name,
+                "latency_ms_p50": round(statistics.median(ordered), 3),
+                "latency_ms_p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+                "statements": plans,
+                "full_scans": [line for item in plans for line in full_scans(item["plan"])],
+            }
+        )
+    return results
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="InvoiceMind repository query benchmark")
+    parser.add_argument("--db-url", default=None, help="Target database (default: a fresh SQLite file in a temp dir)")
+    parser.add_argument("--runs", type=int, default=1_000_000)
+    parser.add_argument("--stages-per-run", type=int, default=3)
+    parser.add_argument("--quarantine", type=int, default=200_000)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reuse", action="store_true", help="Skip seeding if the runs table already has rows")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a hot query plan scans a whole hot table")
+    parser.add_argument("--json", action="store_true", help="Print json output")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    db_url = args.db_url or f"sqlite:///{Path(tempfile.mkdtemp(prefix='im-bench-')) / 'bench.db'}"
+    engine = _engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Run.__table__)).scalar_one()
+    if not (args.reuse and existing):
+        started = time.perf_counter()
+        seed(
+            engine,
+            runs=args.runs,
+            stages_per_run=min(args.stages_per_run, len(PIPELINE_STAGES)),
+            quarantine=args.quarantine,
+            tenants=max(1, args.tenants),
+            rng=random.Random(args.seed),
+        )
+        print(f"seeded runs={args.runs} in {time.perf_counter() - started:.1f}s ({engine.dialect.name})", file=sys.stderr)
+        # fresh statistics, so the planner sees the seeded distribution
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    results = run_benchmark(engine, repeat=args.repeat)
+    regressions = [item["query"] for item in results if item["full_scans"]]
+    if args.json:
+        print(json.dumps({"dialect": engine.dialect.name, "results": results, "full_scan_queries": regressions}, ensure_ascii=False))
+    else:
+        for item in results:
+            print(f"{item['query']}: p50={item['latency_ms_p50']}ms p95={item['latency_ms_p95']}ms")
+            for statement in item["statements"]:
+                for line in statement["plan"]:
+                    print(f"    {line}")
+        print(f"full_scan_queries={json.dumps(regressions)}")
+    if args.check and regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()